@@ -0,0 +1,72 @@
+import json
+
+from app.objects.secondclass.c_fact import Fact
+from app.objects.secondclass.c_relationship import Relationship
+from app.utility.base_parser import BaseParser
+
+# device field holding the value of a fact, selected by the last component of the trait (e.g. dcp.target.ip)
+TRAIT_FIELDS = {
+    "mac": "MAC",
+    "ip": "IP",
+    "name": "name_of_station",
+    "subnetmask": "netmask",
+    "gateway": "gateway",
+    "family": "family",
+    "interface": "interface",
+}
+
+
+class Parser(BaseParser):
+    """
+    Parses the JSON lines written by dcp_utility --format jsonl (id_all, id_one, get_ip, get_name) into facts about
+    the devices found, keyed by their MAC address. Each line is decoded once, so large identify all outputs are parsed
+    in linear time.
+    """
+
+    def parse(self, blob):
+        relationships = []
+        seen = set()
+        for line in self.line(blob):
+            device = self._parse_device(line.strip())
+            if not device:
+                continue
+            for mp in self.mappers:
+                source = self._get_value(mp.source, device)
+                target = self._get_value(mp.target, device) if mp.target else None
+                if not source or (mp.target and not target):
+                    continue
+                key = (mp.source, source, mp.edge, mp.target, target)
+                if key in seen:
+                    continue
+                seen.add(key)
+                relationships.append(
+                    Relationship(source=Fact(mp.source, source),
+                                 edge=mp.edge,
+                                 target=Fact(mp.target, target) if mp.target else None)
+                )
+        return relationships
+
+    @staticmethod
+    def _parse_device(line):
+        # returns the device fields of a successful result, get_ip and get_name only report the requested field
+        if not line.startswith("{"):
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        if record.get("status") != "ok":
+            return None
+        result = record.get("result")
+        if isinstance(result, dict):
+            return result
+        if record.get("action") == "get_ip":
+            return {"MAC": record.get("mac"), "IP": result}
+        if record.get("action") == "get_name":
+            return {"MAC": record.get("mac"), "name_of_station": result}
+        return None
+
+    @staticmethod
+    def _get_value(trait, device):
+        field = TRAIT_FIELDS.get(trait.rsplit(".", 1)[-1])
+        return device.get(field) if field else None
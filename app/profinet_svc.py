@@ -1,3 +1,6 @@
+import asyncio
+import hashlib
+import json
 import logging
 
 from aiohttp import web
@@ -10,20 +13,26 @@ class ProfinetService:
         self.services = services
 
         self.data_svc = services.get('data_svc')
-        self.log = logging.getLogger("profinet_svc") 
+        self.log = logging.getLogger("profinet_svc")
 
-    @template('profinet.html')
-    async def splash(self, request):
-        data = await self._get_plugin_data()
-        return data 
-    
-    async def plugin_data(self, request):
-        data = await self._get_plugin_data()
-        return web.json_response(data)
+        # The plugin data is built once and served from this cache until it is invalidated or the ability store changes
+        self._plugin_data = None
+        self._plugin_data_body = None
+        self._plugin_data_etag = None
+        self._store_size = None  # the number of abilities in the store the cached plugin data was built from
+
+    async def build_plugin_data(self):
+        """
+        Build the plugin data and cache it. Called at enable(), the cached data is served until invalidate() is
+        called or abilities are added to or removed from the store.
+        """
+        abilities = await self.data_svc.locate('abilities')
+        # which_plugin() may read the ability file (older Caldera versions), resolve them concurrently
+        plugins = await asyncio.gather(*(a.which_plugin() for a in abilities))
+        self._store_size = self._get_store_size()
 
-    async def _get_plugin_data(self):
         # Collapse abilities by their ability IDs - this fixes issue of duplicates as locate gives executor variants
-        abilities = {
+        profinet_abilities = {
             a.ability_id: {
                 "name"       : a.name,
                 "tactic"     : a.tactic,
@@ -31,8 +40,39 @@ class ProfinetService:
                 "technique_name": a.technique_name,
                 "description": a.description.replace('\n', '<br>')  # nicer display
             }
-            for a in await self.data_svc.locate('abilities')
-            if await a.which_plugin() == 'profinet'
+            for a, plugin in zip(abilities, plugins) if plugin == 'profinet'
         }
-        abilities = list(abilities.values())
-        return dict(name=self.name, description=self.description, abilities=abilities)
+        self._plugin_data = dict(name=self.name, description=self.description,
+                                 abilities=list(profinet_abilities.values()))
+        self._plugin_data_body = json.dumps(self._plugin_data)
+        self._plugin_data_etag = '"%s"' % hashlib.sha1(self._plugin_data_body.encode()).hexdigest()
+        return self._plugin_data
+
+    def invalidate(self):
+        """Drop the cached plugin data, e.g. after editing a profinet ability. It is built again on the next request."""
+        self._plugin_data = None
+
+    @template('profinet.html')
+    async def splash(self, request):
+        data = await self._get_plugin_data()
+        return data
+
+    async def plugin_data(self, request):
+        await self._get_plugin_data()
+        headers = {'ETag': self._plugin_data_etag, 'Cache-Control': 'no-cache'}
+        if request.headers.get('If-None-Match') == self._plugin_data_etag:
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=self._plugin_data_body, content_type='application/json', headers=headers)
+
+    async def _get_plugin_data(self):
+        if self._plugin_data is None:
+            return await self.build_plugin_data()
+        if self._get_store_size() != self._store_size:
+            self.log.debug('Ability store changed, rebuilding plugin data')
+            return await self.build_plugin_data()
+        return self._plugin_data
+
+    def _get_store_size(self):
+        # Loading or removing abilities changes the size of the store, which is read in constant time instead of
+        # locating all abilities on every request. Edits of existing abilities are picked up after invalidate().
+        return len(self.data_svc.ram['abilities'])
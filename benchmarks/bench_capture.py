@@ -0,0 +1,71 @@
+"""
+Measure the share of responses captured by DCP.identify_all depending on the number of responding devices. The devices
+are simulated by src/dcp_simulator.py on the loopback interface, responses lost in the receive buffer of the socket
+show up as a capture rate below 100%. Where available, the modified version is measured both with one recv per packet
+and with the memory-mapped receive ring (variant modified_ring).
+
+Requires root privileges (raw sockets on the loopback interface):
+    git show <baseline-commit>:src/pnio_dcp.py > /tmp/pnio_dcp_baseline.py
+    sudo python benchmarks/bench_capture.py --baseline /tmp/pnio_dcp_baseline.py
+"""
+import argparse
+import time
+
+from common import PNIO_DCP_PATH, load_pnio_dcp, report, simulator
+
+
+def measure(module, host, stations, timeout, repeat, receive_ring=False):
+    """
+    Run identify_all repeatedly against the simulated devices and return the lowest number of devices found.
+    :param receive_ring: Receive through the memory-mapped receive ring (only supported by the modified version).
+    :return: Lowest number of devices found, mean wall time, mean CPU time, packets dropped by the kernel in total
+    (None if the version does not count them).
+    :rtype: Tuple[int, float, float, Optional[int]]
+    """
+    dcp = module.DCP(host, receive_ring=True) if receive_ring else module.DCP(host)
+    dcp.default_timeout = dcp.identify_all_timeout = timeout
+    found = stations
+    wall = cpu = 0.0
+    for _ in range(repeat):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        found = min(found, len({device.MAC for device in dcp.identify_all(timeout)}))
+        wall += time.perf_counter() - wall_start
+        cpu += time.process_time() - cpu_start
+    drops = dcp.refresh_stats().kernel_drops if hasattr(dcp, 'refresh_stats') else None
+    if hasattr(dcp, 'close'):  # the baseline cannot close its socket
+        dcp.close()
+    return found, wall / repeat, cpu / repeat, drops
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="IP address selecting the interface (default: loopback)")
+    parser.add_argument("--interface", default="lo", help="interface the simulator answers on (default: lo)")
+    parser.add_argument("--devices", default="100,500,1000,2000,4000",
+                        help="comma separated numbers of simulated devices (default 100,500,1000,2000,4000)")
+    parser.add_argument("--timeout", type=float, default=3, help="identify_all timeout in seconds (default 3s)")
+    parser.add_argument("--repeat", type=int, default=2, help="number of identify_all calls per run (default 2)")
+    parser.add_argument("--baseline", help="path to an unmodified pnio_dcp.py to compare against")
+    args = parser.parse_args()
+
+    variants = [('modified', PNIO_DCP_PATH)]
+    if args.baseline:
+        variants.insert(0, ('baseline', args.baseline))
+    modules = []
+    for variant, path in variants:
+        module = load_pnio_dcp(path, f'pnio_dcp_{variant}')
+        modules.append((variant, module, False))
+        if hasattr(module, 'PacketRing'):
+            modules.append((f'{variant}_ring', module, True))
+    for stations in (int(count) for count in args.devices.split(',')):
+        with simulator(stations, args.interface):
+            for variant, module, receive_ring in modules:
+                found, wall, cpu, drops = measure(module, args.host, stations, args.timeout, args.repeat,
+                                                  receive_ring)
+                report('identify_all_capture', variant, devices=stations, found=found,
+                       capture_percent=round(100 * found / stations, 2), kernel_drops=drops, wall_s=round(wall, 4),
+                       cpu_s=round(cpu, 4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Measure the end-to-end latency of each dcp_utility subcommand, from starting the process until it exits, against
+devices simulated by src/dcp_simulator.py on the loopback interface.
+
+Requires root privileges (raw sockets on the loopback interface). By default src/dcp_utility.py is run with the
+python interpreter running the benchmark (the pnio_dcp library must be installed), use --utility to measure a built
+binary instead:
+    sudo python benchmarks/bench_cli.py
+    sudo python benchmarks/bench_cli.py --utility ./dcp_utility --variant binary
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import SRC_DIR, report, simulator
+
+# runs src/dcp_utility.py as script, src is appended to the path so the installed pnio_dcp package takes precedence
+# over the modified pnio_dcp.py next to it
+RUN_SOURCE = ("import runpy, sys; sys.path.append({src!r}); sys.argv[0] = 'dcp_utility'; "
+              "runpy.run_path({script!r}, run_name='__main__')")
+TARGET = '02:00:00:00:00:01'
+SUBCOMMANDS = [
+    ('help', ['--help']),
+    ('id_all', ['id_all', '--idle-timeout', '0.2']),
+    ('id_one', ['id_one', TARGET]),
+    ('get_ip', ['get_ip', TARGET]),
+    ('get_name', ['get_name', TARGET]),
+    ('set_ip', ['set_ip', TARGET, '192.168.0.1', '255.255.0.0', '192.168.0.1']),
+    ('set_name', ['set_name', TARGET, 'station-1']),
+    ('blink', ['blink', TARGET]),
+]
+# the plan of the apply subcommand, the mixed-case name is set lower-case and must still verify as ok
+APPLY_PLAN = {TARGET: {'name': 'stAtion-x', 'ip': '192.168.0.1', 'netmask': '255.255.0.0',
+                       'gateway': '192.168.0.1'}}
+
+
+def measure(command, repeat):
+    """
+    Run the given command repeatedly and return its latencies.
+    :return: Median and minimum wall time in seconds, whether all runs exited successfully with status ok for all
+    results.
+    :rtype: Tuple[float, float, bool]
+    """
+    latencies = []
+    success = True
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        latencies.append(time.perf_counter() - start)
+        records = [json.loads(line) for line in result.stdout.splitlines() if line.startswith('{')]
+        success = success and result.returncode == 0 and all(record['status'] == 'ok' for record in records)
+    return statistics.median(latencies), min(latencies), success
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utility", help="path to a dcp_utility binary (default: run src/dcp_utility.py)")
+    parser.add_argument("--variant", default="modified", help="name of the measured variant in the results")
+    parser.add_argument("--interface", default="lo", help="interface the simulator answers on (default: lo)")
+    parser.add_argument("--devices", type=int, default=10, help="number of simulated devices (default 10)")
+    parser.add_argument("--timeout", type=int, default=2, help="--timeout passed to dcp_utility (default 2s)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs per subcommand (default 5)")
+    args = parser.parse_args()
+
+    if args.utility:
+        utility = [args.utility]
+    else:
+        script = os.path.join(SRC_DIR, 'dcp_utility.py')
+        utility = [sys.executable, '-c', RUN_SOURCE.format(src=SRC_DIR, script=script)]
+    global_options = ['--interface', args.interface, '--timeout', str(args.timeout), '--format', 'jsonl']
+
+    plan_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+    with plan_file:
+        json.dump(APPLY_PLAN, plan_file)
+    subcommands = SUBCOMMANDS + [('apply', ['apply', plan_file.name])]
+
+    try:
+        with simulator(args.devices, args.interface):
+            for name, subcommand in subcommands:
+                median, fastest, success = measure(utility + global_options + subcommand, args.repeat)
+                report('cli_latency', args.variant, subcommand=name, median_ms=round(median * 1000, 1),
+                       min_ms=round(fastest * 1000, 1), success=success)
+    finally:
+        os.unlink(plan_file.name)
+
+
+if __name__ == '__main__':
+    main()
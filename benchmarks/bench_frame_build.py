@@ -0,0 +1,81 @@
+"""
+Measure the cost of building and sending request frames (DCP._send_request and, where available, the batch
+DCP._send_requests), with a socket that discards the frames so only the frame construction is measured.
+
+Requires root privileges (the DCP instance opens a raw socket on the loopback interface before it is replaced):
+    git show <baseline-commit>:src/pnio_dcp.py > /tmp/pnio_dcp_baseline.py
+    sudo python benchmarks/bench_frame_build.py --baseline /tmp/pnio_dcp_baseline.py
+"""
+import argparse
+import time
+
+from common import PNIO_DCP_PATH, load_pnio_dcp, report
+
+
+class DiscardSocket:
+    """L2 socket replacement discarding all frames sent."""
+
+    def send(self, data):
+        bytes(data)
+
+    def recv(self):
+        return None
+
+    def close(self):
+        pass
+
+
+def measure(module, host, frames, repeat, bulk=False):
+    """
+    Send the given number of get requests to distinct mac addresses repeatedly and return the best rate.
+    :param bulk: Send all requests of a round with a single call to DCP._send_requests.
+    :return: Frames built per second.
+    :rtype: float
+    """
+    dcp = module.DCP(host)
+    # the socket and the send method are name-mangled in the baseline
+    if hasattr(dcp, '_socket'):
+        dcp._socket.close()
+        dcp._socket = DiscardSocket()
+    else:
+        dcp._DCP__socket.close()
+        dcp._DCP__socket = DiscardSocket()
+    send_request = getattr(dcp, '_send_request', None) or dcp._DCP__send_request
+
+    constants = module.dcp_constants
+    option, suboption = constants.Option.IP_ADDRESS
+    macs = [f'02:00:00:00:{i >> 8 & 0xff:02x}:{i & 0xff:02x}' for i in range(frames)]
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if bulk:
+            dcp._send_requests(macs, constants.FrameID.GET_SET, constants.ServiceID.GET, option, suboption)
+        else:
+            for mac in macs:
+                send_request(mac, constants.FrameID.GET_SET, constants.ServiceID.GET, option, suboption)
+        best = max(best, frames / (time.perf_counter() - start))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="IP address selecting the interface (default: loopback)")
+    parser.add_argument("--frames", type=int, default=10000, help="number of frames built per round (default 10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of rounds, the best is reported (default 5)")
+    parser.add_argument("--baseline", help="path to an unmodified pnio_dcp.py to compare against")
+    args = parser.parse_args()
+
+    variants = [('modified', PNIO_DCP_PATH)]
+    if args.baseline:
+        variants.insert(0, ('baseline', args.baseline))
+    for variant, path in variants:
+        module = load_pnio_dcp(path, f'pnio_dcp_{variant}')
+        frames_per_second = measure(module, args.host, args.frames, args.repeat)
+        report('build_request_frame', variant, frames=args.frames, frames_per_s=round(frames_per_second))
+        if hasattr(module.DCP, '_send_requests'):
+            frames_per_second = measure(module, args.host, args.frames, args.repeat, bulk=True)
+            report('build_request_frame', f'{variant}_bulk', frames=args.frames, frames_per_s=round(frames_per_second))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Measure wall-clock and CPU time per DCP.identify_all call.
+
+Requires root privileges (raw socket). By default the loopback interface is used, so no Profinet hardware is needed:
+    git show <baseline-commit>:src/pnio_dcp.py > /tmp/pnio_dcp_baseline.py
+    sudo python benchmarks/bench_identify_all.py --baseline /tmp/pnio_dcp_baseline.py
+"""
+import argparse
+import time
+
+from common import PNIO_DCP_PATH, load_pnio_dcp, report
+
+
+def measure(module, host, timeout, repeat):
+    """
+    Run identify_all repeatedly and return the mean wall-clock and CPU time per call.
+    :return: Mean wall time, mean CPU time and the number of devices found in the last call.
+    :rtype: Tuple[float, float, int]
+    """
+    dcp = module.DCP(host)
+    dcp.default_timeout = dcp.identify_all_timeout = timeout
+    wall = cpu = 0.0
+    devices = []
+    for _ in range(repeat):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        devices = dcp.identify_all(timeout)
+        wall += time.perf_counter() - wall_start
+        cpu += time.process_time() - cpu_start
+    return wall / repeat, cpu / repeat, len(devices)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="IP address selecting the interface (default: loopback)")
+    parser.add_argument("--timeout", type=float, default=2, help="identify_all timeout in seconds (default 2s)")
+    parser.add_argument("--repeat", type=int, default=3, help="number of identify_all calls per variant (default 3)")
+    parser.add_argument("--baseline", help="path to an unmodified pnio_dcp.py to compare against")
+    args = parser.parse_args()
+
+    variants = [('modified', PNIO_DCP_PATH)]
+    if args.baseline:
+        variants.insert(0, ('baseline', args.baseline))
+    for variant, path in variants:
+        module = load_pnio_dcp(path, f'pnio_dcp_{variant}')
+        wall, cpu, found = measure(module, args.host, args.timeout, args.repeat)
+        report('identify_all', variant, timeout_s=args.timeout, wall_s=round(wall, 4), cpu_s=round(cpu, 4),
+               cpu_percent=round(100 * cpu / wall, 2), devices=found)
+
+
+if __name__ == '__main__':
+    main()
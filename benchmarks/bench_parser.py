@@ -0,0 +1,66 @@
+"""
+Measure the number of identify response frames parsed per second by DCP._parse_raw_packet and the memory retained
+per parsed device.
+
+Requires root privileges (the DCP instance opens a raw socket on the loopback interface, no packets are exchanged):
+    git show <baseline-commit>:src/pnio_dcp.py > /tmp/pnio_dcp_baseline.py
+    sudo python benchmarks/bench_parser.py --baseline /tmp/pnio_dcp_baseline.py
+"""
+import argparse
+import time
+import tracemalloc
+
+from common import PNIO_DCP_PATH, identify_response, load_pnio_dcp, report
+
+
+def measure(module, host, frames, repeat):
+    """
+    Parse the given number of distinct identify responses repeatedly and return the best throughput. Then parse
+    them once more while tracing memory allocations and keep all results, to measure the memory used per device.
+    :return: Frames parsed per second, bytes retained per parsed device.
+    :rtype: Tuple[float, int]
+    """
+    dcp = module.DCP(host)
+    xid = dcp._DCP__xid
+    destination = bytes.fromhex(dcp.src_mac.replace(':', ''))
+    packets = [identify_response(destination, bytes([2, 0, 0, 0, i >> 8, i & 0xff]), xid, i)
+               for i in range(1, frames + 1)]
+    # the parser is no longer name-mangled in the modified version
+    parse = getattr(dcp, '_parse_raw_packet', None) or dcp._DCP__parse_raw_packet
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for packet in packets:
+            parse(packet, False)
+        best = max(best, frames / (time.perf_counter() - start))
+
+    tracemalloc.start()
+    results = [parse(packet, False) for packet in packets]
+    # the modified parser returns the XID along with the device, only the device is retained by callers
+    devices = [result[1] if isinstance(result, tuple) else result for result in results]
+    del results
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return best, retained // len(devices)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="IP address selecting the interface (default: loopback)")
+    parser.add_argument("--frames", type=int, default=10000, help="number of frames parsed per round (default 10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of rounds, the best is reported (default 5)")
+    parser.add_argument("--baseline", help="path to an unmodified pnio_dcp.py to compare against")
+    args = parser.parse_args()
+
+    variants = [('modified', PNIO_DCP_PATH)]
+    if args.baseline:
+        variants.insert(0, ('baseline', args.baseline))
+    for variant, path in variants:
+        module = load_pnio_dcp(path, f'pnio_dcp_{variant}')
+        frames_per_second, bytes_per_device = measure(module, args.host, args.frames, args.repeat)
+        report('parse_identify_response', variant, frames=args.frames, frames_per_s=round(frames_per_second),
+               bytes_per_device=bytes_per_device)
+
+
+if __name__ == '__main__':
+    main()
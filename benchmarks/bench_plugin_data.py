@@ -0,0 +1,113 @@
+"""
+Measure the time to serve /plugin/profinet/data from ProfinetService against a synthetic Caldera ability store with
+many abilities from other plugins.
+
+Requires aiohttp and aiohttp_jinja2 (as installed with Caldera), no Caldera server or network access is needed:
+    git show <baseline-commit>:app/profinet_svc.py > /tmp/profinet_svc_baseline.py
+    python benchmarks/bench_plugin_data.py --baseline /tmp/profinet_svc_baseline.py
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import time
+
+from common import report
+
+PROFINET_SVC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'profinet_svc.py')
+
+
+class SyntheticAbility:
+    """Stand-in for a Caldera ability with the attributes read by ProfinetService."""
+
+    def __init__(self, index, plugin, executors=2):
+        self.ability_id = f'{plugin}-{index // executors}'
+        self.name = f'Ability {index}'
+        self.tactic = 'discovery'
+        self.technique_id = 'T0846'
+        self.technique_name = 'Remote System Discovery'
+        self.description = 'Line one\nLine two\nLine three'
+        self.plugin = plugin
+
+    async def which_plugin(self):
+        await asyncio.sleep(0)  # yield to the event loop like a real lookup
+        return self.plugin
+
+
+class SyntheticDataService:
+    """Stand-in for the Caldera data service holding the ability store."""
+
+    def __init__(self, abilities):
+        self.ram = dict(abilities=abilities)
+
+    async def locate(self, object_name, match=None):
+        return list(self.ram[object_name])
+
+
+class Request:
+    """Minimal request with the headers read by ProfinetService.plugin_data."""
+
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+def load_profinet_svc(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def measure(module, abilities, profinet_abilities, requests):
+    """
+    Create the service (building its cache where supported, like enable() does) and serve the data endpoint
+    repeatedly, with and without the ETag of the previous response.
+    :return: Setup time, mean time per request, mean time per conditional request (in seconds) and the status of the
+    conditional requests.
+    :rtype: Tuple[float, float, float, int]
+    """
+    store = [SyntheticAbility(i, 'other') for i in range(abilities)]
+    store += [SyntheticAbility(i, 'profinet') for i in range(profinet_abilities)]
+    services = dict(data_svc=SyntheticDataService(store))
+
+    start = time.perf_counter()
+    svc = module.ProfinetService(services, 'Profinet', 'benchmark')
+    if hasattr(svc, 'build_plugin_data'):
+        await svc.build_plugin_data()
+    setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await svc.plugin_data(Request())
+    per_request = (time.perf_counter() - start) / requests
+
+    headers = {'If-None-Match': response.headers['ETag']} if 'ETag' in response.headers else {}
+    start = time.perf_counter()
+    for _ in range(requests):
+        conditional = await svc.plugin_data(Request(headers))
+    per_conditional_request = (time.perf_counter() - start) / requests
+    return setup, per_request, per_conditional_request, conditional.status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--abilities", type=int, default=5000, help="abilities of other plugins in the store (default 5000)")
+    parser.add_argument("--profinet-abilities", type=int, default=14, help="profinet abilities in the store (default 14)")
+    parser.add_argument("--requests", type=int, default=50, help="number of requests served (default 50)")
+    parser.add_argument("--baseline", help="path to an unmodified profinet_svc.py to compare against")
+    args = parser.parse_args()
+
+    variants = [('modified', PROFINET_SVC_PATH)]
+    if args.baseline:
+        variants.insert(0, ('baseline', args.baseline))
+    for variant, path in variants:
+        module = load_profinet_svc(path, f'profinet_svc_{variant}')
+        setup, per_request, per_conditional_request, status = asyncio.run(
+            measure(module, args.abilities, args.profinet_abilities, args.requests))
+        report('plugin_data', variant, abilities=args.abilities + args.profinet_abilities,
+               setup_ms=round(setup * 1000, 2), request_ms=round(per_request * 1000, 3),
+               conditional_request_ms=round(per_conditional_request * 1000, 3), conditional_status=status)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Measure the number of recorded frames replayed per second through the parser (DCP.replay), without a socket. By
+default a synthetic capture of identify responses is written with PcapWriter first, use --pcap to replay a capture
+recorded with dcp_utility --pcap-out, tcpdump or Wireshark instead, e.g. traffic of a real network.
+
+No root privileges are required:
+    python benchmarks/bench_replay.py
+    python benchmarks/bench_replay.py --pcap capture.pcapng
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import PNIO_DCP_PATH, identify_response, load_pnio_dcp, report
+
+HOST_MAC = '02:00:00:ff:ff:fe'
+
+
+def write_capture(module, path, frames):
+    """Write a capture with the given number of identify responses to HOST_MAC, all answering the same request."""
+    writer = module.PcapWriter(path)
+    destination = bytes.fromhex(HOST_MAC.replace(':', ''))
+    for i in range(1, frames + 1):
+        writer.write(identify_response(destination, bytes([2, 0, 0, 0, i >> 8, i & 0xff]), 1, i))
+    writer.close()
+
+
+def measure(module, path, repeat):
+    """
+    Replay the capture repeatedly and return the best throughput.
+    :return: Frames in the capture, responses parsed per replay, frames replayed per second.
+    :rtype: Tuple[int, int, float]
+    """
+    frames = [frame for _, frame in module.read_pcap(path)]
+    host_mac = module.find_host_mac_address(frames) or HOST_MAC
+    dcp = module.DCP(None, l2_socket=module.OfflineSocket(host_mac))
+    responses = 0
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        responses = sum(1 for _ in dcp.replay(frames))
+        best = max(best, len(frames) / (time.perf_counter() - start))
+    return len(frames), responses, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pcap", help="pcap or pcapng file to replay (default: a synthetic capture)")
+    parser.add_argument("--frames", type=int, default=10000, help="number of frames of the synthetic capture "
+                                                                  "(default 10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of replays, the best is reported (default 5)")
+    args = parser.parse_args()
+
+    module = load_pnio_dcp(PNIO_DCP_PATH, 'pnio_dcp_modified')
+    if args.pcap:
+        frames, responses, frames_per_second = measure(module, args.pcap, args.repeat)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'identify_responses.pcap')
+            write_capture(module, path, args.frames)
+            frames, responses, frames_per_second = measure(module, path, args.repeat)
+    report('replay_capture', 'modified', capture=args.pcap or 'synthetic', frames=frames, responses=responses,
+           frames_per_s=round(frames_per_second))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Measure the startup cost of the dcp_utility payload: the time to import the pnio_dcp library with -X importtime, split
+into the package (its __init__ looks up the version of the package) and the modified pnio_dcp.py module with the slowest
+modules it imports, the wall time of `dcp_utility --help` and the time from starting `dcp_utility get_ip` until
+its request frame appears on the network interface (time to first frame), both with --interface and with the interface
+resolved from --host. The get_ip requests are answered by devices simulated by src/dcp_simulator.py.
+
+Requires root privileges for get_ip (raw sockets on the loopback interface). Python caches the compiled modules, like
+the built binary contains them, and each command is run once before it is measured to fill this cache. By default
+src/dcp_utility.py is run with the python interpreter running the benchmark (the pnio_dcp library must be installed),
+use --utility to measure a built binary instead (--help and get_ip only). As the pnio_dcp package always imports the
+installed pnio_dcp.py, compare versions by running the benchmark (or run_all.py) on each commit:
+    sudo python benchmarks/bench_startup.py
+    sudo python benchmarks/bench_startup.py --utility ./dcp_utility --variant binary
+"""
+import argparse
+import os
+import select
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from common import SRC_DIR, report, simulator
+
+# runs src/dcp_utility.py as script, see bench_cli.py
+RUN_SOURCE = ("import runpy, sys; sys.path.append({src!r}); sys.argv[0] = 'dcp_utility'; "
+              "runpy.run_path({script!r}, run_name='__main__')")
+TARGET = '02:00:00:00:00:01'
+ETHER_TYPE_PROFINET = 0x8892
+# offset of the service type in a DCP frame (after the ethernet header, frame id and service id), 0 for requests
+SERVICE_TYPE_OFFSET = 17
+
+
+def child_environment():
+    """
+    Get the environment of the measured processes: as the environment of the benchmark, but with bytecode caching
+    enabled.
+    :rtype: Dict[string, string]
+    """
+    environment = dict(os.environ)
+    environment.pop('PYTHONDONTWRITEBYTECODE', None)
+    return environment
+
+
+def parse_importtime(output):
+    """
+    Parse the -X importtime output of a process. A module is listed after the modules it imports, indented by one
+    level less.
+    :return: The nesting level, name and cumulative import time in microseconds of each imported module, in the order
+    of the output.
+    :rtype: List[Tuple[int, string, int]]
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip(' ')) - 1) // 2  # indented by two spaces per level after one space
+        imports.append((level, name.strip(), int(cumulative)))
+    return imports
+
+
+def get_imported_by(imports, name):
+    """
+    Get the cumulative import time of the given module and of the modules it imported directly (modules already
+    imported before are not listed).
+    :return: Cumulative import time of the module (None if it was not imported) and the modules it imported with their
+    cumulative import time in microseconds.
+    :rtype: Tuple[Optional[int], List[Tuple[string, int]]]
+    """
+    for index, (level, module, cumulative) in enumerate(imports):
+        if module != name:
+            continue
+        children = []
+        for child_level, child, child_cumulative in reversed(imports[:index]):
+            if child_level <= level:
+                break
+            if child_level == level + 1:
+                children.append((child, child_cumulative))
+        return cumulative, children
+    return None, []
+
+
+def measure_import(repeat):
+    """
+    Import pnio_dcp.pnio_dcp in fresh processes.
+    :return: Median import time of the package including the module, of the module alone, and the slowest modules
+    imported by the module (name, median milliseconds).
+    :rtype: Tuple[float, float, List[Tuple[string, float]]]
+    """
+    command = [sys.executable, '-X', 'importtime', '-c', 'import pnio_dcp.pnio_dcp']
+    totals = []
+    modules = []
+    children = {}
+    for run in range(repeat + 1):
+        result = subprocess.run(command, stderr=subprocess.PIPE, text=True, check=True, env=child_environment())
+        if run == 0:  # fills the bytecode cache
+            continue
+        imports = parse_importtime(result.stderr)
+        totals.append(get_imported_by(imports, 'pnio_dcp')[0])
+        module, module_children = get_imported_by(imports, 'pnio_dcp.pnio_dcp')
+        modules.append(module)
+        for child, cumulative in module_children:
+            children.setdefault(child, []).append(cumulative)
+    slowest = sorted(((child, statistics.median(times)) for child, times in children.items()),
+                     key=lambda child: child[1], reverse=True)[:5]
+    return (statistics.median(totals) / 1e6, statistics.median(modules) / 1e6,
+            [(child, round(microseconds / 1000, 1)) for child, microseconds in slowest])
+
+
+def measure_help(utility, repeat):
+    """
+    Run `dcp_utility --help` repeatedly.
+    :return: Median and minimum wall time in seconds, total import time in seconds (-X importtime, only if the utility
+    is run as script) and whether the pnio_dcp library was imported.
+    :rtype: Tuple[float, float, Optional[float], Optional[bool]]
+    """
+    latencies = []
+    for run in range(repeat + 1):
+        start = time.perf_counter()
+        subprocess.run(utility + ['--help'], stdout=subprocess.DEVNULL, env=child_environment())
+        if run > 0:
+            latencies.append(time.perf_counter() - start)
+    if utility[0] != sys.executable:
+        return statistics.median(latencies), min(latencies), None, None
+    result = subprocess.run(utility[:1] + ['-X', 'importtime'] + utility[1:] + ['--help'], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, env=child_environment())
+    imports = parse_importtime(result.stderr)
+    pnio_dcp_imported = any(name == 'pnio_dcp' for _, name, _ in imports)
+    import_time = sum(cumulative for level, _, cumulative in imports if level == 0) / 1e6
+    return statistics.median(latencies), min(latencies), import_time, pnio_dcp_imported
+
+
+def run_until_first_frame(command, interface):
+    """
+    Run the command and wait for the first DCP request frame it sends on the given network interface.
+    :return: Time from starting the process until the first request frame was received by a packet socket on the
+    interface (None if the process sent none) and until the process exited, in seconds, and the exit code.
+    :rtype: Tuple[Optional[float], float, int]
+    """
+    with socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETHER_TYPE_PROFINET)) as capture:
+        capture.bind((interface, 0))
+        first_frame = None
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   env=child_environment())
+        while first_frame is None and process.poll() is None:
+            if not select.select([capture], [], [], 0.01)[0]:
+                continue
+            frame = capture.recv(2048)
+            if len(frame) > SERVICE_TYPE_OFFSET and frame[SERVICE_TYPE_OFFSET] == 0:
+                first_frame = time.perf_counter() - start
+        exit_code = process.wait()
+        return first_frame, time.perf_counter() - start, exit_code
+
+
+def measure_first_frame(command, interface, repeat):
+    """
+    Run the command repeatedly and measure its time to first frame, see run_until_first_frame.
+    :return: Median and minimum time to first frame, median wall time in seconds and whether all runs sent a frame and
+    exited successfully.
+    :rtype: Tuple[Optional[float], Optional[float], float, bool]
+    """
+    first_frames = []
+    latencies = []
+    success = True
+    for run in range(repeat + 1):
+        first_frame, latency, exit_code = run_until_first_frame(command, interface)
+        if run == 0:
+            continue
+        success = success and first_frame is not None and exit_code == 0
+        if first_frame is not None:
+            first_frames.append(first_frame)
+        latencies.append(latency)
+    if not first_frames:
+        return None, None, statistics.median(latencies), False
+    return statistics.median(first_frames), min(first_frames), statistics.median(latencies), success
+
+
+def milliseconds(seconds):
+    """Round a duration in seconds to milliseconds, None stays None."""
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utility", help="path to a dcp_utility binary (default: run src/dcp_utility.py)")
+    parser.add_argument("--variant", default="modified", help="name of the measured variant in the results")
+    parser.add_argument("--host", default="127.0.0.1", help="IP address of the interface for get_ip --host "
+                                                            "(default: loopback)")
+    parser.add_argument("--interface", default="lo", help="interface the simulator answers on (default: lo)")
+    parser.add_argument("--timeout", type=int, default=2, help="--timeout passed to dcp_utility (default 2s)")
+    parser.add_argument("--repeat", type=int, default=10, help="number of runs per measurement (default 10)")
+    args = parser.parse_args()
+
+    if args.utility:
+        utility = [args.utility]
+    else:
+        total, module, slowest = measure_import(args.repeat)
+        report('startup_import', args.variant, median_ms=milliseconds(total),
+               package_ms=milliseconds(total - module), module_ms=milliseconds(module), slowest_imports=dict(slowest))
+        script = os.path.join(SRC_DIR, 'dcp_utility.py')
+        utility = [sys.executable, '-c', RUN_SOURCE.format(src=SRC_DIR, script=script)]
+    median, fastest, import_time, pnio_dcp_imported = measure_help(utility, args.repeat)
+    report('startup_cli', args.variant, subcommand='help', median_ms=milliseconds(median), min_ms=milliseconds(fastest),
+           import_ms=milliseconds(import_time), pnio_dcp_imported=pnio_dcp_imported)
+
+    get_ip = ['--timeout', str(args.timeout), 'get_ip', TARGET]
+    commands = [('get_ip', utility + ['--interface', args.interface] + get_ip),
+                ('get_ip_by_host', utility + ['--host', args.host, '--refresh-cache'] + get_ip)]
+    with simulator(1, args.interface):
+        for name, command in commands:
+            first_frame, fastest, latency, success = measure_first_frame(command, args.interface, args.repeat)
+            report('startup_cli', args.variant, subcommand=name, first_frame_median_ms=milliseconds(first_frame),
+                   first_frame_min_ms=milliseconds(fastest), median_ms=milliseconds(latency), success=success)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Shared helpers for the benchmarks of the modified pnio_dcp library and the dcp_utility payload."""
+import importlib.util
+import json
+import os
+import struct
+import subprocess
+import sys
+from contextlib import contextmanager
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+PNIO_DCP_PATH = os.path.join(SRC_DIR, 'pnio_dcp.py')
+SIMULATOR_PATH = os.path.join(SRC_DIR, 'dcp_simulator.py')
+
+
+def load_pnio_dcp(path=PNIO_DCP_PATH, name='pnio_dcp_under_test'):
+    """
+    Load a pnio_dcp.py module from the given path under a separate module name. This allows benchmarking the modified
+    version in this repository against an unmodified baseline. The pnio_dcp package (v1.1.6) must be installed, since
+    the module imports its constants, protocol and socket helpers from there.
+    :param path: Path to the pnio_dcp.py file to load.
+    :type path: string
+    :param name: Module name to register the loaded module under.
+    :type name: string
+    :return: The loaded module.
+    :rtype: module
+    """
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def dcp_block(option, suboption, payload, status=0):
+    """
+    Pack a DCP response block (header, block status and payload, padded to even length).
+    :return: The packed block.
+    :rtype: bytes
+    """
+    block = struct.pack('>BBHH', option, suboption, len(payload) + 2, status) + payload
+    return block + bytes(len(block) % 2)
+
+
+def identify_response(destination, source, xid, index=1):
+    """
+    Build a realistic identify response frame as sent by a Profinet IO device, with all blocks commonly found in
+    identify responses.
+    :param destination: mac address of the requesting host as bytes.
+    :type destination: bytes
+    :param source: mac address of the responding device as bytes.
+    :type source: bytes
+    :param xid: The XID of the request to answer.
+    :type xid: int
+    :param index: Number of the simulated device, used to generate its name and IP address.
+    :type index: int
+    :return: The response frame.
+    :rtype: bytes
+    """
+    ip = bytes([192, 168, (index >> 8) & 0xff, index & 0xff])
+    blocks = b''.join([
+        dcp_block(2, 5, bytes([2, 1, 2, 2, 2, 3, 2, 4, 2, 5, 2, 7, 1, 1, 1, 2, 5, 1, 5, 3, 5, 4, 5, 6])),
+        dcp_block(2, 1, b'S7-1500'),
+        dcp_block(2, 2, f'plc-station-{index}.cell-a'.encode()),
+        dcp_block(2, 3, struct.pack('>HH', 0x002a, 0x010e)),
+        dcp_block(2, 4, bytes([0x02, 0x00])),
+        dcp_block(2, 7, bytes([0x00, 0x64])),
+        dcp_block(1, 2, ip + bytes([255, 255, 255, 0]) + ip[:3] + bytes([1]), status=1),
+    ])
+    dcp_header = struct.pack('>HBBIHH', 0xfeff, 5, 1, xid, 0, len(blocks))
+    return destination + source + struct.pack('>H', 0x8892) + dcp_header + blocks
+
+
+def report(benchmark, variant, **results):
+    """
+    Print one benchmark result as a single JSON line, so results of different runs can be compared by machine.
+    :param benchmark: Name of the benchmark.
+    :type benchmark: string
+    :param variant: Name of the measured variant (e.g. 'baseline' or 'modified').
+    :type variant: string
+    :param results: The measured values.
+    """
+    print(json.dumps(dict(benchmark=benchmark, variant=variant, **results)))
+    sys.stdout.flush()
+
+
+@contextmanager
+def simulator(stations, interface='lo', seed=1):
+    """
+    Run the DCP simulator (src/dcp_simulator.py) on the given network interface in a separate process for the
+    duration of the with block. Requires root privileges.
+    :param stations: Number of simulated stations.
+    :type stations: int
+    :param interface: The network interface the simulator answers requests on.
+    :type interface: string
+    :param seed: Seed of the random response delays, so runs are reproducible.
+    :type seed: int
+    """
+    process = subprocess.Popen([sys.executable, SIMULATOR_PATH, '--interface', interface, '--stations', str(stations),
+                                '--seed', str(seed)], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        process.stdout.readline()  # the simulator prints one line once its socket is open
+        yield process
+    finally:
+        process.terminate()
+        process.wait()
@@ -0,0 +1,94 @@
+"""
+Run all benchmarks and write their results as one JSON document, together with the commit, python version and platform
+they were measured on, so runs of different versions can be compared by machine.
+
+Requires root privileges and the pnio_dcp library (v1.1.6), the plugin data benchmark additionally requires aiohttp
+and aiohttp_jinja2 and is skipped without them:
+    git show <baseline-commit>:src/pnio_dcp.py > /tmp/pnio_dcp_baseline.py
+    sudo python benchmarks/run_all.py --baseline /tmp/pnio_dcp_baseline.py --output results.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+# the benchmarks in the order they are run, and whether they accept a baseline pnio_dcp.py
+BENCHMARKS = [
+    ('bench_frame_build.py', True),
+    ('bench_parser.py', True),
+    ('bench_identify_all.py', True),
+    ('bench_capture.py', True),
+    ('bench_replay.py', False),
+    ('bench_cli.py', False),
+    ('bench_startup.py', False),
+    ('bench_plugin_data.py', False),
+]
+# modules required by a benchmark in addition to the pnio_dcp library
+REQUIREMENTS = {'bench_plugin_data.py': ('aiohttp', 'aiohttp_jinja2')}
+
+
+def get_commit():
+    """
+    Get the commit of the working tree the benchmarks are run on.
+    :return: The commit hash or None if git is not available.
+    :rtype: Optional[string]
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_DIR, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(script, arguments):
+    """
+    Run a benchmark script and collect the results it prints.
+    :return: The results (one dict per JSON line printed) and the exit code.
+    :rtype: Tuple[List[dict], int]
+    """
+    result = subprocess.run([sys.executable, os.path.join(BENCHMARK_DIR, script)] + arguments,
+                            cwd=BENCHMARK_DIR, stdout=subprocess.PIPE, text=True)
+    results = [json.loads(line) for line in result.stdout.splitlines() if line.startswith('{')]
+    return results, result.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", help="path to an unmodified pnio_dcp.py to compare against")
+    parser.add_argument("--output", help="file to write the results to (default: stdout)")
+    parser.add_argument("--only", help="comma separated names of the benchmarks to run, e.g. bench_parser")
+    args = parser.parse_args()
+
+    selected = None if args.only is None else {name.strip().replace('.py', '') for name in args.only.split(',')}
+    document = dict(commit=get_commit(), python=platform.python_version(), platform=platform.platform(),
+                    started=time.strftime('%Y-%m-%dT%H:%M:%S%z'), results=[], failed=[], skipped=[])
+    for script, accepts_baseline in BENCHMARKS:
+        name = script.replace('.py', '')
+        if selected is not None and name not in selected:
+            continue
+        if any(importlib.util.find_spec(module) is None for module in REQUIREMENTS.get(script, ())):
+            document['skipped'].append(name)
+            continue
+        print(f'running {name}', file=sys.stderr, flush=True)
+        arguments = ['--baseline', args.baseline] if args.baseline and accepts_baseline else []
+        results, exit_code = run_benchmark(script, arguments)
+        document['results'] += results
+        if exit_code != 0:
+            document['failed'].append(name)
+
+    output = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    else:
+        print(output)
+    sys.exit(1 if document['failed'] else 0)
+
+
+if __name__ == '__main__':
+    main()
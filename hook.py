@@ -9,6 +9,7 @@ access = BaseWorld.Access.RED
 
 async def enable(services):
     profinet_svc = ProfinetService(services, name, description)
+    await profinet_svc.build_plugin_data()
     app = services.get('app_svc').application
     app.router.add_route('GET', '/plugin/profinet/gui', profinet_svc.splash)
     app.router.add_route('GET', '/plugin/profinet/data', profinet_svc.plugin_data)
\ No newline at end of file
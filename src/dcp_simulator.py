@@ -0,0 +1,527 @@
+#! /usr/bin/env python
+"""
+Simulator of Profinet DCP devices, to test and load test the pnio_dcp library and dcp_utility without Profinet
+hardware. Only depends on the python standard library.
+
+The simulated stations answer Identify (all or filtered by name of station), Get and Set of the IP parameter and name
+of station, Signal (blink) and Reset to factory requests with the blocks real devices send. Responses to multicast
+identify requests are spread over the response delay window requested by the host, like real devices do.
+
+The simulator can be used in two ways:
+- In-memory: SimulatedSocket replaces the L2 socket of a DCP instance (DCP(None, l2_socket=SimulatedSocket(...))),
+  no network interface or privileges are required.
+- On a network interface: run this module as script to answer requests on an interface (e.g. the loopback interface
+  or one end of a veth pair), then run dcp_utility on the same (or the other) interface. Requires root privileges.
+
+    sudo python dcp_simulator.py --interface lo --stations 2000
+    sudo ./dcp_utility --interface lo id_all
+"""
+import argparse
+import heapq
+import ipaddress
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+
+ETHER_TYPE = 0x8892
+PROFINET_MULTICAST_MAC_IDENTIFY = bytes.fromhex('010ecf000000')
+
+# frame ids, service ids and service types of the DCP header
+FRAME_ID_GET_SET = 0xfefd
+FRAME_ID_IDENTIFY_REQUEST = 0xfefe
+FRAME_ID_IDENTIFY_RESPONSE = 0xfeff
+SERVICE_GET = 3
+SERVICE_SET = 4
+SERVICE_IDENTIFY = 5
+SERVICE_TYPE_REQUEST = 0
+SERVICE_TYPE_RESPONSE = 1
+
+# block options (option, suboption)
+OPTION_MAC_ADDRESS = (1, 1)
+OPTION_IP_PARAMETER = (1, 2)
+OPTION_DEVICE_VENDOR = (2, 1)
+OPTION_NAME_OF_STATION = (2, 2)
+OPTION_DEVICE_ID = (2, 3)
+OPTION_DEVICE_ROLE = (2, 4)
+OPTION_DEVICE_OPTIONS = (2, 5)
+OPTION_DEVICE_INSTANCE = (2, 7)
+OPTION_SIGNAL = (5, 3)
+OPTION_RESPONSE = (5, 4)
+OPTION_RESET_TO_FACTORY = (5, 6)
+OPTION_ALL = (0xff, 0xff)
+
+# response codes of set requests
+CODE_OK = 0
+CODE_OPTION_UNSUPPORTED = 1
+CODE_SUBOPTION_UNSUPPORTED = 2
+
+ETHERNET_HEADER = struct.Struct('>6s6sH')  # destination, source, ether type
+DCP_HEADER = struct.Struct('>HBBIHH')  # frame id, service id, service type, xid, response delay, length
+BLOCK_HEADER = struct.Struct('>BBH')  # option, suboption, length
+DCP_PAYLOAD_OFFSET = ETHERNET_HEADER.size + DCP_HEADER.size
+
+# time in seconds per unit of the response delay factor of a multicast identify request
+RESPONSE_DELAY_UNIT = 0.01
+# the options reported in the device options block of each station
+SUPPORTED_OPTIONS = (OPTION_MAC_ADDRESS, OPTION_IP_PARAMETER, OPTION_DEVICE_VENDOR, OPTION_NAME_OF_STATION,
+                     OPTION_DEVICE_ID, OPTION_DEVICE_ROLE, OPTION_DEVICE_OPTIONS, OPTION_DEVICE_INSTANCE,
+                     OPTION_SIGNAL, OPTION_RESET_TO_FACTORY)
+
+
+def mac_address_to_bytes(mac_address):
+    """
+    Convert a ':' or '-' separated mac address to bytes.
+    :param mac_address: The mac address.
+    :type mac_address: string
+    :return: The mac address as bytes.
+    :rtype: bytes
+    """
+    return bytes.fromhex(mac_address.replace(':', '').replace('-', ''))
+
+
+def mac_address_to_string(mac_address):
+    """
+    Convert a mac address from bytes to a ':' separated string.
+    :param mac_address: The mac address as bytes.
+    :type mac_address: bytes
+    :return: The mac address as string.
+    :rtype: string
+    """
+    return ':'.join(f'{byte:02x}' for byte in mac_address)
+
+
+def pack_block(option, payload, block_info=None):
+    """
+    Pack a DCP response block: the block header, the block status (if given) and the payload, padded to even length.
+    :param option: The (option, suboption) of the block.
+    :type option: Tuple[int, int]
+    :param payload: The payload of the block.
+    :type payload: bytes
+    :param block_info: The block status, included in all blocks except the response block of set requests.
+    :type block_info: Optional[int]
+    :return: The packed block.
+    :rtype: bytes
+    """
+    if block_info is not None:
+        payload = struct.pack('>H', block_info) + payload
+    block = BLOCK_HEADER.pack(option[0], option[1], len(payload)) + payload
+    return block + bytes(len(block) % 2)
+
+
+class SimulatedStation:
+    """A simulated Profinet IO device with the parameters reported in identify responses."""
+
+    def __init__(self, mac_address, name_of_station, ip='0.0.0.0', netmask='0.0.0.0', gateway='0.0.0.0',
+                 family='S7-1500', vendor_id=0x002a, device_id=0x010e, device_role=0x02, device_instance=(0, 100)):
+        """
+        Create a new station.
+        :param mac_address: The mac address of the station (as ':' separated string).
+        :type mac_address: string
+        :param name_of_station: The name of station.
+        :type name_of_station: string
+        :param ip: The IP address, subnet mask and gateway.
+        :type ip: string
+        """
+        self.mac_address = mac_address_to_bytes(mac_address)
+        self.name_of_station = name_of_station
+        self.ip = ip
+        self.netmask = netmask
+        self.gateway = gateway
+        self.family = family
+        self.vendor_id = vendor_id
+        self.device_id = device_id
+        self.device_role = device_role
+        self.device_instance = device_instance
+        self.blink_count = 0  # number of signal requests received
+        self.__identify_blocks = None  # the blocks of the identify response, built on first use
+
+    def set_ip_parameter(self, ip, netmask, gateway):
+        """Change the IP parameter of the station."""
+        self.ip, self.netmask, self.gateway = ip, netmask, gateway
+        self.__identify_blocks = None
+
+    def set_name_of_station(self, name_of_station):
+        """Change the name of station."""
+        self.name_of_station = name_of_station
+        self.__identify_blocks = None
+
+    def reset_to_factory(self):
+        """Reset the communication parameters (name of station and IP parameter) of the station."""
+        self.set_name_of_station('')
+        self.set_ip_parameter('0.0.0.0', '0.0.0.0', '0.0.0.0')
+
+    def get_block(self, option):
+        """
+        Get the response block of this station for the given option.
+        :param option: The (option, suboption) of the block.
+        :type option: Tuple[int, int]
+        :return: The packed block or None if the option is not supported.
+        :rtype: Optional[bytes]
+        """
+        if option == OPTION_MAC_ADDRESS:
+            return pack_block(option, self.mac_address, 0)
+        elif option == OPTION_IP_PARAMETER:
+            ip_block_info = 0 if self.ip == '0.0.0.0' else 1  # 1: IP set statically
+            payload = b''.join(ipaddress.IPv4Address(address).packed
+                               for address in (self.ip, self.netmask, self.gateway))
+            return pack_block(option, payload, ip_block_info)
+        elif option == OPTION_DEVICE_VENDOR:
+            return pack_block(option, self.family.encode(), 0)
+        elif option == OPTION_NAME_OF_STATION:
+            return pack_block(option, self.name_of_station.encode(), 0)
+        elif option == OPTION_DEVICE_ID:
+            return pack_block(option, struct.pack('>HH', self.vendor_id, self.device_id), 0)
+        elif option == OPTION_DEVICE_ROLE:
+            return pack_block(option, bytes([self.device_role, 0]), 0)
+        elif option == OPTION_DEVICE_OPTIONS:
+            return pack_block(option, bytes(value for supported in SUPPORTED_OPTIONS for value in supported), 0)
+        elif option == OPTION_DEVICE_INSTANCE:
+            return pack_block(option, bytes(self.device_instance), 0)
+        return None
+
+    def get_identify_blocks(self):
+        """
+        Get all blocks of the identify response of this station. The blocks are cached until a parameter changes.
+        :return: The packed blocks.
+        :rtype: bytes
+        """
+        if self.__identify_blocks is None:
+            self.__identify_blocks = b''.join(self.get_block(option) for option in (
+                OPTION_DEVICE_OPTIONS, OPTION_DEVICE_VENDOR, OPTION_NAME_OF_STATION, OPTION_DEVICE_ID,
+                OPTION_DEVICE_ROLE, OPTION_DEVICE_INSTANCE, OPTION_IP_PARAMETER))
+        return self.__identify_blocks
+
+
+class Simulator:
+    """
+    A network of simulated stations: parses DCP requests and builds the responses of all stations addressed by them,
+    together with the time each response is due.
+    """
+
+    def __init__(self, stations, processing_delay=0.0, seed=None):
+        """
+        Create a new simulator.
+        :param stations: The simulated stations.
+        :type stations: Iterable[SimulatedStation]
+        :param processing_delay: Time in seconds each station takes to answer a unicast request. Default: 0.
+        :type processing_delay: float
+        :param seed: Optional seed for the random response delays of multicast identify responses.
+        :type seed: Optional[int]
+        """
+        self.stations = {station.mac_address: station for station in stations}
+        self.processing_delay = processing_delay
+        self.requests = 0  # number of requests handled
+        self.responses = 0  # number of responses built
+        self.__random = random.Random(seed)
+
+    @classmethod
+    def with_stations(cls, count, network='192.168.0.0/16', base_mac='02:00:00:00:00:00', **kwargs):
+        """
+        Create a simulator with the given number of stations. Station i (starting at 1) is named station-i, gets the
+        i-th host address of the given network and a mac address counting up from the given base mac address.
+        :param count: The number of stations.
+        :type count: int
+        :param network: The IP network of the stations.
+        :type network: string
+        :param base_mac: The mac address before the one of the first station.
+        :type base_mac: string
+        :return: The new simulator, all other keyword arguments are passed to the constructor.
+        :rtype: Simulator
+        """
+        network = ipaddress.IPv4Network(network)
+        base = int.from_bytes(mac_address_to_bytes(base_mac), 'big')
+        gateway = str(network.network_address + 1)
+        stations = [SimulatedStation(mac_address_to_string((base + index).to_bytes(6, 'big')), f'station-{index}',
+                                     str(network.network_address + index), str(network.netmask), gateway)
+                    for index in range(1, count + 1)]
+        return cls(stations, **kwargs)
+
+    def handle(self, frame):
+        """
+        Handle a received frame.
+        :param frame: The received ethernet frame.
+        :type frame: bytes
+        :return: The responses to send as (delay in seconds, response frame), empty if the frame is not a DCP
+        request addressed to any station.
+        :rtype: List[Tuple[float, bytes]]
+        """
+        if len(frame) < DCP_PAYLOAD_OFFSET + BLOCK_HEADER.size:
+            return []
+        destination, source, ether_type = ETHERNET_HEADER.unpack_from(frame)
+        if ether_type != ETHER_TYPE:
+            return []
+        frame_id, service, service_type, xid, response_delay, length = DCP_HEADER.unpack_from(frame,
+                                                                                              ETHERNET_HEADER.size)
+        if service_type != SERVICE_TYPE_REQUEST:
+            return []
+        option, suboption, block_length = BLOCK_HEADER.unpack_from(frame, DCP_PAYLOAD_OFFSET)
+        value_offset = DCP_PAYLOAD_OFFSET + BLOCK_HEADER.size
+        value = bytes(frame[value_offset:value_offset + block_length])
+
+        multicast = destination == PROFINET_MULTICAST_MAC_IDENTIFY
+        if multicast and frame_id == FRAME_ID_IDENTIFY_REQUEST and service == SERVICE_IDENTIFY:
+            stations = self.stations.values()
+        elif destination in self.stations:
+            stations = (self.stations[destination],)
+        else:
+            return []
+        self.requests += 1
+
+        responses = []
+        for station in stations:
+            if service == SERVICE_IDENTIFY:
+                if not self.__matches_identify_filter(station, (option, suboption), value):
+                    continue
+                blocks = station.get_identify_blocks()
+                response_frame_id = FRAME_ID_IDENTIFY_RESPONSE
+            elif service == SERVICE_GET:
+                block = station.get_block((option, suboption))
+                blocks = block if block is not None else self.__response_block((option, suboption),
+                                                                              CODE_SUBOPTION_UNSUPPORTED)
+                response_frame_id = FRAME_ID_GET_SET
+            elif service == SERVICE_SET:
+                blocks = self.__response_block((option, suboption), self.__set(station, (option, suboption), value))
+                response_frame_id = FRAME_ID_GET_SET
+            else:
+                continue
+            header = DCP_HEADER.pack(response_frame_id, service, SERVICE_TYPE_RESPONSE, xid, 0, len(blocks))
+            response = ETHERNET_HEADER.pack(source, station.mac_address, ETHER_TYPE) + header + blocks
+            responses.append((self.__response_delay(multicast, response_delay), response))
+        self.responses += len(responses)
+        return responses
+
+    def __response_delay(self, multicast, response_delay):
+        """
+        Get the delay of a response: responses to multicast requests are spread randomly over the response delay
+        window requested by the host, responses to unicast requests take the processing delay.
+        """
+        if multicast and response_delay:
+            return self.__random.random() * response_delay * RESPONSE_DELAY_UNIT
+        return self.processing_delay
+
+    @staticmethod
+    def __matches_identify_filter(station, option, value):
+        """Whether the station matches the filter of an identify request (all or by name of station)."""
+        if option == OPTION_ALL:
+            return True
+        elif option == OPTION_NAME_OF_STATION:
+            return value.rstrip(b'\x00').decode(errors='replace') == station.name_of_station
+        return False
+
+    @staticmethod
+    def __set(station, option, value):
+        """
+        Apply a set request to the station.
+        :param value: The value of the request block, starting with the 2 byte block qualifier.
+        :type value: bytes
+        :return: The response code.
+        :rtype: int
+        """
+        data = value[2:]
+        if option == OPTION_IP_PARAMETER and len(data) >= 12:
+            station.set_ip_parameter(*(str(ipaddress.IPv4Address(data[offset:offset + 4])) for offset in (0, 4, 8)))
+        elif option == OPTION_NAME_OF_STATION:
+            station.set_name_of_station(data.decode(errors='replace'))
+        elif option == OPTION_SIGNAL:
+            station.blink_count += 1
+        elif option == OPTION_RESET_TO_FACTORY:
+            station.reset_to_factory()
+        elif option[0] in (1, 2, 5):
+            return CODE_SUBOPTION_UNSUPPORTED
+        else:
+            return CODE_OPTION_UNSUPPORTED
+        return CODE_OK
+
+    @staticmethod
+    def __response_block(option, code):
+        """Pack the response block of a set request with the given response code."""
+        return pack_block(OPTION_RESPONSE, bytes([option[0], option[1], code]))
+
+
+class ResponseScheduler:
+    """Sends the responses of a simulator when they are due, from a background thread."""
+
+    def __init__(self, send):
+        """
+        Create a new scheduler and start its thread.
+        :param send: Function sending a response frame, returns whether the frame was sent.
+        :type send: Callable[[bytes], bool]
+        """
+        self.send = send
+        self.sent = 0  # number of responses sent
+        self.dropped = 0  # number of responses that could not be sent
+        self.__queue = []  # heap of (due time, sequence number, frame)
+        self.__sequence = 0
+        self.__condition = threading.Condition()
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def schedule(self, responses):
+        """
+        Schedule the given responses.
+        :param responses: The responses as (delay in seconds, frame).
+        :type responses: Iterable[Tuple[float, bytes]]
+        """
+        now = time.monotonic()
+        with self.__condition:
+            for delay, frame in responses:
+                self.__sequence += 1
+                heapq.heappush(self.__queue, (now + delay, self.__sequence, frame))
+            self.__condition.notify()
+
+    def close(self):
+        """Stop the thread, responses not yet sent are discarded."""
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify()
+        self.__thread.join()
+
+    def __run(self):
+        """Wait for the next due response and send it."""
+        while True:
+            with self.__condition:
+                while not self.__closed and (not self.__queue or self.__queue[0][0] > time.monotonic()):
+                    self.__condition.wait(self.__queue[0][0] - time.monotonic() if self.__queue else None)
+                if self.__closed:
+                    return
+                _, _, frame = heapq.heappop(self.__queue)
+            if self.send(frame):
+                self.sent += 1
+            else:
+                self.dropped += 1
+
+
+class SimulatedSocket:
+    """
+    An in-memory transport connecting a DCP instance to a simulator, used in place of the L2 socket:
+    DCP(None, l2_socket=SimulatedSocket(simulator)).
+    Responses are delivered through a datagram socket pair, so the DCP instance can wait for them with select (and
+    AsyncDCP with the event loop) as on a raw socket. Responses that do not fit into the socket buffer are dropped and
+    counted, like the kernel drops packets when the receive buffer of a raw socket is full.
+    """
+    MTU = 0xffff
+    SO_SNDBUFFORCE = 32
+
+    def __init__(self, simulator, mac_address='02:00:00:ff:ff:fe', recv_timeout=1, buffer_size=4 * 1024 * 1024):
+        """
+        Create a new transport.
+        :param simulator: The simulator answering the requests sent on this transport.
+        :type simulator: Simulator
+        :param mac_address: The mac address of the simulated host.
+        :type mac_address: string
+        :param recv_timeout: The timeout of recv in seconds, like the timeout of L2LinuxSocket.
+        :type recv_timeout: float
+        :param buffer_size: Size in bytes of the buffer holding the responses not yet received.
+        :type buffer_size: int
+        """
+        self.simulator = simulator
+        self.mac_address = mac_address
+        # the host receives on socket, the simulator sends its responses on the other end
+        self.socket, self.__response_socket = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.socket.settimeout(recv_timeout)
+        try:
+            self.__response_socket.setsockopt(socket.SOL_SOCKET, self.SO_SNDBUFFORCE, buffer_size)
+        except OSError:
+            self.__response_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_size)
+        self.__response_socket.setblocking(False)
+        self.scheduler = ResponseScheduler(self.__send_response)
+
+    def recv(self):
+        """
+        Receive the next response.
+        :return: The next response (or None if no response has been received before the timeout).
+        :rtype: Optional(bytes)
+        """
+        try:
+            return self.socket.recv(self.MTU)
+        except socket.timeout:
+            return None
+
+    def send(self, data):
+        """
+        Send the given frame to the simulator.
+        :param data: The frame to send.
+        :type data: Any, will be converted to bytes
+        """
+        self.scheduler.schedule(self.simulator.handle(bytes(data)))
+
+    def close(self):
+        """Close the transport."""
+        self.scheduler.close()
+        self.__response_socket.close()
+        self.socket.close()
+
+    def __send_response(self, frame):
+        """Deliver a response to the host, returns False if the buffer is full."""
+        try:
+            self.__response_socket.send(frame)
+            return True
+        except (BlockingIOError, OSError):
+            return False
+
+
+class InterfaceResponder:
+    """Answers the DCP requests received on a network interface with the responses of a simulator (Linux only)."""
+
+    def __init__(self, simulator, interface):
+        """
+        Open a raw socket on the given interface.
+        :param simulator: The simulator answering the requests.
+        :type simulator: Simulator
+        :param interface: The network interface to answer requests on.
+        :type interface: string
+        """
+        self.simulator = simulator
+        self.socket = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETHER_TYPE))
+        self.socket.bind((interface, 0))
+        self.scheduler = ResponseScheduler(self.__send_response)
+
+    def serve_forever(self):
+        """Receive and answer requests until interrupted."""
+        while True:
+            self.scheduler.schedule(self.simulator.handle(self.socket.recv(0xffff)))
+
+    def close(self):
+        """Close the socket."""
+        self.scheduler.close()
+        self.socket.close()
+
+    def __send_response(self, frame):
+        """Send a response on the interface, returns False if it could not be sent."""
+        try:
+            self.socket.send(frame)
+            return True
+        except OSError:
+            return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Profinet DCP devices on a network interface.")
+    parser.add_argument("--interface", default="lo", help="network interface to answer requests on (default lo)")
+    parser.add_argument("--stations", type=int, default=10, help="number of simulated stations (default 10)")
+    parser.add_argument("--network", default="192.168.0.0/16", help="IP network of the stations (default 192.168.0.0/16)")
+    parser.add_argument("--base-mac", default="02:00:00:00:00:00", help="mac address before the one of the first station (default 02:00:00:00:00:00)")
+    parser.add_argument("--processing-delay", type=float, default=0.0, help="time each station takes to answer a unicast request in seconds (default 0)")
+    parser.add_argument("--seed", type=int, help="seed of the random response delays")
+    args = parser.parse_args()
+
+    simulator = Simulator.with_stations(args.stations, args.network, args.base_mac,
+                                        processing_delay=args.processing_delay, seed=args.seed)
+    responder = InterfaceResponder(simulator, args.interface)
+    print(f'simulating {args.stations} stations on {args.interface}', flush=True)
+    try:
+        responder.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        responder.close()
+        print(f'handled {simulator.requests} requests, sent {responder.scheduler.sent} responses, '
+              f'dropped {responder.scheduler.dropped}', file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,45 @@
 #! /usr/bin/env python
-import pnio_dcp
+#the pnio_dcp library, csv and multiprocessing are imported by the actions that need them, so that --help, invalid arguments and requests forwarded to a running daemon start faster
 import argparse
 import ipaddress
+import json
+import os
 import socket
+import sys
+import tempfile
+import time
 import re
 
 MAC_VALIDATE_PATTERN = "^(?:[0-9A-Fa-f]{2}[:-]){5}(?:[0-9A-Fa-f]{2})$"
 DEFAULT_TIMEOUT = 10
+DEFAULT_SETTLE_TIME = 0
+DEFAULT_DAEMON_ADDRESS = r'\\.\pipe\dcp_utility' if sys.platform == "win32" else os.path.join(tempfile.gettempdir(), "dcp_utility.sock")
+# arguments of each action in the order they are given in a CSV line of a batch file
+BATCH_ARGUMENTS = {
+    "id_all": (),
+    "id_one": ("mac",),
+    "get_ip": ("mac",),
+    "get_name": ("mac",),
+    "set_ip": ("mac", "ipaddr", "subnet", "gateway"),
+    "set_name": ("mac", "name"),
+    "reset": ("mac",),
+    "blink": ("mac",),
+}
+# actions of a batch file that only read from the target, consecutive reads are sent pipelined
+BATCH_READ_ACTIONS = ("id_one", "get_ip", "get_name")
+# columns of a CSV line of a plan file for apply, and the device field each column or JSON key of a plan sets
+PLAN_COLUMNS = ("mac", "ip", "netmask", "gateway", "name")
+PLAN_FIELDS = {"ip": "IP", "netmask": "netmask", "gateway": "gateway", "name": "name_of_station"}
+# global options of a forwarded request that fall back to the options given to the client
+GLOBAL_OPTIONS = ("host", "interface", "refresh_cache", "timeout", "settle_time", "format", "max_age", "stats", "pcap_out")
+OUTPUT_FORMATS = ("text", "json", "jsonl", "csv")
+# columns of the csv output, the fields of a device found are written to the device columns (see csv_columns), the
+# kind and previous values of a change reported by monitor to the change columns
+CSV_RESULT_COLUMNS = ("action", "mac", "status", "code", "result")
+CSV_CHANGE_COLUMNS = ("change", "previous")
 
 timeout = DEFAULT_TIMEOUT
-host = None
+settle_time = DEFAULT_SETTLE_TIME
 
 def getIP():
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -48,6 +78,26 @@ def add_idone_subparser(subparsers):
 
 def add_idall_subparser(subparsers):
     parser = subparsers.add_parser("id_all", help="Broadcast DCP Identify All request on subnet")
+    parser.add_argument(
+    "--idle-timeout",
+    type=float,
+    help="stop waiting early once the response delay window has passed and no response arrived for this many seconds"
+    )
+    parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="print each device as soon as its response is received instead of after the timeout"
+    )
+    parser.add_argument(
+    "--interfaces",
+    type=str,
+    help="discover on several network interfaces at once: 'all' or a comma separated list of interface names, e.g. eth1,eth2"
+    )
+    parser.add_argument(
+    "--ring",
+    action="store_true",
+    help="receive the responses through the memory-mapped receive ring instead of one system call per packet (Linux)"
+    )
 
 def add_getip_subparser(subparsers):
     parser = subparsers.add_parser("get_ip", help="Get IP address of target with specified MAC address")
@@ -93,6 +143,72 @@ def add_blink_subparser(subparsers):
     parser = subparsers.add_parser("blink", help="Request target device flash its LEDs to identify locally")
     add_mac_arg(parser)
 
+def add_monitor_subparser(subparsers):
+    parser = subparsers.add_parser("monitor", help="Passively watch all DCP traffic on the network interface and report new devices and changed IP addresses or names")
+    parser.add_argument(
+    "--duration",
+    type=float,
+    help="stop monitoring after this many seconds (default: until interrupted with Ctrl+C)"
+    )
+    parser.add_argument(
+    "--probe",
+    action="store_true",
+    help="send one DCP Identify All request at the start, so all devices are reported at once instead of when they are first observed"
+    )
+
+def add_batch_subparser(subparsers):
+    parser = subparsers.add_parser("batch", help="Run many actions read from a file or stdin (CSV or JSON lines) and write the results as JSON lines")
+    parser.add_argument(
+    "file",
+    nargs="?",
+    default="-",
+    help="file with one action per line, e.g. get_ip,aa:bb:cc:dd:ee:ff or {\"action\": \"set_name\", \"mac\": \"aa:bb:cc:dd:ee:ff\", \"name\": \"station1\"} (default: stdin)"
+    )
+
+def add_apply_subparser(subparsers):
+    parser = subparsers.add_parser("apply", help="Set the IP configuration and/or name of many devices at once as given in a plan file, then read back the new values to verify them")
+    parser.add_argument(
+    "file",
+    help="plan file (or - for stdin): a JSON object mapping each MAC address to its new ip, netmask, gateway and/or name, JSON lines with a mac key or CSV lines mac,ip,netmask,gateway,name"
+    )
+    parser.add_argument(
+    "--no-verify",
+    action="store_true",
+    help="only check the response codes of the set requests, do not read back the new values"
+    )
+
+def add_replay_subparser(subparsers):
+    parser = subparsers.add_parser("replay", help="Parse the DCP responses of a recorded pcap or pcapng file offline, as fast as possible and without network access, and print the devices and response codes found")
+    parser.add_argument(
+    "file",
+    help="pcap or pcapng file, e.g. recorded with --pcap-out, tcpdump or Wireshark"
+    )
+    parser.add_argument(
+    "--host-mac",
+    type=isMac,
+    help="MAC address of the host that recorded the file, only responses addressed to it are parsed (default: the most common destination of the responses in the file)"
+    )
+
+def add_address_arg(parser):
+    parser.add_argument(
+    "--address",
+    default=DEFAULT_DAEMON_ADDRESS,
+    help=f'unix socket path or named pipe of the daemon (default {DEFAULT_DAEMON_ADDRESS})'
+    )
+
+def add_serve_subparser(subparsers):
+    parser = subparsers.add_parser("serve", help="Run as daemon that keeps one DCP socket open and executes the actions forwarded by client")
+    add_address_arg(parser)
+
+def add_client_subparser(subparsers):
+    parser = subparsers.add_parser("client", help="Forward an action to the daemon started with serve, runs the action in-process if no daemon is running")
+    add_address_arg(parser)
+    parser.add_argument(
+    "request",
+    nargs=argparse.REMAINDER,
+    help="Action and its arguments, e.g. get_ip aa:bb:cc:dd:ee:ff"
+    )
+
 parser = argparse.ArgumentParser(prog="Profinet DCP Utility", 
     description="A command line utility to interface with devices compatible with Profinet DCP.")
 
@@ -102,12 +218,53 @@ parser.add_argument(
     help="IP address of host running utility"
     )
 
+parser.add_argument(
+    "--interface",
+    type=str,
+    help="network interface to use, skips selecting the interface by host IP address (on Windows --host is still used)"
+    )
+
+parser.add_argument(
+    "--refresh-cache",
+    action="store_true",
+    help="resolve the network interface of the host IP address again instead of using the cached result"
+    )
+
 parser.add_argument(
     "--timeout", 
     type=int, 
     help=f'how long to wait for response messages in seconds (default {timeout}s)'
     )
 
+parser.add_argument(
+    "--settle-time",
+    type=float,
+    help=f'how long to wait after a successful set_ip/set_name for the target to apply the change in seconds (default {settle_time}s)'
+    )
+
+parser.add_argument(
+    "--max-age",
+    type=float,
+    help="answer id_one, get_ip and get_name from the device cache (filled by all responses received) if the cached entry is at most this many seconds old (default: always send the request)"
+    )
+
+parser.add_argument(
+    "--stats",
+    action="store_true",
+    help="print statistics of the dcp transport to stderr when done: frames sent and received, rejected frames by reason, parse errors, unanswered requests, kernel drops (Linux), time spent waiting and parsing and a histogram of the response times"
+    )
+
+parser.add_argument(
+    "--pcap-out",
+    help="record every DCP frame sent and received to this pcap file (not with id_all --interfaces)"
+    )
+
+parser.add_argument(
+    "--format",
+    choices=OUTPUT_FORMATS,
+    help="output format: human-readable text (default) or records with an explicit status (ok, timeout, device_error, local_error) as one JSON array, JSON lines or CSV, progress messages are then written to stderr"
+    )
+
 subparsers = parser.add_subparsers(help="Action to be taken", required=True, dest="action")
 add_idone_subparser(subparsers)
 add_idall_subparser(subparsers)
@@ -117,94 +274,470 @@ add_getname_subparser(subparsers)
 add_setname_subparser(subparsers)
 add_reset_subparser(subparsers)
 add_blink_subparser(subparsers)
+add_monitor_subparser(subparsers)
+add_batch_subparser(subparsers)
+add_apply_subparser(subparsers)
+add_replay_subparser(subparsers)
+add_serve_subparser(subparsers)
+add_client_subparser(subparsers)
 
-cmd = parser.parse_args()
+def validate_args(cmd):
+    if(cmd.timeout != None and cmd.timeout < 1):
+        raise Exception("timeout must be >= 1")
 
+    if(cmd.settle_time != None and cmd.settle_time < 0):
+        raise Exception("settle time must be >= 0")
 
-#Validate command line arguments
-if(cmd.host == None):
-    host = getIP()
-else:
-    host = cmd.host
+    if(cmd.max_age != None and cmd.max_age < 0):
+        raise Exception("max age must be >= 0")
 
-if(cmd.timeout != None):
-    if(cmd.timeout < 1):
-        raise Exception("timeout must be >= 1")
-    else:
-        timeout = cmd.timeout
-
-#instantiate utility and run command
-dcp = pnio_dcp.DCP(host, timeout)
-response = None
-
-if(cmd.action.lower() == "id_all"):
-    print("sending dcp identify all request")
-    print("awaiting responses...")
-    response = dcp.identify_all(timeout)
-    if(response != None):
-        for i in response:
-            print(i)
-
-elif(cmd.action.lower() == "id_one"):
-    print(f'sending dcp identify request to {cmd.mac}')
-    print(f'awaiting response from {cmd.mac}')
+    if(cmd.action.lower() == "id_all" and cmd.idle_timeout != None):
+        if(cmd.idle_timeout < 0):
+            raise Exception("idle timeout must be >= 0")
+
+    if(cmd.action.lower() == "monitor" and cmd.duration != None):
+        if(cmd.duration <= 0):
+            raise Exception("duration must be > 0")
+
+    if(cmd.action.lower() == "id_all" and cmd.interfaces != None):
+        if(cmd.host != None or cmd.interface != None):
+            raise Exception("--interfaces cannot be combined with --host or --interface")
+        if(cmd.pcap_out != None):
+            raise Exception("--interfaces cannot be combined with --pcap-out")
+
+def import_pnio_dcp():
+    global pnio_dcp, DCPMonitor, DeviceCache, DeviceChange, InterfaceCache, MultiInterfaceDCP, OfflineSocket, ReconfigurationResult, find_host_mac_address, read_pcap
+    import pnio_dcp
+    from pnio_dcp.pnio_dcp import DCPMonitor, DeviceCache, DeviceChange, InterfaceCache, MultiInterfaceDCP, OfflineSocket, ReconfigurationResult, find_host_mac_address, read_pcap
+
+def get_host(cmd):
+    if(cmd.host != None):
+        return cmd.host
+    elif(cmd.interface != None and sys.platform != "win32"):
+        return None
+    return getIP()
+
+def create_dcp(cmd):
+    import_pnio_dcp()
+    if(cmd.action.lower() == "replay"):
+        #no socket is opened, the recorded responses are parsed as if received by the host that recorded them
+        mac = cmd.host_mac or find_host_mac_address(frame for _, frame in read_pcap(cmd.file)) or "00:00:00:00:00:00"
+        return pnio_dcp.DCP(None, DEFAULT_TIMEOUT, l2_socket=OfflineSocket(mac.lower()))
+    interfaces = getattr(cmd, "interfaces", None)
+    #with --ring, identify all receives the responses of all devices at once through a memory-mapped ring, falls back to recv where it is not available
+    receive_ring = cmd.action.lower() == "id_all" and cmd.ring
+    if(interfaces != None):
+        #one socket per interface, the devices are reported with the interface they were found on
+        names = None if interfaces.lower() == "all" else [name.strip() for name in interfaces.split(",") if name.strip()]
+        return MultiInterfaceDCP(names, DEFAULT_TIMEOUT, receive_ring)
+    host = get_host(cmd)
+    interface_cache = InterfaceCache()
+    if(cmd.refresh_cache):
+        interface_cache.invalidate(host)
+    if(cmd.action.lower() == "monitor"):
+        #separate passive socket receiving all dcp traffic on the interface, not only the responses to this host
+        return DCPMonitor(host, cmd.interface, interface_cache, pcap_out=cmd.pcap_out)
+    return pnio_dcp.DCP(host, DEFAULT_TIMEOUT, DEFAULT_SETTLE_TIME, cmd.interface, interface_cache, device_cache=DeviceCache(), receive_ring=receive_ring, pcap_out=cmd.pcap_out)
+
+def plan_entry(mac, values, line):
+    #maps the keys of a plan entry to device fields, unknown keys are passed on and rejected for their device
     try:
-        response = dcp.identify(cmd.mac)
-        print(response)
-    except(Exception, pnio_dcp.error.DcpTimeoutError) as e:
-        print("timeout occurred, no response received")
-
-elif(cmd.action.lower() == "get_ip"):
-    print(f'requesting ip address from {cmd.mac}')
-    print(f'awaiting response from {cmd.mac}')
+        mac = isMac(str(mac)).lower()
+    except argparse.ArgumentTypeError as e:
+        raise Exception(f'line {line}: {e}')
+    if(not isinstance(values, dict)):
+        raise Exception(f'line {line}: the new values of {mac} must be an object')
+    return mac, {PLAN_FIELDS.get(key, key): value for key, value in values.items()}
+
+def read_plan(path):
+    #returns the new values by mac address, entries for the same mac address are merged
+    plan_file = sys.stdin if path == "-" else open(path)
+    with plan_file:
+        content = plan_file.read()
+    plan = {}
     try:
-        response = dcp.get_ip_address(cmd.mac)
-        print(response)
-    except(Exception, pnio_dcp.error.DcpTimeoutError) as e:
-        print("timeout occurred, no response received")
-
-elif(cmd.action.lower() == "set_ip"):
-    print(f'sending command to set ip config of device {cmd.mac} to IP:{cmd.ipaddr}, SUB:{cmd.subnet}, GW:{cmd.gateway}')
-    print(f'awaiting response from {cmd.mac}')
+        document = json.loads(content)
+    except ValueError:
+        document = None
+    if(isinstance(document, dict) and "mac" not in document):
+        for mac, values in document.items():
+            mac, fields = plan_entry(mac, values, 1)
+            plan.setdefault(mac, {}).update(fields)
+        return plan
+
+    for number, line in enumerate(content.splitlines(), 1):
+        line = line.strip()
+        if(not line or line.startswith("#")):
+            continue
+        if(line.startswith("{")):
+            try:
+                values = json.loads(line)
+            except ValueError as e:
+                raise Exception(f'line {number}: {e}')
+        else:
+            import csv
+            values = dict(zip(PLAN_COLUMNS, (value.strip() for value in next(csv.reader([line])))))
+        if(not isinstance(values, dict) or values.get("mac") in (None, "")):
+            raise Exception(f'line {number}: missing mac')
+        mac, fields = plan_entry(values.pop("mac"), values, number)
+        plan.setdefault(mac, {}).update(fields)
+    return plan
+
+def write_line(line):
+    print(line, flush=True)
+
+def write_error(line):
+    print(line, file=sys.stderr, flush=True)
+
+def apply_timeouts(dcp, cmd):
+    #a daemon reuses its DCP instance for actions with different timeouts
+    dcp.default_timeout = dcp.identify_all_timeout = timeout if cmd.timeout == None else cmd.timeout
+    dcp.waiting_time = settle_time if cmd.settle_time == None else cmd.settle_time
+    dcp.cache_max_age = cmd.max_age
+
+def perform_action(dcp, cmd, progress):
+    #yields (status, response) for each result of the action, response is the device, string or ResponseCode received or the error message
+    action = cmd.action.lower()
+    if(action == "id_all"):
+        progress("sending dcp identify all request")
+        progress("awaiting responses...")
+        if(cmd.stream):
+            devices = dcp.iter_identify_all(dcp.identify_all_timeout, cmd.idle_timeout)
+        else:
+            devices = dcp.identify_all(dcp.identify_all_timeout, cmd.idle_timeout)
+        for device in devices:
+            yield "ok", device
+        return
+
+    if(action == "monitor"):
+        if(cmd.probe):
+            progress("sending dcp identify all request")
+            dcp.probe()
+        progress("monitoring dcp traffic, press Ctrl+C to stop")
+        try:
+            for change in dcp.watch(cmd.duration):
+                yield "ok", change
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if(action == "replay"):
+        frames = [frame for _, frame in read_pcap(cmd.file)]
+        progress(f'replaying {len(frames)} frames from {cmd.file} as received by {dcp.src_mac}')
+        start = time.perf_counter()
+        responses = [response for _, response in dcp.replay(frames)]
+        elapsed = time.perf_counter() - start
+        for response in responses:
+            failed = isinstance(response, pnio_dcp.ResponseCode) and not response
+            yield "device_error" if failed else "ok", response
+        progress(f'parsed {len(frames)} frames in {elapsed:.3f}s ({len(frames) / max(elapsed, 1e-9):.0f} frames/s), {len(responses)} responses')
+        return
+
+    if(action == "apply"):
+        try:
+            plan = read_plan(cmd.file)
+        except Exception as e:
+            yield "local_error", str(e)
+            return
+        progress(f'sending set requests to {len(plan)} devices')
+        if(not cmd.no_verify):
+            progress("awaiting responses, then reading back the new values...")
+        results = dcp.reconfigure(plan, verify=not cmd.no_verify)
+        for result in results.values():
+            yield result.status, result
+        return
+
+    if(action == "id_one"):
+        progress(f'sending dcp identify request to {cmd.mac}')
+        request = lambda: dcp.identify(cmd.mac)
+    elif(action == "get_ip"):
+        progress(f'requesting ip address from {cmd.mac}')
+        request = lambda: dcp.get_ip_address(cmd.mac)
+    elif(action == "set_ip"):
+        progress(f'sending command to set ip config of device {cmd.mac} to IP:{cmd.ipaddr}, SUB:{cmd.subnet}, GW:{cmd.gateway}')
+        request = lambda: dcp.set_ip_address(cmd.mac, [cmd.ipaddr,cmd.subnet,cmd.gateway])
+    elif(action == "get_name"):
+        progress(f'sending command to get name of device {cmd.mac}')
+        request = lambda: dcp.get_name_of_station(cmd.mac)
+    elif(action == "set_name"):
+        progress(f'sending command to set name of device {cmd.mac} to {cmd.name}')
+        request = lambda: dcp.set_name_of_station(cmd.mac, cmd.name)
+    elif(action == "reset"):
+        progress(f'sending command to reset device {cmd.mac} to factory defaults')
+        request = lambda: dcp.reset_to_factory(cmd.mac)
+    elif(action == "blink"):
+        progress(f'sending command to {cmd.mac} to flash its LEDs')
+        request = lambda: dcp.blink(cmd.mac)
+    progress(f'awaiting response from {cmd.mac}')
+
     try:
-        response = dcp.set_ip_address(cmd.mac, [cmd.ipaddr,cmd.subnet,cmd.gateway])
-        print(response)
-    except(Exception, pnio_dcp.error.DcpTimeoutError) as e:
-        print("timeout occurred, no response received")
-
-elif(cmd.action.lower() == "get_name"):
-    print(f'sending command to get name of device {cmd.mac}')
-    print(f'awaiting response from {cmd.mac}')
+        response = request()
+    except pnio_dcp.DcpTimeoutError:
+        yield "timeout", None
+    except Exception as e:
+        yield "local_error", str(e)
+    else:
+        failed = isinstance(response, pnio_dcp.ResponseCode) and not response
+        yield "device_error" if failed else "ok", response
+
+def action_record(cmd, status, response):
+    fields = {"action": cmd.action.lower(), "mac": getattr(cmd, "mac", None)}
+    if(isinstance(response, pnio_dcp.Device)):
+        return batch_result(dict(fields, mac=response.MAC), status, response.to_dict())
+    elif(isinstance(response, DeviceChange)):
+        return batch_result(dict(fields, mac=response.device.MAC), status, response.device.to_dict(), change=response.kind, previous=response.previous)
+    elif(isinstance(response, pnio_dcp.ResponseCode)):
+        return batch_result(fields, status, response.get_message(), code=response.code)
+    elif(isinstance(response, ReconfigurationResult)):
+        #the code column holds the code of the first rejected set request
+        details = response.to_dict()
+        codes = [code for code in details["responses"].values() if code not in (None, 0)]
+        return batch_result(dict(fields, mac=response.mac), status, str(response), code=codes[0] if codes else None,
+                            requested=details["requested"], responses=details["responses"], observed=details["observed"])
+    return batch_result(fields, status, response)
+
+def action_text(status, response):
+    if(isinstance(response, ReconfigurationResult)):
+        return str(response)
+    elif(status == "timeout"):
+        return "timeout occurred, no response received"
+    elif(status == "local_error"):
+        return f'error occurred: {response}'
+    return response
+
+def csv_columns():
+    return CSV_RESULT_COLUMNS + pnio_dcp.Device.FIELDS + CSV_CHANGE_COLUMNS
+
+def csv_line(values):
+    import csv
+    import io
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(values)
+    return buffer.getvalue()
+
+def csv_row(record):
+    #device results are spread over the device columns, other results are written to the result column
+    values = dict(record)
+    if(isinstance(record["result"], dict)):
+        values.update(values.pop("result"))
+    row = []
+    for name in csv_columns():
+        value = values.get(name)
+        row.append(json.dumps(value) if isinstance(value, (dict, list, tuple)) else value)
+    return csv_line(row)
+
+def run_action(dcp, cmd, out=write_line, err=write_error):
+    apply_timeouts(dcp, cmd)
+    if(cmd.stats):
+        #a daemon reports the statistics of each forwarded action only
+        dcp.reset_stats()
+    output_format = cmd.format or "text"
+    #structured formats keep stdout for the records only, progress messages go to stderr
+    progress = out if output_format == "text" else err
+    records = []
+
+    if(output_format == "csv"):
+        out(csv_line(csv_columns()))
+    for status, response in perform_action(dcp, cmd, progress):
+        if(output_format == "text"):
+            out(action_text(status, response))
+        elif(output_format == "json"):
+            records.append(action_record(cmd, status, response))
+        elif(output_format == "jsonl"):
+            out(json.dumps(action_record(cmd, status, response)))
+        else:
+            out(csv_row(action_record(cmd, status, response)))
+    if(output_format == "json"):
+        out(json.dumps(records))
+    progress("done")
+    finish_action(dcp, cmd, err)
+
+def finish_action(dcp, cmd, err):
+    #writes the recorded frames to the pcap file and prints the statistics
+    if(cmd.pcap_out != None):
+        dcp.pcap_writer.flush()
+    if(cmd.stats):
+        err(dcp.refresh_stats().summary())
+
+def parse_batch_line(line):
+    if(line.startswith("{")):
+        fields = json.loads(line)
+    else:
+        import csv
+        values = [value.strip() for value in next(csv.reader([line]))]
+        fields = dict(zip(("action",) + BATCH_ARGUMENTS.get(values[0], ()), values))
+
+    action = fields.get("action")
+    if(action not in BATCH_ARGUMENTS):
+        raise ValueError(f'unknown action "{action}"')
+    missing = [name for name in BATCH_ARGUMENTS[action] if fields.get(name) in (None, "")]
+    if(missing):
+        raise ValueError(f'missing {", ".join(missing)} for action {action}')
+    if("mac" in fields):
+        fields["mac"] = isMac(fields["mac"])
+    for name in ("ipaddr", "subnet", "gateway"):
+        if(name in fields):
+            isIP(fields[name])
+    return fields
+
+def batch_result(fields, status, result=None, **extra):
+    return dict(action=fields.get("action"), mac=fields.get("mac"), status=status, result=result, **extra)
+
+def run_batch_reads(dcp, reads):
+    #send all reads of the same action at once, each read is answered from the results by mac address
+    results = {}
+    for action, batch_request in (("id_one", dcp.identify_many), ("get_ip", dcp.get_ip_addresses), ("get_name", dcp.get_names_of_station)):
+        macs = [fields["mac"] for fields in reads if fields["action"] == action]
+        if(macs):
+            results[action] = batch_request(macs)
+
+    for fields in reads:
+        response = results[fields["action"]][fields["mac"]]
+        if(response == None):
+            yield batch_result(fields, "timeout")
+        elif(fields["action"] == "id_one"):
+            yield batch_result(fields, "ok", response.to_dict())
+        else:
+            yield batch_result(fields, "ok", response)
+
+def run_batch_write(dcp, fields):
+    action = fields["action"]
     try:
-        response = dcp.get_name_of_station(cmd.mac)
-        print(response)
-    except(Exception, pnio_dcp.error.DcpTimeoutError) as e:
-        print("timeout occurred, no response received")
-
-elif(cmd.action.lower() == "set_name"):
-    print(f'sending command to set name of device {cmd.mac} to {cmd.name}')
-    print(f'awaiting response from {cmd.mac}')
+        if(action == "id_all"):
+            return batch_result(fields, "ok", [device.to_dict() for device in dcp.identify_all()])
+        elif(action == "set_ip"):
+            response = dcp.set_ip_address(fields["mac"], [fields["ipaddr"], fields["subnet"], fields["gateway"]])
+        elif(action == "set_name"):
+            response = dcp.set_name_of_station(fields["mac"], fields["name"])
+        elif(action == "reset"):
+            response = dcp.reset_to_factory(fields["mac"])
+        else:
+            response = dcp.blink(fields["mac"])
+    except pnio_dcp.error.DcpTimeoutError:
+        return batch_result(fields, "timeout")
+    except Exception as e:
+        return batch_result(fields, "local_error", str(e))
+    return batch_result(fields, "ok" if response else "device_error", response.get_message(), code=response.code)
+
+def run_batch(dcp, cmd, out=write_line):
+    apply_timeouts(dcp, cmd)
+    if(cmd.stats):
+        dcp.reset_stats()
+    #consecutive reads are collected and sent pipelined before the next write, so the results keep the input order
+    pending = []
+
+    def flush():
+        reads = [fields for fields, error in pending if error == None]
+        results = run_batch_reads(dcp, reads)
+        for fields, error in pending:
+            result = batch_result(fields, "local_error", error) if error != None else next(results)
+            out(json.dumps(result))
+        pending.clear()
+
+    batch_file = sys.stdin if cmd.file == "-" else open(cmd.file)
+    with batch_file:
+        for line in batch_file:
+            line = line.strip()
+            if(not line or line.startswith("#")):
+                continue
+            try:
+                fields = parse_batch_line(line)
+            except (ValueError, argparse.ArgumentTypeError) as e:
+                action = None if line.startswith("{") else line.split(",")[0]
+                pending.append(({"action": action}, str(e)))
+                continue
+            if(fields["action"] in BATCH_READ_ACTIONS):
+                pending.append((fields, None))
+            else:
+                flush()
+                out(json.dumps(run_batch_write(dcp, fields)))
+    flush()
+    finish_action(dcp, cmd, write_error)
+
+def send_message(connection, **message):
+    connection.send_bytes(json.dumps(message).encode())
+
+def handle_request(dcp, host, interface, connection):
+    request = argparse.Namespace(**json.loads(connection.recv_bytes()))
+    #the daemon can only serve requests for the network interface its socket is bound to and does not record them to a pcap file
+    if(request.host not in (None, host) or request.interface not in (None, interface) or getattr(request, "interfaces", None) != None or request.pcap_out != None):
+        send_message(connection, status="unsupported")
+        return
+
+    def out(line):
+        send_message(connection, output=str(line))
+
+    def err(line):
+        send_message(connection, error=str(line))
+
     try:
-        response = dcp.set_name_of_station(cmd.mac, cmd.name)
-        print(response)
-    except(Exception, pnio_dcp.error.DcpTimeoutError) as e:
-        print("timeout occurred, no response received")
-
-elif(cmd.action.lower() == "reset"):
-    print(f'sending command to reset device {cmd.mac} to factory defaults')
-    print(f'awaiting response from {cmd.mac}')
+        run_action(dcp, request, out, err)
+    except Exception as e:
+        err(f'error occurred: {e}')
+    send_message(connection, status="done")
+
+def serve(cmd):
+    from multiprocessing.connection import Listener
+    host = get_host(cmd)
+    dcp = create_dcp(cmd)
+    if(sys.platform != "win32" and os.path.exists(cmd.address)):
+        os.unlink(cmd.address)
+    #only the user running the daemon may connect to its unix socket
+    old_umask = os.umask(0o177) if sys.platform != "win32" else None
     try:
-        response = dcp.reset_to_factory(cmd.mac)
-        print(response)
-    except(Exception, pnio_dcp.error.DcpTimeoutError) as e:
-        print("timeout occurred, no response received")
-
-elif(cmd.action.lower() == "blink"):
-    print(f'sending command to {cmd.mac} to flash its LEDs')
-    print(f'awaiting response from {cmd.mac}')
+        listener = Listener(cmd.address)
+    finally:
+        if(old_umask != None):
+            os.umask(old_umask)
+    print(f'serving dcp requests on {cmd.address}', flush=True)
+    with listener:
+        while True:
+            with listener.accept() as connection:
+                try:
+                    handle_request(dcp, host, cmd.interface, connection)
+                except (OSError, EOFError, ValueError, TypeError) as e:
+                    print(f'failed to handle request: {e}', flush=True)
+
+def forward_request(cmd):
+    request = parser.parse_args(cmd.request)
+    if(request.action.lower() in ("serve", "client", "batch", "monitor", "apply", "replay")):
+        parser.error(f'{request.action} cannot be forwarded to the daemon')
+    for name in GLOBAL_OPTIONS:
+        if(getattr(request, name) in (None, False)):
+            setattr(request, name, getattr(cmd, name))
+    validate_args(request)
+
+    from multiprocessing.connection import Client
     try:
-        response = dcp.blink(cmd.mac)
-        print(response)
-    except(Exception, pnio_dcp.error.DcpTimeoutError) as e:
-        print("timeout occurred, no response received")
-print("done")
\ No newline at end of file
+        connection = Client(cmd.address)
+    except OSError:
+        #no daemon running, run the action in-process
+        run_action(create_dcp(request), request)
+        return
+
+    with connection:
+        send_message(connection, **vars(request))
+        while True:
+            message = json.loads(connection.recv_bytes())
+            if("output" in message):
+                write_line(message["output"])
+            elif("error" in message):
+                write_error(message["error"])
+            elif(message.get("status") == "unsupported"):
+                run_action(create_dcp(request), request)
+                return
+            else:
+                return
+
+if __name__ == "__main__":
+    cmd = parser.parse_args()
+    validate_args(cmd)
+
+    if(cmd.action.lower() == "serve"):
+        serve(cmd)
+    elif(cmd.action.lower() == "client"):
+        forward_request(cmd)
+    elif(cmd.action.lower() == "batch"):
+        run_batch(create_dcp(cmd), cmd)
+    else:
+        run_action(create_dcp(cmd), cmd)
@@ -3,68 +3,1645 @@ Copyright (c) 2020 Codewerk GmbH, Karlsruhe.
 All Rights Reserved.
 License: MIT License see LICENSE.md in the pnio_dcp root directory.
 """
+import bisect
+import collections
+import ctypes
+import errno
+import functools
+import ipaddress
+import json
+import mmap
+import os
 import random
 import re
+import select
 import socket
+import stat
+import struct
+import sys
+import tempfile
+import threading
 import time
 
-import psutil
-
 import pnio_dcp.dcp_constants as dcp_constants
 import pnio_dcp.util as util
 from pnio_dcp.dcp_constants import ServiceType, ServiceID, Option, FrameID, BlockQualifier
-from pnio_dcp.error import DcpTimeoutError
+from pnio_dcp.error import DcpError, DcpTimeoutError
 from pnio_dcp.l2socket import L2Socket
-from pnio_dcp.protocol import DCPPacket, EthernetPacket, DCPBlock, DCPBlockRequest
+from pnio_dcp.l2socket.l2socket import L2LinuxSocket, L2PcapSocket
+from pnio_dcp.protocol import DCPPacket, EthernetPacket, DCPBlockRequest
 
 logger = util.logger
 
+# size of the kernel receive buffer requested for the raw socket, large enough to hold the responses of hundreds of
+# devices answering at once (e.g. to identify_all or to batch requests)
+RECEIVE_BUFFER_SIZE = 4 * 1024 * 1024
+# socket option to set the receive buffer size beyond net.core.rmem_max (Linux only, not exported by the socket module)
+SO_RCVBUFFORCE = 33
+# time in seconds per unit of the DCP response delay factor: devices spread their responses to multicast requests
+# over at most RESPONSE_DELAY * RESPONSE_DELAY_UNIT seconds
+RESPONSE_DELAY_UNIT = 0.01
+
+# multicast address and service ID of hello requests, sent by devices after power on (not part of dcp_constants)
+PROFINET_MULTICAST_MAC_HELLO = '01:0e:cf:00:00:01'
+SERVICE_ID_HELLO = 6
+# packet socket options to receive frames addressed to other hosts (Linux only, not exported by the socket module)
+SOL_PACKET = 263
+PACKET_ADD_MEMBERSHIP = 1
+PACKET_MR_MULTICAST = 0
+PACKET_MR_PROMISC = 1
+PACKET_MREQ = struct.Struct('=iHH8s')  # interface index, membership type, address length, address
+# packet socket option reading (and resetting) the number of packets received and dropped by the kernel
+PACKET_STATISTICS = 6
+TPACKET_STATS = struct.Struct('=II')  # packets (including the dropped ones), drops
+# the kinds of set requests sent by DCP.reconfigure by (option, suboption)
+RECONFIGURATION_REQUESTS = {Option.IP_ADDRESS: 'ip', Option.NAME_OF_STATION: 'name'}
+# upper bounds (in milliseconds) of the buckets of the round trip time histogram of DCPStats
+RTT_HISTOGRAM_BOUNDS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# number of recent requests whose send time is kept by DCPStats to measure the round trip time of their responses
+STATS_SENT_TIMES_SIZE = 4096
+# maximum number of set requests observed by DCPMonitor that are remembered until the device responds
+MONITOR_PENDING_SETS = 1024
+
+# pcap files written by PcapWriter: frames are buffered and written in chunks of PCAP_BUFFER_SIZE bytes
+PCAP_BUFFER_SIZE = 1 << 20
+PCAP_SNAP_LENGTH = 65535
+LINKTYPE_ETHERNET = 1
+PCAP_MAGIC = 0xa1b2c3d4  # microsecond timestamps
+PCAP_MAGIC_NANOSECONDS = 0xa1b23c4d
+PCAP_FILE_HEADER = struct.Struct('=IHHiIII')  # magic, version, time zone, accuracy, snap length, link type
+PCAP_RECORD_HEADER = struct.Struct('=IIII')  # seconds, microseconds, captured length, original length
+# block types of pcapng files (as written by Wireshark), which read_pcap reads as well
+PCAPNG_SECTION_HEADER = 0x0a0d0d0a
+PCAPNG_BYTE_ORDER_MAGIC = 0x1a2b3c4d
+PCAPNG_INTERFACE_DESCRIPTION = 1
+PCAPNG_SIMPLE_PACKET = 3
+PCAPNG_ENHANCED_PACKET = 6
+PCAPNG_OPTION_TIMESTAMP_RESOLUTION = 9
+
+# network interfaces with their mac address and flags (Linux only, read instead of importing psutil)
+SYS_CLASS_NET = '/sys/class/net'
+IFF_UP = 0x1
+# address family of the mac addresses returned by get_interface_addresses (psutil.AF_LINK)
+AF_LINK = getattr(socket, 'AF_PACKET', -1)
+# rtnetlink request dumping the IP addresses of all network interfaces (Linux only, not exported by the socket module)
+NETLINK_ROUTE = 0
+RTM_NEWADDR = 20
+RTM_GETADDR = 22
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+RT_SCOPE_LINK = 253
+NETLINK_HEADER = struct.Struct('=IHHII')  # length, type, flags, sequence number, port id
+NETLINK_ERROR = struct.Struct('=i')  # negative errno
+INTERFACE_ADDRESS_MESSAGE = struct.Struct('=BBBBI')  # family, prefix length, flags, scope, interface index
+ROUTE_ATTRIBUTE = struct.Struct('=HH')  # length, type
+
+# per-user directory of the files caching results across processes, other users cannot write to it
+CACHE_DIRECTORY = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                               'pnio_dcp')
+# file caching the network interface and mac address resolved for each IP address across processes
+INTERFACE_CACHE_PATH = os.path.join(CACHE_DIRECTORY, 'interfaces.json')
+# time in seconds after which a cached network interface is resolved again
+INTERFACE_CACHE_TTL = 300
+# database caching the devices parsed from responses across processes
+DEVICE_CACHE_PATH = os.path.join(CACHE_DIRECTORY, 'devices.sqlite')
+# number of parsed devices buffered before they are written to the device cache without an explicit flush
+DEVICE_CACHE_BUFFER_SIZE = 1024
+
+# precompiled unpackers for the headers of received packets
+ETHERNET_HEADER = struct.Struct('>6s6sH')  # destination, source, ether type
+DCP_HEADER = struct.Struct('>HBBIHH')  # frame id, service id, service type, xid, response delay, length
+DCP_BLOCK_HEADER = struct.Struct('>BBHH')  # option, suboption, length, block status (block info)
+# offset of the first DCP block in a received packet
+DCP_PAYLOAD_OFFSET = ETHERNET_HEADER.size + DCP_HEADER.size
+
+# fields patched in place in the cached request frame templates
+XID = struct.Struct('>I')
+XID_OFFSET = ETHERNET_HEADER.size + 4  # after the frame id, service id and service type
+MAC_ADDRESS_LENGTH = 6
+# maximum number of request frame templates cached per DCP instance (set requests create one per distinct value)
+FRAME_TEMPLATE_CACHE_SIZE = 256
+# maximum number of frames passed to a single sendmmsg call (UIO_MAXIOV)
+SENDMMSG_BATCH_SIZE = 1024
+
+# packet socket options and structures of the memory-mapped TPACKET_V3 receive ring (Linux only, see PacketRing)
+PACKET_RX_RING = 5
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+# block size, block count, frame size, frame count, block timeout (ms), private area size, feature request word
+TPACKET_REQ3 = struct.Struct('=7I')
+BLOCK_HEADER = struct.Struct('=III')  # block status, number of packets, offset to the first packet
+BLOCK_HEADER_OFFSET = 8  # after the version and the offset to the private area of the block descriptor
+# offset to the next packet, seconds, nanoseconds, captured length, length, status, offset of the ethernet header
+PACKET_HEADER = struct.Struct('=IIIIIIH')
+# layout of the receive ring: 32 blocks of 256 KiB hold the identify responses of several thousand devices. The
+# kernel hands a block over when it is full or RING_BLOCK_TIMEOUT ms after its first packet arrived.
+RING_BLOCK_SIZE = 1 << 18
+RING_BLOCK_COUNT = 32
+RING_FRAME_SIZE = 2048
+RING_BLOCK_TIMEOUT = 4
+
+
+class IOVec(ctypes.Structure):
+    """struct iovec: a buffer to send."""
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class MessageHeader(ctypes.Structure):
+    """struct msghdr: a message to send, only the scatter/gather array is used."""
+    _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.c_void_p), ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+
+class MultiMessageHeader(ctypes.Structure):
+    """struct mmsghdr: a message passed to sendmmsg and the number of bytes sent for it."""
+    _fields_ = [('msg_hdr', MessageHeader), ('msg_len', ctypes.c_uint)]
+
+
+@functools.lru_cache(maxsize=None)
+def get_sendmmsg():
+    """
+    Load sendmmsg from the C library, which sends many frames with a single system call. Only available on Linux.
+    :return: The sendmmsg function or None if it is not available.
+    :rtype: Optional[Callable]
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        sendmmsg = ctypes.CDLL(None, use_errno=True).sendmmsg
+    except (OSError, AttributeError):
+        return None
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+
+def send_frames(file_descriptor, frames, frame_length):
+    """
+    Send the frames stored back to back in the given buffer on the socket with the given file descriptor, using as few
+    sendmmsg calls as possible.
+    :param file_descriptor: The file descriptor of the (raw) socket to send on.
+    :type file_descriptor: int
+    :param frames: The frames to send, all of the same length.
+    :type frames: bytearray
+    :param frame_length: The length of each frame.
+    :type frame_length: int
+    :return: The number of frames sent, the remaining frames were not sent (e.g. because the send buffer is full).
+    :rtype: int
+    """
+    sendmmsg = get_sendmmsg()
+    count = len(frames) // frame_length
+    buffer = (ctypes.c_char * len(frames)).from_buffer(frames)
+    vectors = (IOVec * count)()
+    messages = (MultiMessageHeader * count)()
+    base_address, vector_address, message_address = (ctypes.addressof(buffer), ctypes.addressof(vectors),
+                                                     ctypes.addressof(messages))
+    for index in range(count):
+        vectors[index].iov_base = base_address + index * frame_length
+        vectors[index].iov_len = frame_length
+        messages[index].msg_hdr.msg_iov = vector_address + index * ctypes.sizeof(IOVec)
+        messages[index].msg_hdr.msg_iovlen = 1
+
+    sent = 0
+    while sent < count:
+        result = sendmmsg(file_descriptor, message_address + sent * ctypes.sizeof(MultiMessageHeader),
+                          min(count - sent, SENDMMSG_BATCH_SIZE), 0)
+        if result < 0:
+            error = ctypes.get_errno()
+            if error == errno.EINTR:
+                continue
+            if error in (errno.EAGAIN, errno.ENOBUFS):
+                break
+            raise OSError(error, os.strerror(error))
+        if result == 0:
+            break
+        sent += result
+    del buffer  # release the export of the bytearray
+    return sent
+
+
+class PacketRing:
+    """
+    Memory-mapped TPACKET_V3 receive ring of a packet socket (Linux only). The kernel writes the received packets into
+    blocks of a buffer shared with the process and hands over a whole block at once, when it is full or
+    RING_BLOCK_TIMEOUT ms after its first packet. The packets of a block are read from the shared buffer without a
+    system call or copy per packet, the process only waits in select when no block is ready.
+    Once the ring is set up, packets are no longer queued on the socket itself, so recv must not be used anymore.
+    """
+
+    def __init__(self, raw_socket, block_size=RING_BLOCK_SIZE, block_count=RING_BLOCK_COUNT,
+                 frame_size=RING_FRAME_SIZE, block_timeout=RING_BLOCK_TIMEOUT):
+        """
+        Set up the receive ring on the given packet socket and map it into memory.
+        :param raw_socket: The packet socket (AF_PACKET) to receive on.
+        :type raw_socket: socket.socket
+        :param block_size: The size of each block in bytes, a multiple of the page size.
+        :type block_size: int
+        :param block_count: The number of blocks.
+        :type block_count: int
+        :param frame_size: The size of a frame in bytes, only used by the kernel to check the layout.
+        :type frame_size: int
+        :param block_timeout: Time in ms after which the kernel hands over a block that is not full.
+        :type block_timeout: int
+        :raises OSError: If the kernel does not support TPACKET_V3 receive rings.
+        """
+        raw_socket.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+        raw_socket.setsockopt(SOL_PACKET, PACKET_RX_RING,
+                              TPACKET_REQ3.pack(block_size, block_count, frame_size,
+                                                block_size * block_count // frame_size, block_timeout, 0, 0))
+        self.__file_descriptor = raw_socket.fileno()
+        self.__ring = mmap.mmap(self.__file_descriptor, block_size * block_count, mmap.MAP_SHARED,
+                                mmap.PROT_READ | mmap.PROT_WRITE)
+        self.__view = memoryview(self.__ring)
+        self.__block_size = block_size
+        self.__block_count = block_count
+        self.__block = 0  # index of the next block handed over by the kernel
+        self.__held = False  # whether the current block is still owned by the process
+        self.__remaining = 0  # number of packets of the current block not yet returned
+        self.__offset = 0  # offset of the next packet in the ring
+
+    def receive(self, timeout=None):
+        """
+        Get the next packet from the ring, waiting for the kernel to hand over a block if none is ready.
+        The packet points into the shared buffer and is only valid until the next call, it must be copied to be kept.
+        :param timeout: The maximum time to wait for a packet in seconds. None waits until a packet arrives.
+        :type timeout: Optional[float]
+        :return: The received packet or None if no packet was received in time.
+        :rtype: Optional[memoryview]
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.__remaining:
+            if self.__held:
+                # all packets of the current block were returned, hand it back to the kernel
+                BLOCK_HEADER.pack_into(self.__ring, self.__block * self.__block_size + BLOCK_HEADER_OFFSET,
+                                       TP_STATUS_KERNEL, 0, 0)
+                self.__block = (self.__block + 1) % self.__block_count
+                self.__held = False
+            block_offset = self.__block * self.__block_size
+            status, packets, first_offset = BLOCK_HEADER.unpack_from(self.__ring, block_offset + BLOCK_HEADER_OFFSET)
+            if status & TP_STATUS_USER:
+                self.__held = True
+                self.__remaining = packets
+                self.__offset = block_offset + first_offset
+                continue
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            select.select([self.__file_descriptor], [], [], remaining)
+
+        offset = self.__offset
+        next_offset, _, _, captured_length, _, _, mac_offset = PACKET_HEADER.unpack_from(self.__ring, offset)
+        self.__offset = offset + next_offset
+        self.__remaining -= 1
+        start = offset + mac_offset
+        return self.__view[start:start + captured_length]
+
+    def close(self):
+        """
+        Unmap the ring. If a packet returned by receive is still referenced, the ring is unmapped once it is garbage
+        collected.
+        """
+        try:
+            self.__view.release()
+            self.__ring.close()
+        except BufferError:
+            pass
+
 
 class Device:
-    """A DCP device defined by its properties (name of station, mac address, ip address etc.)."""
+    """
+    A DCP device defined by its properties (name of station, mac address, ip address etc.).
+    Uses __slots__ instead of a per-instance __dict__ to keep large numbers of devices (e.g. from repeated sweeps)
+    compact in memory.
+    """
+    # The properties reported by all devices, always included in the string representation
+    BASIC_FIELDS = ('name_of_station', 'MAC', 'IP', 'netmask', 'gateway', 'family')
+    # Additional properties, only set if the corresponding DCP block was part of the response
+    OPTIONAL_FIELDS = ('ip_block_info', 'dns_servers', 'vendor_id', 'device_id', 'device_role', 'device_options',
+                       'alias_name', 'device_instance', 'oem_vendor_id', 'oem_device_id', 'standard_gateway',
+                       'rsi_properties', 'dhcp', 'device_initiative', 'interface')
+    FIELDS = BASIC_FIELDS + OPTIONAL_FIELDS
+    __slots__ = FIELDS
 
     def __init__(self):
-        """Create a new device, all parameters are initialized with an empty string."""
+        """
+        Create a new device, the basic parameters are initialized with an empty string, the optional parameters
+        with None.
+        """
         self.name_of_station = ''
         self.MAC = ''
         self.IP = ''
         self.netmask = ''
         self.gateway = ''
         self.family = ''
+        self.ip_block_info = None
+        self.dns_servers = None
+        self.vendor_id = None
+        self.device_id = None
+        self.device_role = None
+        self.device_options = None
+        self.alias_name = None
+        self.device_instance = None
+        self.oem_vendor_id = None
+        self.oem_device_id = None
+        self.standard_gateway = None
+        self.rsi_properties = None
+        self.dhcp = None
+        self.device_initiative = None
+        self.interface = None  # only set by MultiInterfaceDCP: the network interface the device was found on
+
+    def to_dict(self):
+        """
+        Return the parameters of this device as dict (field name to value), e.g. to serialize it as JSON.
+        :return: The parameters of this device.
+        :rtype: Dict[string, Any]
+        """
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def to_tuple(self):
+        """
+        Return the parameters of this device as tuple ordered as in Device.FIELDS, e.g. to write it as CSV row.
+        :return: The parameters of this device.
+        :rtype: Tuple
+        """
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Create a device from the parameters returned by to_dict, also after a JSON round trip (which turns tuples into
+        lists and the integer keys of the DHCP options into strings). Unknown parameters are ignored.
+        :param values: The parameters of the device by field name.
+        :type values: Dict[string, Any]
+        :return: The device.
+        :rtype: Device
+        """
+        device = cls()
+        for name, value in values.items():
+            if name not in cls.FIELDS:
+                continue
+            if isinstance(value, list):
+                value = tuple(tuple(item) if isinstance(item, list) else item for item in value)
+            elif name == 'dhcp' and value is not None:
+                value = {int(suboption): option_value for suboption, option_value in value.items()}
+            setattr(device, name, value)
+        return device
 
     def __str__(self):
         """
         Return a human-readable string representation of the device including all its parameters.
+        Optional parameters are only included if they are set.
         :return: String representation of this device.
         :rtype: string
         """
-        parameters = [f'{name}={value}' for name, value in vars(self).items()]
+        parameters = [f'{name}={getattr(self, name)}' for name in self.BASIC_FIELDS]
+        parameters += [f'{name}={getattr(self, name)}' for name in self.OPTIONAL_FIELDS
+                       if getattr(self, name) is not None]
         return f"Device({', '.join(parameters)})"
 
 
+def decode_string(payload):
+    """
+    Decode a string value of a DCP block (e.g. the name of station), removing the zero padding.
+    :param payload: The block payload.
+    :type payload: memoryview
+    :return: The decoded string.
+    :rtype: string
+    """
+    return bytes(payload).rstrip(b'\x00').decode(errors='replace')
+
+
+def decode_shared_string(payload):
+    """
+    Decode a string value of a DCP block that is typically the same for many devices (e.g. the device vendor) and
+    intern it, so that all devices share one string object.
+    :param payload: The block payload.
+    :type payload: memoryview
+    :return: The decoded and interned string.
+    :rtype: string
+    """
+    return sys.intern(decode_string(payload))
+
+
+def decode_shared_ip_address(payload):
+    """
+    Decode an IP address that is typically the same for many devices (subnet mask, gateway, DNS server) and intern
+    it, so that all devices share one string object.
+    :param payload: The 4 byte IP address.
+    :type payload: memoryview
+    :return: The decoded and interned IP address.
+    :rtype: string
+    """
+    return sys.intern(util.ip_address_to_string(payload))
+
+
+def decode_mac_address(device, payload):
+    """Option IP, suboption MAC address."""
+    device.MAC = util.mac_address_to_string(payload[0:6])
+
+
+def decode_ip_parameter(device, payload):
+    """Option IP, suboption IP parameter: IP address, subnet mask and gateway."""
+    device.IP = util.ip_address_to_string(payload[0:4])
+    device.netmask = decode_shared_ip_address(payload[4:8])
+    device.gateway = decode_shared_ip_address(payload[8:12])
+
+
+def decode_full_ip_suite(device, payload):
+    """Option IP, suboption full IP suite: IP parameter followed by up to four DNS server addresses."""
+    decode_ip_parameter(device, payload)
+    device.dns_servers = tuple(decode_shared_ip_address(payload[offset:offset + 4])
+                               for offset in range(12, len(payload) - 3, 4))
+
+
+def decode_device_vendor(device, payload):
+    """Option device properties, suboption device vendor (type of station)."""
+    device.family = decode_shared_string(payload)
+
+
+def decode_name_of_station(device, payload):
+    """Option device properties, suboption name of station."""
+    device.name_of_station = decode_string(payload)
+
+
+def decode_device_id(device, payload):
+    """Option device properties, suboption device ID: vendor ID and device ID."""
+    device.vendor_id, device.device_id = VENDOR_AND_DEVICE_ID.unpack_from(payload)
+
+
+def decode_device_role(device, payload):
+    """Option device properties, suboption device role: bit field of the roles (IO device, controller, ...)."""
+    device.device_role = payload[0]
+
+
+def decode_device_options(device, payload):
+    """
+    Option device properties, suboption device options: the supported option/suboption pairs. Devices of the same
+    type report the same options, so the decoded tuples are cached and shared between devices.
+    """
+    key = bytes(payload)
+    device_options = DEVICE_OPTIONS_CACHE.get(key)
+    if device_options is None:
+        device_options = tuple((key[offset], key[offset + 1]) for offset in range(0, len(key) - 1, 2))
+        DEVICE_OPTIONS_CACHE[key] = device_options
+    device.device_options = device_options
+
+
+def decode_alias_name(device, payload):
+    """Option device properties, suboption alias name."""
+    device.alias_name = decode_string(payload)
+
+
+def decode_device_instance(device, payload):
+    """Option device properties, suboption device instance: instance high and low."""
+    device.device_instance = (payload[0], payload[1])
+
+
+def decode_oem_device_id(device, payload):
+    """Option device properties, suboption OEM device ID: OEM vendor ID and OEM device ID."""
+    device.oem_vendor_id, device.oem_device_id = VENDOR_AND_DEVICE_ID.unpack_from(payload)
+
+
+def decode_standard_gateway(device, payload):
+    """Option device properties, suboption standard gateway: whether the gateway is used as standard gateway."""
+    device.standard_gateway = UINT16.unpack_from(payload)[0]
+
+
+def decode_rsi_properties(device, payload):
+    """Option device properties, suboption RSI properties."""
+    device.rsi_properties = UINT16.unpack_from(payload)[0]
+
+
+def decode_dhcp_option(device, payload, suboption):
+    """
+    Option DHCP, all suboptions: stored in a dict by suboption. Text values (host name, vendor class identifier and
+    FQDN) are decoded as string, all other values as hex string.
+    """
+    if device.dhcp is None:
+        device.dhcp = {}
+    text = suboption in DHCP_TEXT_SUBOPTIONS
+    device.dhcp[suboption] = decode_string(payload) if text else bytes(payload).hex()
+
+
+def decode_device_initiative(device, payload):
+    """Option device initiative: whether the device issues a hello request after power on."""
+    device.device_initiative = UINT16.unpack_from(payload)[0]
+
+
+# decoded device options by raw block payload, shared between all devices reporting the same options
+DEVICE_OPTIONS_CACHE = {}
+
+# unpackers for fixed size values in DCP blocks
+VENDOR_AND_DEVICE_ID = struct.Struct('>HH')
+UINT16 = struct.Struct('>H')
+
+# DHCP suboptions with text values: host name, vendor class identifier, FQDN
+DHCP_TEXT_SUBOPTIONS = (12, 60, 81)
+# all DHCP suboptions defined for DCP: host name, vendor specific, server identifier, parameter request list, class
+# identifier, client identifier, FQDN, UUID client identifier, control DHCP for address resolution
+DHCP_SUBOPTIONS = (12, 43, 54, 55, 60, 61, 81, 97, 255)
+
+# Decoders for the DCP blocks in identify and get responses by (option, suboption), each decoder sets the
+# corresponding parameters of the given device from the block payload. The minimum payload length is checked before
+# decoding, blocks that are shorter or have an unknown option are skipped.
+BLOCK_DECODERS = {
+    (1, 1): (decode_mac_address, 6),
+    Option.IP_ADDRESS: (decode_ip_parameter, 12),
+    (1, 3): (decode_full_ip_suite, 12),
+    Option.DEVICE_FAMILY: (decode_device_vendor, 0),
+    Option.NAME_OF_STATION: (decode_name_of_station, 0),
+    Option.DEVICE_ID: (decode_device_id, 4),
+    (2, 4): (decode_device_role, 1),
+    (2, 5): (decode_device_options, 0),
+    (2, 6): (decode_alias_name, 0),
+    (2, 7): (decode_device_instance, 2),
+    (2, 8): (decode_oem_device_id, 4),
+    (2, 9): (decode_standard_gateway, 2),
+    (2, 10): (decode_rsi_properties, 2),
+    (6, 1): (decode_device_initiative, 2),
+}
+BLOCK_DECODERS.update({(3, suboption): (functools.partial(decode_dhcp_option, suboption=suboption), 0)
+                       for suboption in DHCP_SUBOPTIONS})
+# the block info (block status) of the IP parameter and full IP suite blocks tells how the IP address was set
+IP_BLOCKS_WITH_BLOCK_INFO = (Option.IP_ADDRESS, (1, 3))
+
+
+def decode_block(option, suboption, block_info, payload, device):
+    """
+    Parse the payload of a DCP data block and fill the given Device object with the extracted values.
+    The block is decoded by the decoder registered for its option and suboption in BLOCK_DECODERS. Blocks with
+    unknown options or a payload too short for their option are skipped without decoding.
+    :param option: The option of the DCP data block.
+    :type option: int
+    :param suboption: The sub-option of the DCP data block.
+    :type suboption: int
+    :param block_info: The block status of the DCP data block.
+    :type block_info: int
+    :param payload: The payload of the block (excluding the block header and block status).
+    :type payload: memoryview
+    :param device: The Device object to be filled.
+    :type device: Device
+    """
+    decoder = BLOCK_DECODERS.get((option, suboption))
+    if decoder is None:
+        return
+    decode, min_length = decoder
+    if len(payload) >= min_length:
+        decode(device, payload)
+        if (option, suboption) in IP_BLOCKS_WITH_BLOCK_INFO:
+            device.ip_block_info = block_info
+
+
+def iter_blocks(packet, offset, end):
+    """
+    Iterate over the DCP data blocks of a packet.
+    :param packet: The packet.
+    :type packet: memoryview
+    :param offset: The offset of the first block.
+    :type offset: int
+    :param end: The end of the DCP payload.
+    :type end: int
+    :return: A generator yielding option, suboption, block info (or block qualifier) and payload of each block.
+    :rtype: Iterator[Tuple[int, int, int, memoryview]]
+    """
+    while end - offset >= DCP_BLOCK_HEADER.size:
+        option, suboption, block_length, block_info = DCP_BLOCK_HEADER.unpack_from(packet, offset)
+        # the block length counts the payload and the 2 byte block status, but not option, suboption and length
+        yield option, suboption, block_info, packet[offset + DCP_BLOCK_HEADER.size:offset + 4 + block_length]
+        # advance to the start of the next block, the block length is rounded up to the next even number
+        offset += 4 + block_length + (block_length % 2)
+
+
+class PcapWriter:
+    """
+    Writes ethernet frames to a pcap file, e.g. all DCP frames sent and received by a DCP instance. The frames are
+    buffered and written in chunks of PCAP_BUFFER_SIZE bytes, flush or close write the remaining frames.
+    """
+
+    def __init__(self, path, snap_length=PCAP_SNAP_LENGTH):
+        """
+        Create the pcap file (an existing file is replaced) and write its header.
+        :param path: The path of the pcap file.
+        :type path: string
+        :param snap_length: The maximum number of bytes stored per frame, longer frames are truncated.
+        :type snap_length: int
+        """
+        self.path = path
+        self.snap_length = snap_length
+        self.frames = 0  # number of frames written
+        self.__file = open(path, 'wb', buffering=PCAP_BUFFER_SIZE)
+        self.__file.write(PCAP_FILE_HEADER.pack(PCAP_MAGIC, 2, 4, 0, 0, snap_length, LINKTYPE_ETHERNET))
+
+    def write(self, frame, timestamp=None):
+        """
+        Append a frame to the file.
+        :param frame: The ethernet frame.
+        :type frame: Union[bytes, bytearray, memoryview]
+        :param timestamp: The time the frame was sent or received (as returned by time.time). Default: now.
+        :type timestamp: Optional[float]
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        seconds = int(timestamp)
+        length = len(frame)
+        captured_length = min(length, self.snap_length)
+        self.__file.write(PCAP_RECORD_HEADER.pack(seconds, int((timestamp - seconds) * 1000000), captured_length,
+                                                  length))
+        self.__file.write(frame[:captured_length])
+        self.frames += 1
+
+    def flush(self):
+        """Write the buffered frames to the file."""
+        self.__file.flush()
+
+    def close(self):
+        """Write the buffered frames and close the file."""
+        self.__file.close()
+
+
+def read_pcap(path):
+    """
+    Read the ethernet frames of a pcap or pcapng file, as written by PcapWriter, tcpdump or Wireshark. Packets of other
+    link types are skipped. The file is read at once and the frames are returned as views into it.
+    :param path: The path of the capture file.
+    :type path: string
+    :return: A generator yielding each frame with its timestamp (in seconds since the epoch, None if the file does not
+    record it) as (timestamp, frame).
+    :rtype: Iterator[Tuple[Optional[float], memoryview]]
+    :raises ValueError: If the file is neither a pcap nor a pcapng file.
+    """
+    with open(path, 'rb') as capture_file:
+        data = memoryview(capture_file.read())
+    if len(data) >= 12 and struct.unpack_from('<I', data)[0] == PCAPNG_SECTION_HEADER:
+        return read_pcapng_blocks(data)
+    return read_pcap_records(data)
+
+
+def read_pcap_records(data):
+    """
+    Read the ethernet frames of a pcap file, see read_pcap.
+    :param data: The content of the pcap file.
+    :type data: memoryview
+    :return: A generator yielding (timestamp, frame).
+    :rtype: Iterator[Tuple[float, memoryview]]
+    """
+    if len(data) < PCAP_FILE_HEADER.size:
+        raise ValueError('Not a pcap or pcapng file.')
+    for byte_order in '<>':
+        magic, = struct.unpack_from(byte_order + 'I', data)
+        if magic in (PCAP_MAGIC, PCAP_MAGIC_NANOSECONDS):
+            break
+    else:
+        raise ValueError('Not a pcap or pcapng file.')
+    fraction = 1e-9 if magic == PCAP_MAGIC_NANOSECONDS else 1e-6
+    link_type = struct.unpack_from(byte_order + 'I', data, 20)[0] & 0xffff
+    if link_type != LINKTYPE_ETHERNET:
+        return
+    record_header = struct.Struct(byte_order + 'IIII')
+    offset = PCAP_FILE_HEADER.size
+    while offset + record_header.size <= len(data):
+        seconds, fractions, captured_length, _ = record_header.unpack_from(data, offset)
+        offset += record_header.size
+        yield seconds + fractions * fraction, data[offset:offset + captured_length]
+        offset += captured_length
+
+
+def read_pcapng_blocks(data):
+    """
+    Read the ethernet frames of the enhanced and simple packet blocks of a pcapng file, see read_pcap.
+    :param data: The content of the pcapng file.
+    :type data: memoryview
+    :return: A generator yielding (timestamp, frame).
+    :rtype: Iterator[Tuple[Optional[float], memoryview]]
+    """
+    byte_order = '<'
+    interfaces = []  # (link type, timestamp resolution in seconds) of each interface of the current section
+    offset = 0
+    while offset + 12 <= len(data):
+        block_type, block_length = struct.unpack_from(byte_order + 'II', data, offset)
+        if block_type == PCAPNG_SECTION_HEADER:
+            # the byte order magic defines the byte order of the section, including the length of this block
+            byte_order = '<' if struct.unpack_from('<I', data, offset + 8)[0] == PCAPNG_BYTE_ORDER_MAGIC else '>'
+            block_length, = struct.unpack_from(byte_order + 'I', data, offset + 4)
+            interfaces = []
+        if block_length < 12:
+            raise ValueError(f'Invalid pcapng block length {block_length} at offset {offset}.')
+        body = data[offset + 8:offset + block_length - 4]
+        if block_type == PCAPNG_INTERFACE_DESCRIPTION:
+            link_type, = struct.unpack_from(byte_order + 'H', body)
+            interfaces.append((link_type, get_pcapng_timestamp_resolution(body[8:], byte_order)))
+        elif block_type == PCAPNG_ENHANCED_PACKET:
+            interface, timestamp_high, timestamp_low, captured_length, _ = struct.unpack_from(byte_order + 'IIIII',
+                                                                                              body)
+            link_type, resolution = interfaces[interface]
+            if link_type == LINKTYPE_ETHERNET:
+                yield ((timestamp_high << 32) + timestamp_low) * resolution, body[20:20 + captured_length]
+        elif block_type == PCAPNG_SIMPLE_PACKET and interfaces and interfaces[0][0] == LINKTYPE_ETHERNET:
+            length, = struct.unpack_from(byte_order + 'I', body)
+            yield None, body[4:4 + length]
+        offset += block_length
+
+
+def get_pcapng_timestamp_resolution(options, byte_order):
+    """
+    Get the timestamp resolution from the options of a pcapng interface description block.
+    :param options: The options of the block.
+    :type options: memoryview
+    :param byte_order: The byte order of the section ('<' or '>').
+    :type byte_order: string
+    :return: The resolution in seconds, by default microseconds.
+    :rtype: float
+    """
+    offset = 0
+    while offset + 4 <= len(options):
+        code, length = struct.unpack_from(byte_order + 'HH', options, offset)
+        if code == 0:
+            break
+        if code == PCAPNG_OPTION_TIMESTAMP_RESOLUTION and length == 1:
+            value = options[offset + 4]
+            return 2.0 ** -(value & 0x7f) if value & 0x80 else 10.0 ** -value
+        offset += 4 + length + (-length % 4)
+    return 1e-6
+
+
+def find_host_mac_address(frames):
+    """
+    Find the host that recorded a capture: the most common destination of the DCP responses in it.
+    :param frames: The recorded ethernet frames.
+    :type frames: Iterable[Union[bytes, memoryview]]
+    :return: The mac address (as ':' separated string) or None if the capture contains no DCP response.
+    :rtype: Optional[string]
+    """
+    destinations = collections.Counter()
+    for frame in frames:
+        if len(frame) < DCP_PAYLOAD_OFFSET:
+            continue
+        destination, _, ether_type = ETHERNET_HEADER.unpack_from(frame)
+        _, _, service_type, _, _, _ = DCP_HEADER.unpack_from(frame, ETHERNET_HEADER.size)
+        if ether_type == dcp_constants.ETHER_TYPE and service_type == ServiceType.RESPONSE:
+            destinations[destination] += 1
+    if not destinations:
+        return None
+    return util.mac_address_to_string(destinations.most_common(1)[0][0])
+
+
+class OfflineSocket:
+    """
+    Replacement for the L2 socket of a DCP instance without network access, e.g. to replay a recorded capture with
+    DCP.replay: frames sent are discarded and no packet is ever received.
+    """
+
+    def __init__(self, mac_address, recv_timeout=0.1):
+        """
+        Create a new offline socket.
+        :param mac_address: The mac address of the host (as ':' separated string).
+        :type mac_address: string
+        :param recv_timeout: Time in seconds recv waits before it returns None, like a socket with receive timeout.
+        :type recv_timeout: float
+        """
+        self.mac_address = mac_address
+        self.recv_timeout = recv_timeout
+
+    def send(self, data):
+        """Discard the frame."""
+
+    def recv(self):
+        """Wait for the receive timeout, no packet is ever received."""
+        time.sleep(self.recv_timeout)
+        return None
+
+    def close(self):
+        """Nothing to close."""
+
+
+InterfaceAddress = collections.namedtuple('InterfaceAddress', ('family', 'address'))
+
+
+def get_interface_addresses():
+    """
+    Get the addresses of all network interfaces: their mac address (family AF_LINK, as ':' separated string) and their
+    IPv4 and IPv6 addresses. On Linux the interfaces are listed from sysfs and their IP addresses are dumped with a
+    single rtnetlink request, otherwise (or if this fails) psutil is imported and asked.
+    :return: The addresses by interface name.
+    :rtype: Dict[string, List[InterfaceAddress]]
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return get_linux_interface_addresses()
+        except OSError as error:
+            logger.debug(f"Could not read the network interfaces from sysfs and rtnetlink: {error}")
+    import psutil
+    interfaces = {}
+    for network_interface, addresses in psutil.net_if_addrs().items():
+        interfaces[network_interface] = [
+            InterfaceAddress(AF_LINK, address.address.replace('-', ':').lower()) if address.family == psutil.AF_LINK
+            else InterfaceAddress(address.family, address.address) for address in addresses]
+    return interfaces
+
+
+def get_linux_interface_addresses():
+    """
+    Get the addresses of all network interfaces from sysfs and rtnetlink (Linux only), see get_interface_addresses.
+    Link-local IPv6 addresses are suffixed with the interface name like psutil does (e.g. fe80::1%eth0).
+    :return: The addresses by interface name.
+    :rtype: Dict[string, List[InterfaceAddress]]
+    """
+    interfaces = {}
+    for network_interface in os.listdir(SYS_CLASS_NET):
+        mac_address = read_interface_attribute(network_interface, 'address')
+        interfaces[network_interface] = [InterfaceAddress(AF_LINK, mac_address.lower())] if mac_address else []
+    for index, family, scope, address in read_netlink_addresses():
+        try:
+            network_interface = socket.if_indextoname(index)
+        except OSError:  # removed in the meantime
+            continue
+        if family == socket.AF_INET6 and scope == RT_SCOPE_LINK:
+            address = f"{address}%{network_interface}"
+        interfaces.setdefault(network_interface, []).append(InterfaceAddress(family, address))
+    return interfaces
+
+
+def read_netlink_addresses():
+    """
+    Dump the IPv4 and IPv6 addresses of all network interfaces with an rtnetlink request (Linux only). In contrast to
+    the SIOCGIFADDR ioctl, this also reports secondary IPv4 addresses.
+    :return: Interface index, address family, scope and address of each address.
+    :rtype: List[Tuple[int, int, int, string]]
+    """
+    addresses = []
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE) as netlink_socket:
+        netlink_socket.settimeout(1)
+        netlink_socket.send(NETLINK_HEADER.pack(NETLINK_HEADER.size + INTERFACE_ADDRESS_MESSAGE.size, RTM_GETADDR,
+                                                NLM_F_REQUEST | NLM_F_DUMP, 1, 0)
+                            + INTERFACE_ADDRESS_MESSAGE.pack(socket.AF_UNSPEC, 0, 0, 0, 0))
+        while True:
+            data = netlink_socket.recv(1 << 16)
+            offset = 0
+            while offset + NETLINK_HEADER.size <= len(data):
+                length, message_type, _, _, _ = NETLINK_HEADER.unpack_from(data, offset)
+                if message_type == NLMSG_DONE:
+                    return addresses
+                if message_type == NLMSG_ERROR:
+                    error, = NETLINK_ERROR.unpack_from(data, offset + NETLINK_HEADER.size)
+                    raise OSError(-error, os.strerror(-error))
+                if length < NETLINK_HEADER.size:
+                    raise OSError(errno.EBADMSG, f"Invalid netlink message length {length}")
+                if message_type == RTM_NEWADDR:
+                    position = offset + NETLINK_HEADER.size
+                    family, _, _, scope, index = INTERFACE_ADDRESS_MESSAGE.unpack_from(data, position)
+                    attributes = {}
+                    position += INTERFACE_ADDRESS_MESSAGE.size
+                    while position + ROUTE_ATTRIBUTE.size <= offset + length:
+                        attribute_length, attribute_type = ROUTE_ATTRIBUTE.unpack_from(data, position)
+                        if attribute_length < ROUTE_ATTRIBUTE.size:
+                            break
+                        attributes[attribute_type] = data[position + ROUTE_ATTRIBUTE.size:position + attribute_length]
+                        position += attribute_length + (-attribute_length % 4)
+                    # the local address, IFA_ADDRESS is the address of the peer on point-to-point interfaces
+                    address = attributes.get(IFA_LOCAL, attributes.get(IFA_ADDRESS))
+                    if address is not None and family in (socket.AF_INET, socket.AF_INET6):
+                        addresses.append((index, family, scope, socket.inet_ntop(family, address)))
+                offset += length + (-length % 4)
+
+
+def read_interface_attribute(network_interface, attribute):
+    """
+    Read an attribute of a network interface from sysfs (Linux only), e.g. its mac address or flags.
+    :param network_interface: The name of the network interface.
+    :type network_interface: string
+    :param attribute: The name of the attribute.
+    :type attribute: string
+    :return: The value of the attribute or None if the interface or attribute does not exist.
+    :rtype: Optional[string]
+    """
+    if not network_interface or network_interface in ('.', '..') or '/' in network_interface:
+        return None
+    try:
+        with open(os.path.join(SYS_CLASS_NET, network_interface, attribute)) as attribute_file:
+            return attribute_file.read().strip()
+    except OSError:
+        return None
+
+
+def get_interface_mac_address(network_interface):
+    """
+    Get the mac address of the network interface with the given name, read from sysfs on Linux.
+    :param network_interface: The name of the network interface.
+    :type network_interface: string
+    :return: The mac address (as ':' separated string) or None if the interface does not exist or has none.
+    :rtype: Optional[string]
+    """
+    if sys.platform.startswith('linux') and os.path.isdir(SYS_CLASS_NET):
+        mac_address = read_interface_attribute(network_interface, 'address')
+        return mac_address.lower() if mac_address else None
+    addresses = get_interface_addresses().get(network_interface, [])
+    return next((address.address for address in addresses if address.family == AF_LINK), None)
+
+
+def is_interface_up(network_interface):
+    """
+    Check whether the network interface with the given name is up, read from sysfs on Linux.
+    :param network_interface: The name of the network interface.
+    :type network_interface: string
+    :return: False if the interface is known to be down, True otherwise.
+    :rtype: boolean
+    """
+    if sys.platform.startswith('linux') and os.path.isdir(SYS_CLASS_NET):
+        flags = read_interface_attribute(network_interface, 'flags')
+        return flags is None or bool(int(flags, 16) & IFF_UP)
+    import psutil
+    stats = psutil.net_if_stats().get(network_interface)
+    return stats is None or stats.isup
+
+
+def is_private_cache_file(path):
+    """
+    Check that a cache file can only have been written by the current user, so that entries planted by other users
+    (e.g. a wrong interface for an IP address) are never used. The directory of the file is created with mode 0700 if
+    it is missing. The directory and the file (if it exists) must be owned by the current user, must not be writable
+    by group or others and must not be symbolic links. Always true on platforms without file ownership (Windows).
+    :param path: Path of the cache file.
+    :type path: string
+    :return: Whether the cache file may be read and written.
+    :rtype: boolean
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+    directory = os.path.dirname(path) or os.curdir
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        for checked_path, is_type in ((directory, stat.S_ISDIR), (path, stat.S_ISREG)):
+            try:
+                status = os.lstat(checked_path)
+            except FileNotFoundError:
+                return True  # the file is created on the first write
+            if (not is_type(status.st_mode) or status.st_uid != os.getuid()
+                    or status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+                return False
+    except OSError:
+        return False
+    return True
+
+
+class InterfaceCache:
+    """
+    Caches the network interface and mac address resolved for an IP address in a JSON file, so that subsequent
+    processes (e.g. consecutive runs of the dcp_utility) can skip iterating over all network interfaces.
+    Entries expire after the given TTL and can be invalidated explicitly. A file that other users could have written
+    (see is_private_cache_file) is neither read nor replaced, the interface is looked up again instead.
+    """
+
+    def __init__(self, path=INTERFACE_CACHE_PATH, ttl=INTERFACE_CACHE_TTL):
+        """
+        Create a new cache stored in the given file.
+        :param path: Path of the cache file, created on the first write.
+        :type path: string
+        :param ttl: Time in seconds after which cached entries expire.
+        :type ttl: float
+        """
+        self.path = path
+        self.ttl = ttl
+
+    def get(self, ip):
+        """
+        Get the cached mac address and network interface for the given IP address.
+        :param ip: The IP address used to select the network interface.
+        :type ip: string
+        :return: MAC-address, Interface name or None if there is no valid entry for the IP address.
+        :rtype: Optional[Tuple[string, string]]
+        """
+        entry = self.__load().get(ip)
+        if entry is None or time.time() - entry['time'] > self.ttl:
+            return None
+        return entry['mac'], entry['interface']
+
+    def put(self, ip, mac_address, network_interface):
+        """
+        Store the mac address and network interface resolved for the given IP address.
+        :param ip: The IP address used to select the network interface.
+        :type ip: string
+        :param mac_address: The mac address of the network interface.
+        :type mac_address: string
+        :param network_interface: The name of the network interface.
+        :type network_interface: string
+        """
+        entries = self.__load()
+        entries[ip] = {'mac': mac_address, 'interface': network_interface, 'time': time.time()}
+        self.__store(entries)
+
+    def invalidate(self, ip=None):
+        """
+        Remove the entry of the given IP address from the cache, or all entries if no IP address is given.
+        :param ip: The IP address to invalidate. Default: None (invalidate all entries).
+        :type ip: Optional[string]
+        """
+        entries = {} if ip is None else self.__load()
+        entries.pop(ip, None)
+        self.__store(entries)
+
+    def __load(self):
+        """
+        Load all entries from the cache file. A missing or corrupt file is treated as empty cache.
+        :return: The cache entries by IP address.
+        :rtype: Dict[string, Dict[string, Any]]
+        """
+        if not is_private_cache_file(self.path):
+            logger.debug(f"Ignoring interface cache {self.path}, it is not private to the current user")
+            return {}
+        try:
+            with open(self.path) as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+    def __store(self, entries):
+        """
+        Write the given entries to the cache file. The file is replaced atomically, so concurrent processes never
+        read a partially written file. Errors are only logged, as the cache is an optimization.
+        :param entries: The cache entries by IP address.
+        :type entries: Dict[string, Dict[string, Any]]
+        """
+        if not is_private_cache_file(self.path):
+            logger.debug(f"Not writing interface cache {self.path}, it is not private to the current user")
+            return
+        try:
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(self.path))
+            with os.fdopen(file_descriptor, 'w') as cache_file:
+                json.dump(entries, cache_file)
+            os.replace(temporary_path, self.path)
+        except OSError as error:
+            logger.debug(f"Could not write interface cache {self.path}: {error}")
+
+
+class DeviceCache:
+    """
+    Caches the devices parsed from identify and get responses in an SQLite database, so that subsequent requests
+    (also of other processes, e.g. consecutive runs of the dcp_utility) can be answered without sending a request.
+    Each entry records when the full device (identify response), its IP configuration and its name of station were
+    last received, the caller decides with max_age how old an answer may be. Devices are buffered in memory and
+    written in one transaction by flush. Errors are only logged, as the cache is an optimization. A database that other
+    users could have written (see is_private_cache_file) is not opened, as its entries would be returned as devices.
+    """
+    # the column holding the time of the latest update by aspect of a cached device
+    ASPECTS = {'device': 'identified', 'ip': 'ip_updated', 'name': 'name_updated'}
+    IP_FIELDS = ('IP', 'netmask', 'gateway')
+
+    def __init__(self, path=DEVICE_CACHE_PATH):
+        """
+        Create a new cache stored in the given database file.
+        :param path: Path of the database file, created on the first write.
+        :type path: string
+        """
+        self.path = path
+        self.__connection = None
+        self.__pending = []  # (mac address, parameters, complete, time) of the devices not yet written
+        self.__lock = threading.Lock()  # the connection is shared, e.g. by the threads of MultiInterfaceDCP
+
+    def put(self, device, complete=True):
+        """
+        Add a device parsed from a response to the cache. The device is written with the next flush.
+        :param device: The device.
+        :type device: Device
+        :param complete: Whether the device was parsed from an identify response and replaces the cached entry.
+        Otherwise (get response) only the parameters set are updated.
+        :type complete: boolean
+        """
+        with self.__lock:
+            self.__pending.append((device.MAC, device.to_dict(), complete, time.time()))
+            if len(self.__pending) >= DEVICE_CACHE_BUFFER_SIZE:
+                self.__write_pending()
+
+    def update(self, mac, parameters):
+        """
+        Update the given parameters of a cached device, e.g. after a successful set request.
+        :param mac: The mac address (as ':' separated string).
+        :type mac: string
+        :param parameters: The new values by field name (see Device.FIELDS).
+        :type parameters: Dict[string, Any]
+        """
+        with self.__lock:
+            self.__pending.append((mac, parameters, False, time.time()))
+        self.flush()
+
+    def get(self, macs, max_age, aspect='device'):
+        """
+        Get the cached devices with the given mac addresses whose given aspect was updated at most max_age seconds ago.
+        :param macs: The mac addresses (as ':' separated strings).
+        :type macs: Iterable[string]
+        :param max_age: The maximum age of the entries in seconds.
+        :type max_age: float
+        :param aspect: 'device' (the device was identified), 'ip' (the IP configuration was received or set) or 'name'
+        (the name of station was received or set).
+        :type aspect: string
+        :return: The cached devices by mac address, devices without a valid entry are missing.
+        :rtype: Dict[string, Device]
+        """
+        import sqlite3
+        self.flush()
+        macs = list(macs)
+        column = self.ASPECTS[aspect]
+        oldest = time.time() - max_age
+        devices = {}
+        with self.__lock:
+            try:
+                connection = self.__connect()
+                # query in chunks, the number of parameters of a statement is limited
+                for start in range(0, len(macs), 500):
+                    chunk = macs[start:start + 500]
+                    rows = connection.execute(f"SELECT mac, device FROM devices WHERE {column} >= ? AND mac IN "
+                                              f"({', '.join('?' * len(chunk))})", [oldest] + chunk)
+                    devices.update((mac, Device.from_dict(json.loads(values))) for mac, values in rows)
+            except sqlite3.Error as error:
+                logger.debug(f"Could not read device cache {self.path}: {error}")
+        return devices
+
+    def invalidate(self, mac=None):
+        """
+        Remove the entry of the given mac address or all entries.
+        :param mac: The mac address to remove or None to clear the cache.
+        :type mac: Optional[string]
+        """
+        import sqlite3
+        self.flush()
+        with self.__lock:
+            try:
+                connection = self.__connect()
+                with connection:
+                    if mac is None:
+                        connection.execute("DELETE FROM devices")
+                    else:
+                        connection.execute("DELETE FROM devices WHERE mac = ?", (mac,))
+            except sqlite3.Error as error:
+                logger.debug(f"Could not write device cache {self.path}: {error}")
+
+    def flush(self):
+        """Write the buffered devices to the database in one transaction."""
+        if not self.__pending:
+            return
+        with self.__lock:
+            self.__write_pending()
+
+    def close(self):
+        """Write the buffered devices and close the database."""
+        self.flush()
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __write_pending(self):
+        """Write the buffered devices in one transaction. Must be called with the lock held."""
+        pending, self.__pending = self.__pending, []
+        if not pending:
+            return
+        import sqlite3
+        try:
+            connection = self.__connect()
+            with connection:
+                for mac, parameters, complete, updated in pending:
+                    if complete:
+                        connection.execute("INSERT OR REPLACE INTO devices VALUES (?, ?, ?, ?, ?)",
+                                           (mac, json.dumps(parameters), updated, updated, updated))
+                    else:
+                        self.__merge(connection, mac, parameters, updated)
+        except sqlite3.Error as error:
+            logger.debug(f"Could not write device cache {self.path}: {error}")
+
+    def __merge(self, connection, mac, parameters, updated):
+        """Merge the parameters that are set into the entry of the given mac address, creating it if necessary."""
+        parameters = {name: value for name, value in parameters.items() if value not in ('', None)}
+        row = connection.execute("SELECT device FROM devices WHERE mac = ?", (mac,)).fetchone()
+        values = json.loads(row[0]) if row is not None else {'MAC': mac}
+        values.update(parameters)
+        ip_updated = updated if any(name in parameters for name in self.IP_FIELDS) else None
+        name_updated = updated if 'name_of_station' in parameters else None
+        connection.execute("INSERT INTO devices (mac, device, ip_updated, name_updated) VALUES (?, ?, ?, ?) "
+                           "ON CONFLICT(mac) DO UPDATE SET device = excluded.device, "
+                           "ip_updated = COALESCE(excluded.ip_updated, ip_updated), "
+                           "name_updated = COALESCE(excluded.name_updated, name_updated)",
+                           (mac, json.dumps(values), ip_updated, name_updated))
+
+    def __connect(self):
+        """Open the database on first use and create the table of the devices."""
+        import sqlite3
+        if self.__connection is None:
+            if not is_private_cache_file(self.path):
+                raise sqlite3.DatabaseError("the database is not private to the current user")
+            connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")  # readers of other processes do not block writers
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute("CREATE TABLE IF NOT EXISTS devices (mac TEXT PRIMARY KEY, device TEXT NOT NULL, "
+                                   "identified REAL, ip_updated REAL, name_updated REAL)")
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self.__connection = connection
+        return self.__connection
+
+
+class ReconfigurationResult:
+    """
+    The result of reconfiguring one device with DCP.reconfigure: the requested values, the response code to each set
+    request and the values read back to verify them.
+    """
+    __slots__ = ('mac', 'requested', 'responses', 'observed', 'error')
+
+    def __init__(self, mac, requested):
+        """
+        Create a new result, before any request is sent.
+        :param mac: The mac address of the device (as ':' separated string).
+        :type mac: string
+        :param requested: The new values by field name ('IP', 'netmask', 'gateway', 'name_of_station').
+        :type requested: Dict[string, string]
+        """
+        self.mac = mac
+        self.requested = requested
+        self.responses = {}  # the response code (None: no response) by kind of set request, 'ip' or 'name'
+        self.observed = None  # the values read back by field name, None if they were not read back
+        self.error = None  # why the requested values are invalid, no request is sent then
+
+    @property
+    def verified(self):
+        """
+        Whether all requested values were read back from the device.
+        :return: The verification result or None if the values were not read back.
+        :rtype: Optional[boolean]
+        """
+        if self.observed is None:
+            return None
+        return all(self.observed.get(name) == value for name, value in self.requested.items())
+
+    @property
+    def status(self):
+        """
+        The overall status: 'local_error' (invalid values), 'device_error' (a set request was rejected), 'timeout' (a
+        set request was not answered), 'verify_failed' (a value read back differs or was not received) or 'ok'.
+        :rtype: string
+        """
+        if self.error is not None:
+            return 'local_error'
+        if any(response is not None and not response for response in self.responses.values()):
+            return 'device_error'
+        if any(response is None for response in self.responses.values()):
+            return 'timeout'
+        if self.verified is False:
+            return 'verify_failed'
+        return 'ok'
+
+    def to_dict(self):
+        """
+        Return this result as dict, e.g. to serialize it as JSON. The responses are given as response code.
+        :return: The parameters of this result.
+        :rtype: Dict[string, Any]
+        """
+        responses = {kind: None if response is None else response.code for kind, response in self.responses.items()}
+        return dict(mac=self.mac, status=self.status, requested=self.requested, responses=responses,
+                    observed=self.observed, verified=self.verified, error=self.error)
+
+    def __str__(self):
+        """
+        Return a human-readable summary of the result.
+        :return: String representation of this result.
+        :rtype: string
+        """
+        details = [f"{kind}: {'no response' if response is None else response.get_message()}"
+                   for kind, response in self.responses.items()]
+        if self.observed is not None:
+            details.append('verified' if self.verified else f'read back {self.observed}')
+        if self.error is not None:
+            details.append(self.error)
+        return f"{self.mac}: {self.status} ({', '.join(details)})"
+
+
+class AnyXID:
+    """Container of all XIDs, accepts responses to any request (see DCP.replay)."""
+
+    def __contains__(self, xid):
+        """
+        Check whether responses with the given XID are accepted, which is always the case.
+        :param xid: The XID of a response.
+        :type xid: int
+        :return: True
+        :rtype: boolean
+        """
+        return True
+
+
+class DCPStats:
+    """
+    Counters and timings of the transport of a DCP instance, to find out why responses are missing: requests that were
+    never answered, packets dropped by the kernel, packets received but rejected (by reason) or that failed to parse.
+    Packets discarded by the BPF filter of the socket never reach python and are not counted.
+    Hooks (e.g. for profiling) are called as hook(event, **details) with the events 'sent' (xid), 'received' (length),
+    'rejected' (reason), 'parse_error' (error), 'response' (xid, rtt in seconds or None) and 'unanswered' (count).
+    """
+    # reasons a received packet is rejected: shorter than the DCP header, addressed to another host, not DCP, not a
+    # response, XID of no pending request, response to a set request without response (control) block
+    REJECT_REASONS = ('short', 'destination', 'ether_type', 'service_type', 'xid', 'no_control_block')
+
+    def __init__(self):
+        """Create new statistics with all counters at zero and no hooks."""
+        self.hooks = []
+        self.reset()
+
+    def reset(self):
+        """Set all counters and timings to zero, the hooks are kept."""
+        self.frames_sent = 0
+        self.frames_received = 0
+        self.responses = 0  # packets accepted as response to a pending request
+        self.rejected = collections.Counter()  # rejected packets by reason, see REJECT_REASONS
+        self.parse_errors = 0
+        self.unanswered = 0  # unicast requests without response within their timeout
+        self.kernel_packets = 0  # packets passed to the socket by the kernel, including the dropped ones (Linux only)
+        self.kernel_drops = 0  # packets dropped by the kernel, e.g. because the receive buffer was full (Linux only)
+        self.wait_time = 0.0  # time in seconds spent waiting for and receiving packets
+        self.parse_time = 0.0  # time in seconds spent validating and parsing packets
+        self.rtt_histogram = collections.Counter()  # responses by upper bound of their rtt in ms, None: above all
+        self.rtt_count = 0
+        self.rtt_sum = 0.0
+        self.rtt_min = None
+        self.rtt_max = None
+        self.__sent_times = {}  # send time by XID of the latest requests
+
+    def add_hook(self, hook):
+        """
+        Register a callback that is called on each event, see the class description.
+        :param hook: The callback, called as hook(event, **details).
+        :type hook: Callable
+        """
+        self.hooks.append(hook)
+
+    def record_sent(self, xids, sent_time):
+        """Count the requests with the given XIDs as sent at the given time (time.perf_counter)."""
+        sent_times = self.__sent_times
+        for xid in xids:
+            sent_times[xid] = sent_time
+            if self.hooks:
+                self.__emit('sent', xid=xid)
+        self.frames_sent += len(xids)
+        while len(sent_times) > STATS_SENT_TIMES_SIZE:
+            del sent_times[next(iter(sent_times))]
+
+    def record_received(self, length):
+        """Count a received packet of the given length."""
+        self.frames_received += 1
+        if self.hooks:
+            self.__emit('received', length=length)
+
+    def record_rejected(self, reason):
+        """Count a received packet rejected for the given reason (one of REJECT_REASONS)."""
+        self.rejected[reason] += 1
+        if self.hooks:
+            self.__emit('rejected', reason=reason)
+
+    def record_parse_error(self, error):
+        """Count a packet that could not be parsed because of the given error."""
+        self.parse_errors += 1
+        if self.hooks:
+            self.__emit('parse_error', error=error)
+
+    def record_response(self, xid):
+        """Count a valid response to the request with the given XID and add its round trip time to the histogram."""
+        self.responses += 1
+        sent_time = self.__sent_times.get(xid)
+        rtt = None
+        if sent_time is not None:
+            rtt = time.perf_counter() - sent_time
+            self.rtt_count += 1
+            self.rtt_sum += rtt
+            self.rtt_min = rtt if self.rtt_min is None else min(self.rtt_min, rtt)
+            self.rtt_max = rtt if self.rtt_max is None else max(self.rtt_max, rtt)
+            bucket = bisect.bisect_left(RTT_HISTOGRAM_BOUNDS, rtt * 1000)
+            self.rtt_histogram[RTT_HISTOGRAM_BOUNDS[bucket] if bucket < len(RTT_HISTOGRAM_BOUNDS) else None] += 1
+        if self.hooks:
+            self.__emit('response', xid=xid, rtt=rtt)
+
+    def record_unanswered(self, count=1):
+        """Count requests that were not answered within their timeout."""
+        if count:
+            self.unanswered += count
+            if self.hooks:
+                self.__emit('unanswered', count=count)
+
+    def add(self, other):
+        """
+        Add the counters and timings of other statistics to these, e.g. to sum up the statistics of several instances.
+        :param other: The statistics to add.
+        :type other: DCPStats
+        """
+        for name in ('frames_sent', 'frames_received', 'responses', 'parse_errors', 'unanswered', 'kernel_packets',
+                     'kernel_drops', 'wait_time', 'parse_time', 'rtt_count', 'rtt_sum'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.rejected.update(other.rejected)
+        self.rtt_histogram.update(other.rtt_histogram)
+        for name, select_value in (('rtt_min', min), ('rtt_max', max)):
+            values = [value for value in (getattr(self, name), getattr(other, name)) if value is not None]
+            setattr(self, name, select_value(values) if values else None)
+
+    def to_dict(self):
+        """
+        Return the statistics as dict, e.g. to serialize them as JSON. Times are given in seconds, the histogram by
+        upper bound of each bucket in milliseconds ('inf' for the last one).
+        :return: The counters and timings.
+        :rtype: Dict[string, Any]
+        """
+        histogram = {'inf' if bound is None else str(bound): count for bound, count in self.__histogram_buckets()}
+        return dict(frames_sent=self.frames_sent, frames_received=self.frames_received, responses=self.responses,
+                    rejected=dict(self.rejected), parse_errors=self.parse_errors, unanswered=self.unanswered,
+                    kernel_packets=self.kernel_packets, kernel_drops=self.kernel_drops, wait_time=self.wait_time,
+                    parse_time=self.parse_time, rtt_count=self.rtt_count, rtt_min=self.rtt_min,
+                    rtt_mean=self.rtt_sum / self.rtt_count if self.rtt_count else None, rtt_max=self.rtt_max,
+                    rtt_histogram=histogram)
+
+    def summary(self):
+        """
+        Return a human-readable multi-line summary of the statistics.
+        :return: The summary.
+        :rtype: string
+        """
+        rejected = ', '.join(f'{reason} {count}' for reason, count in sorted(self.rejected.items())) or 'none'
+        lines = [
+            f'frames sent: {self.frames_sent}, received: {self.frames_received}, responses: {self.responses}, '
+            f'unanswered requests: {self.unanswered}',
+            f'rejected: {rejected}, parse errors: {self.parse_errors}',
+            f'kernel: {self.kernel_packets} packets, {self.kernel_drops} dropped',
+            f'time waiting: {self.wait_time:.3f}s, parsing: {self.parse_time:.3f}s',
+        ]
+        if self.rtt_count:
+            lines.append(f'rtt: min {self.rtt_min * 1000:.2f}ms, mean {self.rtt_sum / self.rtt_count * 1000:.2f}ms, '
+                         f'max {self.rtt_max * 1000:.2f}ms')
+            buckets = [(f'>{RTT_HISTOGRAM_BOUNDS[-1]}ms' if bound is None else f'<={bound}ms', count)
+                       for bound, count in self.__histogram_buckets()]
+            lines.append('rtt histogram: ' + ', '.join(f'{label} {count}' for label, count in buckets))
+        return '\n'.join(lines)
+
+    def __histogram_buckets(self):
+        """Get the non-empty buckets of the rtt histogram in ascending order as (upper bound, count)."""
+        return [(bound, self.rtt_histogram[bound]) for bound in RTT_HISTOGRAM_BOUNDS + (None,)
+                if self.rtt_histogram[bound]]
+
+    def __emit(self, event, **details):
+        """Call all hooks with the given event."""
+        for hook in self.hooks:
+            hook(event, **details)
+
+
 class DCP:
+    # BPF filter of the socket (pcap only): DCP packets sent to or from this host
+    SOCKET_FILTER = "ether host {mac} and ether proto {ether_type}"
 
-    def __init__(self, ip, timeout=7):
+    def __init__(self, ip, timeout=7, waiting_time=0, interface=None, interface_cache=None, l2_socket=None,
+                 device_cache=None, receive_ring=False, pcap_out=None):
         """
         Create a new instance, use the given ip to select the network interface.
-        :param ip: The ip address used to select the network interface.
+        :param ip: The ip address used to select the network interface. Not required on Linux if the interface is
+        given explicitly (pcap on Windows always uses the ip to select its device).
         :type ip: string
+        :param timeout: The default timeout for requests and identify_all (in seconds).
+        :type timeout: float
+        :param waiting_time: Optional time (in seconds) to wait after a successful set request, e.g. to give the
+        device time to apply the new settings. Default: 0 (return as soon as the response is received).
+        :type waiting_time: float
+        :param interface: Optional name of the network interface to use, skips selecting the interface by ip.
+        :type interface: Optional[string]
+        :param interface_cache: Optional cache for the network interface and mac address resolved from the ip.
+        :type interface_cache: Optional[InterfaceCache]
+        :param l2_socket: Optional socket to use instead of opening one on the network interface, e.g. the in-memory
+        transport of the DCP simulator. Must provide send, recv and close like L2Socket and the source mac address as
+        mac_address, the ip and interface are ignored.
+        :type l2_socket: Optional[Any]
+        :param device_cache: Optional cache filled with the devices parsed from identify and get responses. Requests
+        for the IP address, name of station or identity of a device are answered from it if its entry is at most
+        cache_max_age seconds old.
+        :type device_cache: Optional[DeviceCache]
+        :param receive_ring: Whether to receive through a memory-mapped PacketRing instead of one recv per packet
+        (Linux only, falls back to recv if the ring cannot be set up). Recommended for identify_all in large networks,
+        as whole blocks of responses are consumed per wakeup, but each response may be delayed by up to
+        RING_BLOCK_TIMEOUT ms. Default: False
+        :type receive_ring: boolean
+        :param pcap_out: Optional path of a pcap file (or a PcapWriter) to record every frame sent and received to.
+        A file given by path is closed by close, a PcapWriter only flushed.
+        :type pcap_out: Optional[Union[string, PcapWriter]]
         """
-        self.src_mac, network_interface = self.__get_network_interface_and_mac_address(ip)
+        self.stats = DCPStats()  # counters and timings of the transport, see refresh_stats for the kernel counters
+        if l2_socket is not None:
+            self.src_mac, network_interface = l2_socket.mac_address, None
+        elif interface is not None:
+            self.src_mac, network_interface = self.__get_mac_address(interface), interface
+        else:
+            self.src_mac, network_interface = self.__resolve_network_interface(ip, interface_cache)
+        self.__src_mac_bytes = util.mac_address_to_bytes(self.src_mac)
 
         self.default_timeout = timeout  # default timeout for requests (in seconds)
         self.identify_all_timeout = timeout  # timeout to receive all responses for identify_all
-        self.waiting_time = timeout  # time to wait between sending a set request and receiving the response
+        self.waiting_time = waiting_time  # time to wait after a successful set request (opt-in settle delay)
+        self.device_cache = device_cache
+        self.cache_max_age = None  # maximum age of cached answers in seconds, None always sends the request
 
         # the XID is the id of the current transaction and can be used to identify the responses to a request
         self.__xid = int(random.getrandbits(32))  # initialize it with a random value
+        # request frames by (frame id, service, option, suboption, value, response delay), only the destination and
+        # the XID differ between requests with the same key and are patched in place
+        self.__frame_templates = {}
 
         # This filter in BPF format filters all unrelated packets (i.e. wrong mac address or ether type) before they are
         # processed by python. This solves issues in high traffic networks, as otherwise packets might be missed under
         # heavy load when python is not fast enough processing them.
-        socket_filter = f"ether host {self.src_mac} and ether proto {dcp_constants.ETHER_TYPE}"
-        self.__socket = L2Socket(ip=ip, interface=network_interface, bpf_filter=socket_filter,
-                                 protocol=dcp_constants.ETHER_TYPE)
+        socket_filter = self.SOCKET_FILTER.format(mac=self.src_mac, ether_type=dcp_constants.ETHER_TYPE)
+        if l2_socket is not None:
+            self._socket = l2_socket
+        else:
+            self._socket = L2Socket(ip=ip, interface=network_interface, bpf_filter=socket_filter,
+                                    protocol=dcp_constants.ETHER_TYPE)
+        self._socket_fd = self.__get_socket_fd()
+        self.__enlarge_receive_buffer()
+        self._ring = self.__open_ring() if receive_ring else None
+        self.__owns_pcap_writer = pcap_out is not None and not isinstance(pcap_out, PcapWriter)
+        self.pcap_writer = PcapWriter(pcap_out) if self.__owns_pcap_writer else pcap_out
+
+    def __get_socket_fd(self):
+        """
+        Get the file descriptor of the underlying raw socket, which can be used to wait for incoming packets with
+        select. Only the Linux socket exposes one, for pcap (Windows) None is returned and the receive path falls back
+        to the blocking recv with pcap's read timeout.
+        :return: The file descriptor of the raw socket or None.
+        :rtype: Optional[int]
+        """
+        raw_socket = getattr(self._socket, 'socket', None)
+        return raw_socket.fileno() if raw_socket is not None else None
+
+    def __enlarge_receive_buffer(self):
+        """
+        Enlarge the kernel receive buffer of the raw socket to RECEIVE_BUFFER_SIZE (Linux only). When many responses
+        arrive at once, the default buffer overflows and the kernel silently drops the remaining packets.
+        SO_RCVBUFFORCE is tried first as it is not limited by net.core.rmem_max, it requires the same privileges as the
+        raw socket itself.
+        """
+        raw_socket = getattr(self._socket, 'socket', None)
+        if raw_socket is None:
+            return
+        try:
+            raw_socket.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, RECEIVE_BUFFER_SIZE)
+        except OSError:
+            raw_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER_SIZE)
+
+    def __open_ring(self):
+        """
+        Set up a memory-mapped receive ring on the raw socket (Linux only).
+        :return: The receive ring or None if it is not available, then packets are received with recv.
+        :rtype: Optional[PacketRing]
+        """
+        raw_socket = getattr(self._socket, 'socket', None)
+        if raw_socket is None or getattr(socket, 'AF_PACKET', None) != raw_socket.family:
+            return None
+        try:
+            return PacketRing(raw_socket)
+        except (OSError, ValueError) as error:
+            logger.debug(f"Receive ring not available, receiving with recv: {error}")
+            return None
+
+    @staticmethod
+    def __resolve_network_interface(ip, interface_cache):
+        """
+        Get the mac address and name of the network interface corresponding to the given IP address from the given
+        cache. If the cache has no valid entry (or no cache is given), the network interface is searched and the result
+        is stored in the cache.
+        :param ip: The IP address to select the network interface with.
+        :type ip: string
+        :param interface_cache: The cache to use or None.
+        :type interface_cache: Optional[InterfaceCache]
+        :return: MAC-address, Interface name
+        :rtype: Tuple[string, string]
+        """
+        cached = interface_cache.get(ip) if interface_cache is not None else None
+        if cached is not None:
+            return cached
+        mac_address, network_interface = DCP.__get_network_interface_and_mac_address(ip)
+        if interface_cache is not None:
+            interface_cache.put(ip, mac_address, network_interface)
+        return mac_address, network_interface
+
+    @staticmethod
+    def __get_mac_address(network_interface):
+        """
+        Get the mac address of the network interface with the given name.
+        If the interface does not exist or has no mac address, a ValueError is raised.
+        :param network_interface: The name of the network interface.
+        :type network_interface: string
+        :return: MAC-address
+        :rtype: string
+        """
+        mac_address = get_interface_mac_address(network_interface)
+        if mac_address is None:
+            raise ValueError(f"Could not find a mac address for network interface {network_interface}.")
+        return mac_address
 
     @staticmethod
     def __get_network_interface_and_mac_address(ip):
@@ -77,7 +1654,8 @@ class DCP:
         :return: MAC-address, Interface name
         :rtype: Tuple[string, string]
         """
-        for network_interface, addresses in psutil.net_if_addrs().items():
+        interfaces = get_interface_addresses()
+        for network_interface, addresses in interfaces.items():
             addresses_by_family = {}
             for address in addresses:
                 addresses_by_family.setdefault(address.family, []).append(address)
@@ -87,39 +1665,68 @@ class DCP:
             ipv6_match = any(address.address.startswith(ip) for address in addresses_by_family.get(socket.AF_INET6, []))
 
             if ipv4_match or ipv6_match:
-                if not addresses_by_family.get(psutil.AF_LINK, False):
+                if not addresses_by_family.get(AF_LINK, False):
                     logger.warning(f"Found network interface matching the ip {ip} but no corresponding mac address "
-                                   f"with AF_LINK = {psutil.AF_LINK}")
+                                   f"with AF_LINK = {AF_LINK}")
                     continue
-                mac_address = addresses_by_family[psutil.AF_LINK][0].address
-                return mac_address.replace('-', ':').lower(), network_interface
-        logger.debug(f"Could not find a network interface for ip {ip} in {psutil.net_if_addrs()}")
+                return addresses_by_family[AF_LINK][0].address, network_interface
+        logger.debug(f"Could not find a network interface for ip {ip} in {interfaces}")
         raise ValueError(f"Could not find a network interface for ip {ip}.")
 
-    def identify_all(self, timeout=None):
+    def identify_all(self, timeout=None, idle_timeout=None):
         """
         Send multicast request to identify ALL devices in current network interface and get information about them.
         :param timeout: Optional timeout in seconds. Since it is unknown how many devices will respond to the request,
         responses are received for the full duration of the timeout. The default is defined in self.default_timeout.
         :type timeout: integer
+        :param idle_timeout: Optional idle gap in seconds to stop receiving early: once the response delay window of
+        the request has passed and no new response was received for idle_timeout seconds, no further responses are
+        expected and the function returns before the timeout. Default: None (always wait for the full timeout).
+        :type idle_timeout: float
         :return: A list containing all devices found.
         :rtype: List[Device]
         """
+        return list(self.iter_identify_all(timeout, idle_timeout))
+
+    def iter_identify_all(self, timeout=None, idle_timeout=None):
+        """
+        Send multicast request to identify ALL devices in current network interface and yield each device as soon as
+        its response is received and parsed. The request is sent when the iteration starts.
+        See identify_all for a description of the timeouts.
+        :param timeout: Optional timeout in seconds. The default is defined in self.identify_all_timeout.
+        :type timeout: integer
+        :param idle_timeout: Optional idle gap in seconds to stop receiving early. Default: None (always wait for the
+        full timeout).
+        :type idle_timeout: float
+        :return: A generator yielding all devices found.
+        :rtype: Iterator[Device]
+        """
         dst_mac = dcp_constants.PROFINET_MULTICAST_MAC_IDENTIFY
         option, suboption = Option.ALL
         response_delay = dcp_constants.RESPONSE_DELAY
-        self.__send_request(dst_mac, FrameID.IDENTIFY_REQUEST, ServiceID.IDENTIFY, option, suboption, response_delay=response_delay)
+        xid = self._send_request(dst_mac, FrameID.IDENTIFY_REQUEST, ServiceID.IDENTIFY, option, suboption,
+                                  response_delay=response_delay)
 
-        # Receive all responses until the timeout occurs
+        # Receive all responses until the timeout occurs (or, with an idle timeout, until the devices stop responding)
         timeout = self.identify_all_timeout if timeout is None else timeout
-        timed_out = time.time() + timeout
-        devices = []
-        while time.time() < timed_out:
-            device = self.__read_response()
-            if device:
-                devices.append(device)
-
-        return devices
+        start = time.monotonic()
+        deadline = start + timeout
+        response_window_end = start + response_delay * RESPONSE_DELAY_UNIT
+        if idle_timeout is not None:
+            deadline = min(deadline, response_window_end + idle_timeout)
+        remaining = deadline - start
+        try:
+            while remaining > 0:
+                # the XID is passed explicitly, as the caller may send other requests while iterating
+                device = self.__read_response(timeout=remaining, xids=(xid,))
+                if device:
+                    yield device
+                    if idle_timeout is not None:
+                        last_response = time.monotonic()
+                        deadline = min(start + timeout, max(response_window_end, last_response) + idle_timeout)
+                remaining = deadline - time.monotonic()
+        finally:
+            self._flush_device_cache()
 
     def identify(self, mac):
         """
@@ -129,11 +1736,15 @@ class DCP:
         :return: The requested device.
         :rtype: Device
         """
+        cached = self._cached_devices([mac], 'device').get(mac)
+        if cached is not None:
+            return cached
         option, suboption = Option.ALL
         response_delay = dcp_constants.RESPONSE_DELAY
-        self.__send_request(mac, FrameID.IDENTIFY_REQUEST, ServiceID.IDENTIFY, option, suboption, response_delay=response_delay)
+        self._send_request(mac, FrameID.IDENTIFY_REQUEST, ServiceID.IDENTIFY, option, suboption, response_delay=response_delay)
 
         response = self.__read_response()
+        self._flush_device_cache()
         if not response:
             logger.debug(f"Timeout: no answer from device with MAC {mac}")
             raise DcpTimeoutError
@@ -150,14 +1761,10 @@ class DCP:
         a human-readable response message.
         :rtype: ResponseCode
         """
-        # To pack the ip addresses, convert them to bytes and concat them
-        packed_ip_conf = b''.join([util.ip_address_to_bytes(ip_address) for ip_address in ip_conf])
-        value = bytes(BlockQualifier.STORE_PERMANENT) + packed_ip_conf
-
+        value = self._ip_conf_value(ip_conf)
         option, suboption = Option.IP_ADDRESS
-        self.__send_request(mac, FrameID.GET_SET, ServiceID.SET, option, suboption, value)
+        self._send_request(mac, FrameID.GET_SET, ServiceID.SET, option, suboption, value)
 
-        time.sleep(self.waiting_time)
         response = self.__read_response(set_request=True)
 
         if response is None:
@@ -165,7 +1772,11 @@ class DCP:
             raise DcpTimeoutError
         elif not response:
             logger.debug(f"Set unsuccessful: {response.get_message()}")
+        elif self.waiting_time:
+            time.sleep(self.waiting_time)  # optional settle delay, only after the device confirmed the set request
 
+        if response:
+            self._update_device_cache(mac, dict(zip(DeviceCache.IP_FIELDS, ip_conf)))
         return response
 
     def set_name_of_station(self, mac, name):
@@ -179,16 +1790,10 @@ class DCP:
         a human-readable response message.
         :rtype: ResponseCode
         """
-        valid_pattern = re.compile(r"^[a-z][a-zA-Z0-9\-.]*$")
-        if not re.match(valid_pattern, name):
-            raise ValueError('Name should correspond DNS standard. A string of invalid format provided.')
-        name = name.lower()
-        value = bytes(BlockQualifier.STORE_PERMANENT) + bytes(name, encoding='ascii')
-
+        value = self._name_of_station_value(name)
         option, suboption = Option.NAME_OF_STATION
-        self.__send_request(mac, FrameID.GET_SET, ServiceID.SET, option, suboption, value)
+        self._send_request(mac, FrameID.GET_SET, ServiceID.SET, option, suboption, value)
 
-        time.sleep(self.waiting_time)
         response = self.__read_response(set_request=True)
 
         if response is None:
@@ -196,7 +1801,11 @@ class DCP:
             raise DcpTimeoutError
         elif not response:
             logger.debug(f"Set unsuccessful: {response.get_message()}")
+        elif self.waiting_time:
+            time.sleep(self.waiting_time)  # optional settle delay, only after the device confirmed the set request
 
+        if response:
+            self._update_device_cache(mac, {'name_of_station': name.lower()})
         return response
 
     def get_ip_address(self, mac):
@@ -207,10 +1816,14 @@ class DCP:
         :return: The requested IP-address.
         :rtype: string
         """
+        cached = self._cached_devices([mac], 'ip').get(mac)
+        if cached is not None:
+            return cached.IP
         option, suboption = Option.IP_ADDRESS
-        self.__send_request(mac, FrameID.GET_SET, ServiceID.GET, option, suboption)
+        self._send_request(mac, FrameID.GET_SET, ServiceID.GET, option, suboption)
 
         response = self.__read_response()
+        self._flush_device_cache()
         if not response:
             logger.debug(f"Timeout: no answer from device with MAC {mac}")
             raise DcpTimeoutError
@@ -224,15 +1837,123 @@ class DCP:
         :return: The requested name of station.
         :rtype: string
         """
+        cached = self._cached_devices([mac], 'name').get(mac)
+        if cached is not None:
+            return cached.name_of_station
         option, suboption = Option.NAME_OF_STATION
-        self.__send_request(mac, FrameID.GET_SET, ServiceID.GET, option, suboption)
+        self._send_request(mac, FrameID.GET_SET, ServiceID.GET, option, suboption)
 
         response = self.__read_response()
+        self._flush_device_cache()
         if not response:
             logger.debug(f"Timeout: no answer from device with MAC {mac}")
             raise DcpTimeoutError
         return response.name_of_station
 
+    def identify_many(self, macs, timeout=None):
+        """
+        Send identify requests to all devices with the given mac addresses at once and collect the responses.
+        All requests are sent up front with their own XID, so the total duration is bound by a single timeout instead
+        of one timeout per device.
+        :param macs: mac addresses of the target devices (as ':' separated strings)
+        :type macs: Iterable[string]
+        :param timeout: Optional timeout in seconds to wait for all responses. The default is defined in
+        self.default_timeout.
+        :type timeout: float
+        :return: A dict mapping each given mac address to the identified device, or to None if the device did not
+        respond before the timeout.
+        :rtype: Dict[string, Optional[Device]]
+        """
+        option, suboption = Option.ALL
+        response_delay = dcp_constants.RESPONSE_DELAY
+        macs = list(dict.fromkeys(macs))
+        cached = self._cached_devices(macs, 'device')
+        missing = [mac for mac in macs if mac not in cached]
+        xids = self._send_requests(missing, FrameID.IDENTIFY_REQUEST, ServiceID.IDENTIFY, option, suboption,
+                                   response_delay=response_delay)
+        responses = self.__read_responses(dict(zip(xids, missing)), timeout)
+        return {mac: cached[mac] if mac in cached else responses[mac] for mac in macs}
+
+    def get_ip_addresses(self, macs, timeout=None):
+        """
+        Send requests to get the IP addresses of all devices with the given mac addresses at once and collect the
+        responses. The total duration is bound by a single timeout instead of one timeout per device.
+        :param macs: mac addresses of the target devices (as ':' separated strings)
+        :type macs: Iterable[string]
+        :param timeout: Optional timeout in seconds to wait for all responses. The default is defined in
+        self.default_timeout.
+        :type timeout: float
+        :return: A dict mapping each given mac address to the requested IP-address, or to None if the device did not
+        respond before the timeout.
+        :rtype: Dict[string, Optional[string]]
+        """
+        option, suboption = Option.IP_ADDRESS
+        macs = list(dict.fromkeys(macs))
+        cached = self._cached_devices(macs, 'ip')
+        missing = [mac for mac in macs if mac not in cached]
+        pending = dict(zip(self._send_requests(missing, FrameID.GET_SET, ServiceID.GET, option, suboption), missing))
+        responses = self.__read_responses(pending, timeout)
+        responses.update(cached)
+        return {mac: responses[mac].IP if responses[mac] else None for mac in macs}
+
+    def get_names_of_station(self, macs, timeout=None):
+        """
+        Send requests to get the names of station of all devices with the given mac addresses at once and collect the
+        responses. The total duration is bound by a single timeout instead of one timeout per device.
+        :param macs: mac addresses of the target devices (as ':' separated strings)
+        :type macs: Iterable[string]
+        :param timeout: Optional timeout in seconds to wait for all responses. The default is defined in
+        self.default_timeout.
+        :type timeout: float
+        :return: A dict mapping each given mac address to the requested name of station, or to None if the device did
+        not respond before the timeout.
+        :rtype: Dict[string, Optional[string]]
+        """
+        option, suboption = Option.NAME_OF_STATION
+        macs = list(dict.fromkeys(macs))
+        cached = self._cached_devices(macs, 'name')
+        missing = [mac for mac in macs if mac not in cached]
+        pending = dict(zip(self._send_requests(missing, FrameID.GET_SET, ServiceID.GET, option, suboption), missing))
+        responses = self.__read_responses(pending, timeout)
+        responses.update(cached)
+        return {mac: responses[mac].name_of_station if responses[mac] else None for mac in macs}
+
+    def reconfigure(self, plan, timeout=None, verify=True):
+        """
+        Set the IP configuration and/or name of station of many devices at once: all set requests are sent at once and
+        their responses are collected by XID within a single timeout. Then (after self.waiting_time, once for all
+        devices) the new values are read back with pipelined get requests and compared to the plan.
+        :param plan: The new values by mac address (as ':' separated string), each a dict with the keys 'IP', 'netmask'
+        and 'gateway' (all three or none) and/or 'name_of_station'.
+        :type plan: Dict[string, Dict[string, string]]
+        :param timeout: Optional timeout in seconds to wait for all set responses, and again for all read-backs. The
+        default is defined in self.default_timeout.
+        :type timeout: float
+        :param verify: Whether to read back the new values. Default: True
+        :type verify: boolean
+        :return: The result for each device of the plan by mac address.
+        :rtype: Dict[string, ReconfigurationResult]
+        """
+        results, requests = self._plan_requests(plan)
+        # send all set requests, their responses are assigned to (mac address, option) by XID
+        pending = {self._send_request(mac, FrameID.GET_SET, ServiceID.SET, option[0], option[1], value): (mac, option)
+                   for mac, option, value in requests}
+        responses = self.__read_responses(pending, timeout, set_request=True)
+        self._record_set_responses(results, responses)
+
+        confirmed = [request for request, response in responses.items() if response]
+        if not verify or not confirmed:
+            return results
+        if self.waiting_time:
+            time.sleep(self.waiting_time)  # optional settle delay, once for all devices
+        pending = {}
+        for option in RECONFIGURATION_REQUESTS:
+            macs = [mac for mac, confirmed_option in confirmed if confirmed_option == option]
+            xids = self._send_requests(macs, FrameID.GET_SET, ServiceID.GET, option[0], option[1])
+            pending.update(zip(xids, ((mac, option) for mac in macs)))
+        self._record_read_backs(results, self.__read_responses(pending, timeout))
+        return results
+
     def blink(self, mac):
         """
         Send a request to let the led of the device with the given mac address flash.
@@ -246,7 +1967,7 @@ class DCP:
         value = bytes(BlockQualifier.RESERVED)
         value += bytes(dcp_constants.LED_BLINK_VALUE)
         option, suboption = Option.BLINK_LED
-        self.__send_request(mac, FrameID.GET_SET, ServiceID.SET, option, suboption, value)
+        self._send_request(mac, FrameID.GET_SET, ServiceID.SET, option, suboption, value)
 
         response = self.__read_response(set_request=True)
 
@@ -270,7 +1991,7 @@ class DCP:
         """
         option, suboption = Option.RESET_TO_FACTORY
         value = bytes(BlockQualifier.RESET_COMMUNICATION)
-        self.__send_request(mac, FrameID.GET_SET, ServiceID.SET, option, suboption, value)
+        self._send_request(mac, FrameID.GET_SET, ServiceID.SET, option, suboption, value)
 
         response = self.__read_response(set_request=True)
 
@@ -280,9 +2001,202 @@ class DCP:
         elif not response:
             logger.debug(f"Reset unsuccessful: {response.get_message()}")
 
+        if response:
+            self._update_device_cache(mac, None)
         return response
 
-    def __send_request(self, dst_mac, frame_id, service, option, suboption, value=None, response_delay=0):
+    def replay(self, frames):
+        """
+        Parse recorded frames (e.g. read with read_pcap) as if they had been received, without using the socket: the
+        responses addressed to this host (see find_host_mac_address) are parsed whatever their XID, set responses
+        yield a ResponseCode, all other responses a Device. The frames are counted in self.stats like received ones.
+        :param frames: The recorded ethernet frames.
+        :type frames: Iterable[Union[bytes, memoryview]]
+        :return: A generator yielding the XID and the parsed response of each valid response as (xid, response).
+        :rtype: Iterator[Tuple[int, Union[Device, ResponseCode]]]
+        """
+        any_xid = AnyXID()
+        service_offset = ETHERNET_HEADER.size + 2  # after the frame id
+        try:
+            for frame in frames:
+                self.stats.record_received(len(frame))
+                set_request = len(frame) > service_offset and frame[service_offset] == ServiceID.SET
+                parsed_response = self._parse_raw_packet(frame, set_request, any_xid)
+                if parsed_response is not None:
+                    yield parsed_response
+        finally:
+            self._flush_device_cache()
+
+    def refresh_stats(self):
+        """
+        Add the number of packets received and dropped by the kernel since the last call to self.stats (Linux only,
+        the kernel resets its counters on each read).
+        :return: The statistics of this instance.
+        :rtype: DCPStats
+        """
+        raw_socket = getattr(self._socket, 'socket', None)
+        if raw_socket is not None and getattr(socket, 'AF_PACKET', None) == raw_socket.family:
+            try:
+                packets, drops = TPACKET_STATS.unpack(raw_socket.getsockopt(SOL_PACKET, PACKET_STATISTICS,
+                                                                            TPACKET_STATS.size))
+            except OSError as error:
+                logger.debug(f"Could not read the packet statistics of the socket: {error}")
+            else:
+                self.stats.kernel_packets += packets
+                self.stats.kernel_drops += drops
+        return self.stats
+
+    def reset_stats(self):
+        """Set all counters of self.stats to zero, including the kernel counters."""
+        self.refresh_stats()
+        self.stats.reset()
+
+    def close(self):
+        """Close the underlying L2 socket. The instance cannot send or receive requests afterwards."""
+        self._flush_device_cache()
+        if self.__owns_pcap_writer:
+            self.pcap_writer.close()
+        elif self.pcap_writer is not None:
+            self.pcap_writer.flush()
+        if self._ring is not None:
+            self._ring.close()
+        self._socket.close()
+
+    def _cached_devices(self, macs, aspect):
+        """
+        Get the devices whose requested aspect can be answered from the device cache, i.e. was updated at most
+        cache_max_age seconds ago.
+        :param macs: The mac addresses (as ':' separated strings).
+        :type macs: List[string]
+        :param aspect: The aspect requested: 'device', 'ip' or 'name' (see DeviceCache.get), None to bypass the cache.
+        :type aspect: Optional[string]
+        :return: The cached devices by mac address, empty if no cache or no maximum age is set.
+        :rtype: Dict[string, Device]
+        """
+        if self.device_cache is None or self.cache_max_age is None or aspect is None or not macs:
+            return {}
+        return self.device_cache.get(macs, self.cache_max_age, aspect)
+
+    def _update_device_cache(self, mac, parameters):
+        """
+        Update the cached device after a successful set request.
+        :param mac: The mac address of the device (as ':' separated string).
+        :type mac: string
+        :param parameters: The new values by field name or None to remove the device (e.g. after a reset).
+        :type parameters: Optional[Dict[string, Any]]
+        """
+        if self.device_cache is None:
+            return
+        if parameters is None:
+            self.device_cache.invalidate(mac)
+        else:
+            self.device_cache.update(mac, parameters)
+
+    def _flush_device_cache(self):
+        """Write the devices parsed since the last flush to the device cache."""
+        if self.device_cache is not None:
+            self.device_cache.flush()
+
+    @classmethod
+    def _plan_requests(cls, plan):
+        """
+        Validate the values of a reconfiguration plan and build the set requests for it.
+        :param plan: The new values by mac address, see reconfigure.
+        :type plan: Dict[string, Dict[string, string]]
+        :return: A result for each device of the plan by mac address and the set requests to send as (mac address,
+        option, value). Devices with invalid values get an error and no requests.
+        :rtype: Tuple[Dict[string, ReconfigurationResult], List[Tuple[string, Tuple[int, int], bytes]]]
+        """
+        results = {}
+        requests = []
+        for mac, values in plan.items():
+            requested = {name: value for name, value in values.items() if value not in (None, '')}
+            result = results[mac] = ReconfigurationResult(mac, requested)
+            ip_conf = [requested.get(name) for name in DeviceCache.IP_FIELDS]
+            name = requested.get('name_of_station')
+            try:
+                unknown = set(requested) - set(DeviceCache.IP_FIELDS) - {'name_of_station'}
+                if unknown:
+                    raise ValueError(f"Unknown fields {', '.join(sorted(unknown))}.")
+                if not requested:
+                    raise ValueError('No values to set.')
+                device_requests = []
+                if any(ip_conf):
+                    if not all(ip_conf):
+                        raise ValueError('IP, netmask and gateway must be set together.')
+                    device_requests.append((mac, Option.IP_ADDRESS, cls._ip_conf_value(ip_conf)))
+                if name is not None:
+                    device_requests.append((mac, Option.NAME_OF_STATION, cls._name_of_station_value(name)))
+                    # the name is sent lower-case, verify and cache the value the device will store
+                    requested['name_of_station'] = name.lower()
+            except (ValueError, TypeError) as error:
+                result.error = str(error)
+                continue
+            requests += device_requests
+        return results, requests
+
+    def _record_set_responses(self, results, responses):
+        """
+        Store the responses to the set requests of a reconfiguration in the results and update the device cache.
+        :param results: The results by mac address.
+        :type results: Dict[string, ReconfigurationResult]
+        :param responses: The response codes (None: no response) by (mac address, option).
+        :type responses: Dict[Tuple[string, Tuple[int, int]], Optional[ResponseCode]]
+        """
+        for (mac, option), response in responses.items():
+            result = results[mac]
+            result.responses[RECONFIGURATION_REQUESTS[option]] = response
+            if response:
+                fields = DeviceCache.IP_FIELDS if option == Option.IP_ADDRESS else ('name_of_station',)
+                self._update_device_cache(mac, {name: result.requested[name] for name in fields})
+
+    @staticmethod
+    def _record_read_backs(results, responses):
+        """
+        Store the values read back after a reconfiguration in the results.
+        :param results: The results by mac address.
+        :type results: Dict[string, ReconfigurationResult]
+        :param responses: The devices received (None: no response) by (mac address, option).
+        :type responses: Dict[Tuple[string, Tuple[int, int]], Optional[Device]]
+        """
+        for (mac, option), device in responses.items():
+            result = results[mac]
+            if result.observed is None:
+                result.observed = {}
+            if device is None:
+                continue
+            fields = DeviceCache.IP_FIELDS if option == Option.IP_ADDRESS else ('name_of_station',)
+            result.observed.update((name, getattr(device, name)) for name in fields)
+
+    @staticmethod
+    def _ip_conf_value(ip_conf):
+        """
+        Build the payload of a request to set the IP configuration.
+        :param ip_conf: list containing the values to set for the ip address, subnet mask, and router in that order.
+        :type ip_conf: List[string]
+        :return: The block qualifier followed by the packed ip addresses.
+        :rtype: bytes
+        """
+        # To pack the ip addresses, convert them to bytes and concat them
+        packed_ip_conf = b''.join([util.ip_address_to_bytes(ip_address) for ip_address in ip_conf])
+        return bytes(BlockQualifier.STORE_PERMANENT) + packed_ip_conf
+
+    @staticmethod
+    def _name_of_station_value(name):
+        """
+        Validate the given name of station and build the payload of a request to set it.
+        :param name: The new name to be set.
+        :type name: string
+        :return: The block qualifier followed by the lower-case name.
+        :rtype: bytes
+        """
+        valid_pattern = re.compile(r"^[a-z][a-zA-Z0-9\-.]*$")
+        if not re.match(valid_pattern, name):
+            raise ValueError('Name should correspond DNS standard. A string of invalid format provided.')
+        name = name.lower()
+        return bytes(BlockQualifier.STORE_PERMANENT) + bytes(name, encoding='ascii')
+
+    def _send_request(self, dst_mac, frame_id, service, option, suboption, value=None, response_delay=0):
         """
         Send a DCP request with the given option and sub-option and an optional payload (the given value)
         :param dst_mac: The mac address to send the to (as ':' separated string).
@@ -299,24 +2213,115 @@ class DCP:
         :type value: bytes
         :param response_delay: Used for multi-cast requests (eg. identify_all), must be 0 for all unicast-requests
         :type response_delay: int
+        :return: The XID of the sent request.
+        :rtype: int
         """
-        self.__xid += 1  # increment the XID wih each request (used to identify a transaction)
-
-        # Construct the DCPBlockRequest
-        block_content = bytes() if value is None else value
-        block = DCPBlockRequest(option, suboption, payload=block_content)
-
-        # Create DCP frame
-        service_type = ServiceType.REQUEST
-        dcp_packet = DCPPacket(frame_id, service, service_type, self.__xid, response_delay=response_delay, payload=block)
-
-        # Create ethernet frame
-        ethernet_packet = EthernetPacket(dst_mac, self.src_mac, dcp_constants.ETHER_TYPE, payload=dcp_packet)
-
-        # Send the request
-        self.__socket.send(bytes(ethernet_packet))
+        frame = self.__get_frame_template(frame_id, service, option, suboption, value, response_delay)
+        frame[:MAC_ADDRESS_LENGTH] = util.mac_address_to_bytes(dst_mac)
+        XID.pack_into(frame, XID_OFFSET, self.__next_xid())
+        self._send_frame(frame)
+        self.stats.record_sent((self.__xid,), time.perf_counter())
+        if self.pcap_writer is not None:
+            self.pcap_writer.write(frame)
+        return self.__xid
+
+    def _send_requests(self, dst_macs, frame_id, service, option, suboption, value=None, response_delay=0):
+        """
+        Send the same DCP request to each of the given mac addresses. On Linux, the frames are passed to the kernel with
+        a single sendmmsg call (per SENDMMSG_BATCH_SIZE frames) instead of one system call per frame.
+        :param dst_macs: The mac addresses to send the request to (as ':' separated strings).
+        :type dst_macs: List[string]
+        :param frame_id: The DCP frame ID.
+        :type frame_id: int
+        :param service: The DCP service ID.
+        :type service: int
+        :param option: The option of the DCP data block, see DCP specification for more infos.
+        :type option: int
+        :param suboption: The sub-option of the DCP data block, see DCP specification for more infos.
+        :type suboption: int
+        :param value: The DCP payload data to send, only used in 'set' functions
+        :type value: bytes
+        :param response_delay: Used for multi-cast requests (eg. identify_all), must be 0 for all unicast-requests
+        :type response_delay: int
+        :return: The XIDs of the sent requests, in the order of the given mac addresses.
+        :rtype: List[int]
+        """
+        if not dst_macs:
+            return []
+        template = self.__get_frame_template(frame_id, service, option, suboption, value, response_delay)
+        frame_length = len(template)
+        frames = template * len(dst_macs)
+        xids = []
+        for offset, dst_mac in zip(range(0, len(frames), frame_length), dst_macs):
+            frames[offset:offset + MAC_ADDRESS_LENGTH] = util.mac_address_to_bytes(dst_mac)
+            xid = self.__next_xid()
+            XID.pack_into(frames, offset + XID_OFFSET, xid)
+            xids.append(xid)
+
+        sent = 0
+        sent_time = time.perf_counter()
+        if type(self._socket) is L2LinuxSocket and get_sendmmsg() is not None:
+            try:
+                sent = send_frames(self._socket_fd, frames, frame_length)
+            except OSError as error:
+                logger.debug(f"sendmmsg failed, sending the remaining frames one by one: {error}")
+        view = memoryview(frames)
+        for offset in range(sent * frame_length, len(frames), frame_length):
+            self._send_frame(view[offset:offset + frame_length])
+        self.stats.record_sent(xids, sent_time)
+        if self.pcap_writer is not None:
+            for offset in range(0, len(frames), frame_length):
+                self.pcap_writer.write(view[offset:offset + frame_length])
+        return xids
+
+    def _send_frame(self, frame):
+        """
+        Send a complete ethernet frame. On Linux, the frame is written to the raw socket directly. For pcap (Windows),
+        the frame is passed to pcap_sendpacket directly, as the send method of the pcap wrapper first empties the
+        receive buffer, which delays each request and discards responses to requests sent before.
+        :param frame: The frame to send.
+        :type frame: Union[bytes, bytearray, memoryview]
+        """
+        l2_socket = self._socket
+        if type(l2_socket) is L2LinuxSocket:
+            l2_socket.socket.send(frame)
+        elif type(l2_socket) is L2PcapSocket:
+            frame = bytes(frame)
+            l2_socket.pcap.win_pcap.pcap_sendpacket(l2_socket.pcap.pcap, frame, len(frame))
+        else:
+            l2_socket.send(frame)
+
+    def __next_xid(self):
+        """
+        Advance to the XID of the next request (used to identify a transaction), wrapping around at 32 bit.
+        :return: The new XID.
+        :rtype: int
+        """
+        self.__xid = (self.__xid + 1) & 0xffffffff
+        return self.__xid
 
-    def __read_response(self, timeout=None, set_request=False):
+    def __get_frame_template(self, frame_id, service, option, suboption, value, response_delay):
+        """
+        Get the cached request frame with the given content, the frame is built on first use. The destination mac
+        address and the XID must be patched by the caller before sending it. The cache is cleared once it holds
+        FRAME_TEMPLATE_CACHE_SIZE frames.
+        :return: The request frame, modified in place by each request using it.
+        :rtype: bytearray
+        """
+        key = (frame_id, service, option, suboption, value, response_delay)
+        frame = self.__frame_templates.get(key)
+        if frame is None:
+            block_content = bytes() if value is None else value
+            block = DCPBlockRequest(option, suboption, payload=block_content)
+            dcp_packet = DCPPacket(frame_id, service, ServiceType.REQUEST, 0, response_delay=response_delay,
+                                   payload=block)
+            ethernet_packet = EthernetPacket(self.src_mac, self.src_mac, dcp_constants.ETHER_TYPE, payload=dcp_packet)
+            if len(self.__frame_templates) >= FRAME_TEMPLATE_CACHE_SIZE:
+                self.__frame_templates.clear()
+            frame = self.__frame_templates[key] = bytearray(bytes(ethernet_packet))
+        return frame
+
+    def __read_response(self, timeout=None, set_request=False, xids=None):
         """
         Receive packets and parse the response:
         - receive packets on the L2 socket addressed to the specified host mac address
@@ -330,132 +2335,1060 @@ class DCP:
         :param set_request: Whether this function was called inside a set-function. True enables error detection.
         Default: False
         :type set_request: boolean
+        :param xids: The XIDs of the requests to accept responses for. Default: only the XID of the latest request.
+        :type xids: Optional[Container[int]]
         :return: The received response (or None): a ResponseCode for set requests or a device.
         :rtype: Optional[Union[Device, ResponseCode]]
         """
         timeout = self.default_timeout if timeout is None else timeout
-        timed_out = time.time() + timeout
-        while time.time() < timed_out:
-            received_packet = self.__receive_packet()
+        deadline = time.monotonic() + timeout
+        remaining = timeout
+        while remaining > 0:
+            received_packet = self._receive_packet(remaining)
 
             if received_packet:
-                parsed_response = self.__parse_raw_packet(received_packet, set_request)
+                parsed_response = self._parse_raw_packet(received_packet, set_request, xids)
                 if parsed_response is not None:
-                    return parsed_response
+                    return parsed_response[1]
+            remaining = deadline - time.monotonic()
+        if xids is None:
+            self.stats.record_unanswered()  # a unicast request (identify all passes its XID and is never answered)
 
-    def __receive_packet(self):
+    def __read_responses(self, pending, timeout=None, set_request=False):
+        """
+        Receive packets and parse the responses to several outstanding requests:
+        - receive packets on the L2 socket addressed to the specified host mac address
+        - filter the packets to process only valid DCP responses to one of the pending requests (identified by XID)
+        - decode and parse these responses and assign each to the mac address its request was sent to
+        - repeat this until all pending requests are answered or the timeout occurs.
+        :param pending: The outstanding requests, mapping the XID of each request to the mac address it was sent to
+        (or any other key identifying the request, the responses are returned by this key).
+        :type pending: Dict[int, Hashable]
+        :param timeout: Timeout in seconds
+        :type timeout: float
+        :param set_request: Whether the pending requests are set requests. True enables error detection.
+        Default: False
+        :type set_request: boolean
+        :return: The received responses by mac address, None for each request that was not answered in time.
+        :rtype: Dict[string, Optional[Union[Device, ResponseCode]]]
         """
-        Receive a packet on the L2 socket addressed to the specified host mac address and convert it to bytes.
+        timeout = self.default_timeout if timeout is None else timeout
+        responses = dict.fromkeys(pending.values())
+        pending = dict(pending)
+        deadline = time.monotonic() + timeout
+        remaining = timeout
+        while pending and remaining > 0:
+            received_packet = self._receive_packet(remaining)
+
+            if received_packet:
+                parsed_response = self._parse_raw_packet(received_packet, set_request, pending)
+                if parsed_response is not None:
+                    xid, response = parsed_response
+                    responses[pending.pop(xid)] = response
+            remaining = deadline - time.monotonic()
+        self.stats.record_unanswered(len(pending))
+        self._flush_device_cache()
+        return responses
+
+    def _receive_packet(self, timeout=None):
+        """
+        Receive a packet on the L2 socket addressed to the specified host mac address.
+        If the socket provides a file descriptor, block in select until a packet arrives or the timeout expires instead
+        of polling the socket, so no CPU time is used while waiting. With a receive ring, the packet is taken from the
+        ring and is only valid until the next call.
         Might return None if no data is received.
-        :return: The received packet as bytes or None if no data was received.
-        :rtype: Optional[bytes]
+        :param timeout: The maximum time to wait for a packet in seconds. None waits until a packet arrives.
+        :type timeout: Optional[float]
+        :return: The received packet or None if no data was received.
+        :rtype: Optional[Union[bytes, memoryview]]
         """
-        received_packet = self.__socket.recv()
-        if received_packet is not None:
-            received_packet = bytes(received_packet)
+        start = time.perf_counter()
+        try:
+            if self._ring is not None:
+                received_packet = self._ring.receive(timeout)
+            else:
+                if self._socket_fd is not None:
+                    readable, _, _ = select.select([self._socket_fd], [], [], timeout)
+                    if not readable:
+                        return None
+                received_packet = self._socket.recv()
+        finally:
+            self.stats.wait_time += time.perf_counter() - start
+        if received_packet:
+            self.stats.record_received(len(received_packet))
+            if self.pcap_writer is not None:
+                self.pcap_writer.write(received_packet)
         return received_packet
 
-    def __parse_raw_packet(self, raw_packet, set_request):
+    def _parse_raw_packet(self, raw_packet, set_request, xids=None):
+        """
+        Validate and parse a dcp response from the received raw packet, see __parse_packet. Packets that cannot be
+        parsed are discarded. The time spent is added to self.stats.
+        :param raw_packet: The DCP response received by the socket.
+        :type raw_packet: bytes
+        :param set_request: Whether this function was called inside a set-function.
+        :type set_request: boolean
+        :param xids: The XIDs of the requests to accept responses for. Default: only the XID of the latest request.
+        :type xids: Optional[Container[int]]
+        :return: Valid response: the XID of the response and, if set request: return code, otherwise: Device object.
+        Invalid response: None
+        :rtype: Optional[Tuple[int, Union[ResponseCode, Device]]]
+        """
+        start = time.perf_counter()
+        try:
+            return self.__parse_packet(raw_packet, set_request, xids)
+        except (struct.error, ValueError, IndexError) as error:
+            logger.debug(f"Discarding malformed DCP response: {error}")
+            self.stats.record_parse_error(error)
+        finally:
+            self.stats.parse_time += time.perf_counter() - start
+
+    def __parse_packet(self, raw_packet, set_request, xids):
         """
         Validate and parse a dcp response from the received raw packet:
-        Parse the data as ethernet packet, check if it is a valid DCP response and convert it to a DCPPacket object.
-        Then, parse to DCP payload to extract and return the response value.
+        Unpack the ethernet and DCP headers directly from the packet and check if it is a valid DCP response.
+        Then, walk the DCP blocks in the payload by offset to extract and return the response value.
         If this the response to a set requests (i.e. the set_request parameter is True): the return code is extracted
         from the payload and returned.
         Otherwise: a Device object is constructed from the response which is then returned.
         If the response is invalid, None is returned.
+        The packet is only accessed through a memoryview, so no copies are made apart from the decoded field values.
         :param raw_packet: The DCP response received by the socket.
         :type raw_packet: bytes
         :param set_request: Whether this function was called inside a set-function.
         :type set_request: boolean
-        :return: Valid response: if set request: return code, otherwise: Device object. Invalid response: None
-        :rtype: Optional[Union[ResponseCode, Device]]
+        :param xids: The XIDs of the requests to accept responses for. Default: only the XID of the latest request.
+        :type xids: Optional[Container[int]]
+        :return: Valid response: the XID of the response and, if set request: return code, otherwise: Device object.
+        Invalid response: None
+        :rtype: Optional[Tuple[int, Union[ResponseCode, Device]]]
         """
-        # Parse the data as ethernet packet.
-        ethernet_packet = EthernetPacket(data=raw_packet)
-
-        # Check if the packet is a valid DCP response to the latest request and convert the ethernet payload to a
-        # DCPPacket object
-        dcp_packet = self.__parse_and_validate_dcp_packet(ethernet_packet)
+        packet = memoryview(raw_packet)
+        if len(packet) < DCP_PAYLOAD_OFFSET:
+            self.stats.record_rejected('short')
+            return
 
-        # return None immediately for invalid responses
-        if not dcp_packet:
+        # Check if the packet is a valid DCP response to the latest request (or one of the given XIDs): it must be
+        # addressed to this src_mac address, have the correct ether type, the service type for 'response' and the XID
+        destination, source, ether_type = ETHERNET_HEADER.unpack_from(packet)
+        _, service, service_type, xid, _, length = DCP_HEADER.unpack_from(packet, ETHERNET_HEADER.size)
+        xids = (self.__xid,) if xids is None else xids
+        if destination != self.__src_mac_bytes:
+            self.stats.record_rejected('destination')
+            return
+        if ether_type != dcp_constants.ETHER_TYPE:
+            self.stats.record_rejected('ether_type')
+            return
+        if service_type != ServiceType.RESPONSE:
+            self.stats.record_rejected('service_type')
+            return
+        if xid not in xids:
+            self.stats.record_rejected('xid')
             return
 
-        # parse the DCP blocks in the payload
-        dcp_blocks = dcp_packet.payload
+        offset = DCP_PAYLOAD_OFFSET
+        end = min(offset + length, len(packet))
 
         # If called inside a set request and the option of the response is 5 ('Control'):
-        # extract and return the return code
-        if set_request and dcp_blocks[0] == 5:
-            return ResponseCode(int(dcp_blocks[6]))
+        # extract and return the return code. Other responses with the same XID cannot answer a set request and are
+        # ignored, so that the caller keeps waiting for the control block.
+        if set_request:
+            if end - offset > 6 and packet[offset] == 5:
+                self.stats.record_response(xid)
+                return xid, ResponseCode(packet[offset + 6])
+            self.stats.record_rejected('no_control_block')
+            return
 
         # Otherwise, extract a device from the DCP payload
-        length = dcp_packet.length
         device = Device()
-        device.MAC = ethernet_packet.source
+        device.MAC = util.mac_address_to_string(source)
         # Process each DCP data block in the payload and modify the attributes of the device accordingly
-        while length > 6:
-            device, block_len = self.__process_block(dcp_blocks, device)
-            dcp_blocks = dcp_blocks[block_len + 4:]  # advance to the start of the next block
-            length -= 4 + block_len
+        for option, suboption, block_info, payload in iter_blocks(packet, offset, end):
+            decode_block(option, suboption, block_info, payload, device)
+
+        if self.device_cache is not None:
+            self.device_cache.put(device, complete=service == ServiceID.IDENTIFY)
+        self.stats.record_response(xid)
+        return xid, device
+
+
+class AsyncDCP(DCP):
+    """
+    asyncio variant of DCP: the requests are sent like with DCP, but instead of blocking until the response arrives,
+    the socket is registered with the running event loop (loop.add_reader) and each received response is dispatched to
+    the request waiting for its XID. All requests are coroutines with the same semantics and results as the
+    corresponding DCP methods, any number of them can be awaited concurrently on the same instance (e.g. with
+    asyncio.gather).
+    Requires a socket with a file descriptor, i.e. is only available on Linux.
+    """
+    # maximum number of packets received per call of the reader callback before yielding back to the event loop
+    MAX_PACKETS_PER_READ = 64
+
+    def __init__(self, ip, timeout=7, waiting_time=0, interface=None, interface_cache=None, l2_socket=None,
+                 device_cache=None, receive_ring=False, pcap_out=None):
+        """
+        Create a new instance, see DCP for a description of the parameters.
+        """
+        super().__init__(ip, timeout=timeout, waiting_time=waiting_time, interface=interface,
+                         interface_cache=interface_cache, l2_socket=l2_socket, device_cache=device_cache,
+                         receive_ring=receive_ring, pcap_out=pcap_out)
+        if self._socket_fd is None:
+            super().close()  # also closes the pcap file opened for pcap_out
+            raise DcpError('AsyncDCP requires a socket with a file descriptor, which pcap does not provide.')
+        # handlers of the outstanding requests by XID, separately for set requests and all other requests as the
+        # responses are parsed differently
+        self.__pending = {False: {}, True: {}}
+        self.__loop = None  # the event loop the socket is currently registered with
+
+    async def identify_all(self, timeout=None, idle_timeout=None):
+        """
+        Send multicast request to identify ALL devices in current network interface and get information about them.
+        See DCP.identify_all for a description of the timeouts.
+        :param timeout: Optional timeout in seconds. The default is defined in self.identify_all_timeout.
+        :type timeout: integer
+        :param idle_timeout: Optional idle gap in seconds to stop receiving early. Default: None (always wait for the
+        full timeout).
+        :type idle_timeout: float
+        :return: A list containing all devices found.
+        :rtype: List[Device]
+        """
+        return [device async for device in self.iter_identify_all(timeout=timeout, idle_timeout=idle_timeout)]
 
-        return device
+    async def iter_identify_all(self, timeout=None, idle_timeout=None):
+        """
+        Send multicast request to identify ALL devices in current network interface and yield each device as soon as
+        its response is received. See DCP.identify_all for a description of the timeouts.
+        :param timeout: Optional timeout in seconds. The default is defined in self.identify_all_timeout.
+        :type timeout: integer
+        :param idle_timeout: Optional idle gap in seconds to stop receiving early. Default: None (always wait for the
+        full timeout).
+        :type idle_timeout: float
+        :return: An asynchronous generator yielding all devices found.
+        :rtype: AsyncIterator[Device]
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        option, suboption = Option.ALL
+        response_delay = dcp_constants.RESPONSE_DELAY
+        responses = asyncio.Queue()
+        xid = self._send_request(dcp_constants.PROFINET_MULTICAST_MAC_IDENTIFY, FrameID.IDENTIFY_REQUEST,
+                                 ServiceID.IDENTIFY, option, suboption, response_delay=response_delay)
+        self.__add_pending(loop, xid, False, responses.put_nowait)
+        try:
+            timeout = self.identify_all_timeout if timeout is None else timeout
+            start = loop.time()
+            deadline = start + timeout
+            response_window_end = start + response_delay * RESPONSE_DELAY_UNIT
+            if idle_timeout is not None:
+                deadline = min(deadline, response_window_end + idle_timeout)
+            remaining = deadline - start
+            while remaining > 0:
+                try:
+                    device = await asyncio.wait_for(responses.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                yield device
+                if idle_timeout is not None:
+                    deadline = min(start + timeout, max(response_window_end, loop.time()) + idle_timeout)
+                remaining = deadline - loop.time()
+        finally:
+            self.__remove_pending(xid, False)
+
+    async def identify(self, mac):
+        """
+        Send a request to get information about specific device with the given mac address in the network interface.
+        :param mac: MAC-address of the device to identify (as ':' separated string)
+        :type mac: string
+        :return: The requested device.
+        :rtype: Device
+        """
+        cached = self._cached_devices([mac], 'device').get(mac)
+        if cached is not None:
+            return cached
+        option, suboption = Option.ALL
+        response = await self.__request(mac, FrameID.IDENTIFY_REQUEST, ServiceID.IDENTIFY, option, suboption,
+                                        response_delay=dcp_constants.RESPONSE_DELAY)
+        if not response:
+            logger.debug(f"Timeout: no answer from device with MAC {mac}")
+            raise DcpTimeoutError
+        return response
+
+    async def set_ip_address(self, mac, ip_conf):
+        """
+        Send a request to set or change the IP configuration of the device with the given mac address.
+        :param mac: mac address of the target device (as ':' separated string)
+        :type mac: string
+        :param ip_conf: list containing the values to set for the ip address, subnet mask, and router in that order.
+        :type ip_conf: List[string]
+        :return: The response code to the request. Evaluates to false if the request failed. Use get_message() to get
+        a human-readable response message.
+        :rtype: ResponseCode
+        """
+        option, suboption = Option.IP_ADDRESS
+        response = await self.__set(mac, option, suboption, self._ip_conf_value(ip_conf), 'set ip', settle=True)
+        if response:
+            self._update_device_cache(mac, dict(zip(DeviceCache.IP_FIELDS, ip_conf)))
+        return response
+
+    async def set_name_of_station(self, mac, name):
+        """
+        Send a request to set or change the name of station of the device with the given mac address.
+        :param mac: mac address of the target device (as ':' separated string)
+        :type mac: string
+        :param name: The new name to be set.
+        :type name: string
+        :return: The response code to the request. Evaluates to false if the request failed. Use get_message() to get
+        a human-readable response message.
+        :rtype: ResponseCode
+        """
+        option, suboption = Option.NAME_OF_STATION
+        response = await self.__set(mac, option, suboption, self._name_of_station_value(name), 'set name', settle=True)
+        if response:
+            self._update_device_cache(mac, {'name_of_station': name.lower()})
+        return response
+
+    async def get_ip_address(self, mac):
+        """
+        Send a request to get the IP address of the device with the given mac address.
+        :param mac: mac address of the target device (as ':' separated string)
+        :type mac: string
+        :return: The requested IP-address.
+        :rtype: string
+        """
+        cached = self._cached_devices([mac], 'ip').get(mac)
+        if cached is not None:
+            return cached.IP
+        option, suboption = Option.IP_ADDRESS
+        response = await self.__request(mac, FrameID.GET_SET, ServiceID.GET, option, suboption)
+        if not response:
+            logger.debug(f"Timeout: no answer from device with MAC {mac}")
+            raise DcpTimeoutError
+        return response.IP
+
+    async def get_name_of_station(self, mac):
+        """
+        Send a request to get the name of station of the device with the given mac address.
+        :param mac: mac address of the target device (as ':' separated string)
+        :type mac: string
+        :return: The requested name of station.
+        :rtype: string
+        """
+        cached = self._cached_devices([mac], 'name').get(mac)
+        if cached is not None:
+            return cached.name_of_station
+        option, suboption = Option.NAME_OF_STATION
+        response = await self.__request(mac, FrameID.GET_SET, ServiceID.GET, option, suboption)
+        if not response:
+            logger.debug(f"Timeout: no answer from device with MAC {mac}")
+            raise DcpTimeoutError
+        return response.name_of_station
+
+    async def identify_many(self, macs, timeout=None):
+        """
+        Send identify requests to all devices with the given mac addresses at once and collect the responses.
+        See DCP.identify_many.
+        :param macs: mac addresses of the target devices (as ':' separated strings)
+        :type macs: Iterable[string]
+        :param timeout: Optional timeout in seconds to wait for all responses. The default is defined in
+        self.default_timeout.
+        :type timeout: float
+        :return: A dict mapping each given mac address to the identified device, or to None if the device did not
+        respond before the timeout.
+        :rtype: Dict[string, Optional[Device]]
+        """
+        option, suboption = Option.ALL
+        return await self.__request_many(macs, timeout, 'device', FrameID.IDENTIFY_REQUEST, ServiceID.IDENTIFY,
+                                         option, suboption, response_delay=dcp_constants.RESPONSE_DELAY)
+
+    async def get_ip_addresses(self, macs, timeout=None):
+        """
+        Send requests to get the IP addresses of all devices with the given mac addresses at once and collect the
+        responses. See DCP.get_ip_addresses.
+        :param macs: mac addresses of the target devices (as ':' separated strings)
+        :type macs: Iterable[string]
+        :param timeout: Optional timeout in seconds to wait for all responses. The default is defined in
+        self.default_timeout.
+        :type timeout: float
+        :return: A dict mapping each given mac address to the requested IP-address, or to None if the device did not
+        respond before the timeout.
+        :rtype: Dict[string, Optional[string]]
+        """
+        option, suboption = Option.IP_ADDRESS
+        responses = await self.__request_many(macs, timeout, 'ip', FrameID.GET_SET, ServiceID.GET, option,
+                                              suboption)
+        return {mac: response.IP if response else None for mac, response in responses.items()}
+
+    async def get_names_of_station(self, macs, timeout=None):
+        """
+        Send requests to get the names of station of all devices with the given mac addresses at once and collect the
+        responses. See DCP.get_names_of_station.
+        :param macs: mac addresses of the target devices (as ':' separated strings)
+        :type macs: Iterable[string]
+        :param timeout: Optional timeout in seconds to wait for all responses. The default is defined in
+        self.default_timeout.
+        :type timeout: float
+        :return: A dict mapping each given mac address to the requested name of station, or to None if the device did
+        not respond before the timeout.
+        :rtype: Dict[string, Optional[string]]
+        """
+        option, suboption = Option.NAME_OF_STATION
+        responses = await self.__request_many(macs, timeout, 'name', FrameID.GET_SET, ServiceID.GET, option,
+                                              suboption)
+        return {mac: response.name_of_station if response else None for mac, response in responses.items()}
+
+    async def reconfigure(self, plan, timeout=None, verify=True):
+        """
+        Set the IP configuration and/or name of station of many devices at once and read back the new values. See
+        DCP.reconfigure.
+        :param plan: The new values by mac address (as ':' separated string), each a dict with the keys 'IP', 'netmask'
+        and 'gateway' (all three or none) and/or 'name_of_station'.
+        :type plan: Dict[string, Dict[string, string]]
+        :param timeout: Optional timeout in seconds to wait for all set responses, and again for all read-backs. The
+        default is defined in self.default_timeout.
+        :type timeout: float
+        :param verify: Whether to read back the new values. Default: True
+        :type verify: boolean
+        :return: The result for each device of the plan by mac address.
+        :rtype: Dict[string, ReconfigurationResult]
+        """
+        import asyncio
+        results, requests = self._plan_requests(plan)
+        timeout = self.default_timeout if timeout is None else timeout
+        tasks = {(mac, option): asyncio.ensure_future(self.__request(mac, FrameID.GET_SET, ServiceID.SET, option[0],
+                                                                     option[1], value, set_request=True))
+                 for mac, option, value in requests}
+        if tasks:
+            await asyncio.wait(tasks.values(), timeout=timeout)
+        responses = {}
+        for request, task in tasks.items():
+            if not task.done():
+                task.cancel()
+            responses[request] = task.result() if task.done() else None
+        self._record_set_responses(results, responses)
+
+        confirmed = [request for request, response in responses.items() if response]
+        if not verify or not confirmed:
+            return results
+        if self.waiting_time:
+            await asyncio.sleep(self.waiting_time)  # optional settle delay, once for all devices
+        options = list(RECONFIGURATION_REQUESTS)
+        # the read-backs bypass the device cache, which was just updated with the requested values
+        read_backs = await asyncio.gather(*(
+            self.__request_many([mac for mac, confirmed_option in confirmed if confirmed_option == option], timeout,
+                                None, FrameID.GET_SET, ServiceID.GET, option[0], option[1])
+            for option in options))
+        self._record_read_backs(results, {(mac, option): device for option, devices in zip(options, read_backs)
+                                          for mac, device in devices.items()})
+        return results
+
+    async def blink(self, mac):
+        """
+        Send a request to let the led of the device with the given mac address flash.
+        :param mac: mac address of the target device (as ':' separated string)
+        :type mac: string
+        :return: The response code to the request. Evaluates to false if the request failed. Use get_message() to get
+        a human-readable response message.
+        :rtype: ResponseCode
+        """
+        option, suboption = Option.BLINK_LED
+        value = bytes(BlockQualifier.RESERVED) + bytes(dcp_constants.LED_BLINK_VALUE)
+        return await self.__set(mac, option, suboption, value, 'LED flashing')
 
-    def __parse_and_validate_dcp_packet(self, ethernet_packet):
+    async def reset_to_factory(self, mac):
         """
-        Check and parse the given ethernet packet.
-        Check if the received packed is a valid DCP-response to the last request. That is: it is addressed to this
-        src_mac address, has the correct ether type, has the service type for 'response', and the XID of the last
-        request.
-        If the response is valid, return the ethernet payload as DCPPacket object. Otherwise, None is returned.
-        :param ethernet_packet: The ethernet packet to validate and parse.
-        :type ethernet_packet: EthernetPacket
-        :return: The ethernet payload as DCPPacket object if the response is valid, None otherwise.
-        :rtype: Optional[DCPPacket]
+        Send a request to reset the communication parameters of the device with the given mac address to its factory
+        settings.
+        :param mac: mac address of the target device (as ':' separated string)
+        :type mac: string
+        :return: The response code to the request. Evaluates to false if the request failed. Use get_message() to get
+        a human-readable response message.
+        :rtype: ResponseCode
         """
-        valid_ethernet = ethernet_packet.destination == self.src_mac \
-                         and ethernet_packet.ether_type == dcp_constants.ETHER_TYPE
+        option, suboption = Option.RESET_TO_FACTORY
+        value = bytes(BlockQualifier.RESET_COMMUNICATION)
+        response = await self.__set(mac, option, suboption, value, 'reset')
+        if response:
+            self._update_device_cache(mac, None)
+        return response
 
-        dcp_packet = DCPPacket(data=ethernet_packet.payload)
-        valid_dcp = dcp_packet.service_type == ServiceType.RESPONSE and dcp_packet.xid == self.__xid
+    def close(self):
+        """Unregister the socket from the event loop and close it."""
+        if self.__loop is not None:
+            self.__loop.remove_reader(self._socket_fd)
+            self.__loop = None
+        super().close()
 
-        return dcp_packet if valid_ethernet and valid_dcp else None
+    async def __set(self, mac, option, suboption, value, description, settle=False):
+        """
+        Send a set request and await the response code.
+        :param mac: mac address of the target device (as ':' separated string)
+        :type mac: string
+        :param option: The option of the DCP data block.
+        :type option: int
+        :param suboption: The sub-option of the DCP data block.
+        :type suboption: int
+        :param value: The DCP payload data to send.
+        :type value: bytes
+        :param description: Description of the request used in the log messages.
+        :type description: string
+        :param settle: Whether to wait for self.waiting_time after a successful response.
+        :type settle: boolean
+        :return: The response code to the request.
+        :rtype: ResponseCode
+        """
+        import asyncio
+        response = await self.__request(mac, FrameID.GET_SET, ServiceID.SET, option, suboption, value,
+                                        set_request=True)
+        if response is None:
+            logger.debug(f"Timeout: no answer from device with MAC {mac} to {description} request.")
+            raise DcpTimeoutError
+        elif not response:
+            logger.debug(f"{description} unsuccessful: {response.get_message()}")
+        elif settle and self.waiting_time:
+            await asyncio.sleep(self.waiting_time)  # optional settle delay, only after the device confirmed the set
+
+        return response
+
+    async def __request(self, mac, frame_id, service, option, suboption, value=None, response_delay=0,
+                        set_request=False):
+        """
+        Send a request and await the first response to it.
+        :return: The response (a ResponseCode for set requests or a device) or None if no response was received
+        before self.default_timeout.
+        :rtype: Optional[Union[Device, ResponseCode]]
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        response = loop.create_future()
+        xid = self._send_request(mac, frame_id, service, option, suboption, value, response_delay)
+        self.__add_pending(loop, xid, set_request, functools.partial(self.__resolve, response))
+        try:
+            return await asyncio.wait_for(response, self.default_timeout)
+        except asyncio.TimeoutError:
+            self.stats.record_unanswered()
+            return None
+        finally:
+            self.__remove_pending(xid, set_request)
+
+    async def __request_many(self, macs, timeout, aspect, frame_id, service, option, suboption, response_delay=0):
+        """
+        Send the same request to all given mac addresses at once and await the responses. Devices whose requested
+        aspect ('device', 'ip' or 'name') can be answered from the device cache are not sent a request.
+        :return: The received responses by mac address, None for each request that was not answered in time.
+        :rtype: Dict[string, Optional[Device]]
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        macs = list(dict.fromkeys(macs))
+        cached = self._cached_devices(macs, aspect)
+        missing = [mac for mac in macs if mac not in cached]
+        xids = self._send_requests(missing, frame_id, service, option, suboption, response_delay=response_delay)
+        futures = [loop.create_future() for _ in xids]
+        for xid, future in zip(xids, futures):
+            handler = functools.partial(self.__resolve, future)
+            self.__add_pending(loop, xid, False, handler)
+        timeout = self.default_timeout if timeout is None else timeout
+        try:
+            if futures:
+                await asyncio.wait(futures, timeout=timeout)
+        finally:
+            for xid in xids:
+                self.__remove_pending(xid, False)
+        responses = {mac: future.result() if future.done() else None for mac, future in zip(missing, futures)}
+        self.stats.record_unanswered(sum(1 for future in futures if not future.done()))
+        responses.update(cached)
+        return {mac: responses[mac] for mac in macs}
 
     @staticmethod
-    def __process_block(blocks, device):
-        """
-        Extract and parse the first DCP data block in the given payload data and fill the given Device object with the
-        extracted values.
-        :param blocks: The DCP payload to process. Must contain a valid DCP data block as prefix, all data after the
-        first complete block is ignored.
-        :type blocks: bytes
-        :param device: The Device object to be filled.
+    def __resolve(future, result):
+        """Set the result of the given future to the first response received."""
+        if not future.done():
+            future.set_result(result)
+
+    def __add_pending(self, loop, xid, set_request, handler):
+        """
+        Register the handler for the responses to the request with the given XID and make sure the socket is
+        registered with the event loop.
+        """
+        if self.__loop is not loop:
+            if self.__loop is not None:
+                self.__loop.remove_reader(self._socket_fd)
+            loop.add_reader(self._socket_fd, self.__on_readable)
+            self.__loop = loop
+        self.__pending[set_request][xid] = handler
+
+    def __remove_pending(self, xid, set_request):
+        """
+        Remove the handler of the request with the given XID. Once no request is outstanding, the socket is removed
+        from the event loop again, so packets arriving in between are not processed.
+        """
+        self.__pending[set_request].pop(xid, None)
+        if self.__loop is not None and not self.__pending[False] and not self.__pending[True]:
+            self.__loop.remove_reader(self._socket_fd)
+            self.__loop = None
+
+    def __on_readable(self):
+        """
+        Reader callback of the event loop: receive the available packets and pass each valid response to the handler
+        of the request with the matching XID. The devices parsed are written to the device cache once per call.
+        """
+        for _ in range(self.MAX_PACKETS_PER_READ):
+            start = time.perf_counter()
+            try:
+                # with a receive ring, all packets of the blocks handed over are read without waiting
+                received_packet = self._ring.receive(0) if self._ring is not None else self._socket.recv()
+            except OSError:
+                break
+            finally:
+                self.stats.wait_time += time.perf_counter() - start
+            if received_packet is None:
+                break
+            self.stats.record_received(len(received_packet))
+            if self.pcap_writer is not None:
+                self.pcap_writer.write(received_packet)
+            # the XID tells whether the packet can answer a set request, so each packet is parsed (and counted) once
+            xid = None
+            if len(received_packet) >= DCP_PAYLOAD_OFFSET:
+                xid, = XID.unpack_from(received_packet, XID_OFFSET)
+            set_request = xid in self.__pending[True]
+            handlers = self.__pending[set_request]
+            parsed_response = self._parse_raw_packet(received_packet, set_request, handlers)
+            if parsed_response is not None:
+                xid, response = parsed_response
+                handlers[xid](response)
+            if self._ring is None and not select.select([self._socket_fd], [], [], 0)[0]:
+                break
+        self._flush_device_cache()
+
+
+class MultiInterfaceDCP:
+    """
+    Discovery on several network interfaces at once: one DCP instance (and socket) is opened per interface, the
+    identify all request is sent on all of them at the same time and the responses are merged, so sweeping N networks
+    takes a single timeout instead of N. Each device found is tagged with the interface it responded on
+    (Device.interface). A device reachable on several interfaces is reported once per interface.
+    """
+
+    def __init__(self, interfaces=None, timeout=7, receive_ring=False):
+        """
+        Create a new instance, opening a socket on each of the given interfaces.
+        :param interfaces: Names of the network interfaces to use. Default: None (all interfaces that are up and have
+        an IPv4 address and a mac address, except loopback, see get_interfaces).
+        :type interfaces: Optional[Iterable[string]]
+        :param timeout: The default timeout for identify_all (in seconds).
+        :type timeout: integer
+        :param receive_ring: Whether to receive through a memory-mapped ring on each interface, see DCP.
+        Default: False
+        :type receive_ring: boolean
+        """
+        self.identify_all_timeout = timeout
+        interfaces = self.get_interfaces() if interfaces is None else list(interfaces)
+        if not interfaces:
+            raise ValueError("No network interface to use for discovery.")
+        self.instances = {}  # DCP instance by interface name
+        try:
+            for interface in interfaces:
+                # pcap (Windows) selects its device by ip, on Linux the interface name is sufficient
+                self.instances[interface] = DCP(self.__get_ipv4_address(interface), timeout=timeout,
+                                                interface=interface, receive_ring=receive_ring)
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def get_interfaces():
+        """
+        Get the names of all network interfaces that can be used for discovery: interfaces that are up and have an
+        IPv4 address and a mac address. Loopback interfaces are excluded.
+        :return: The names of the network interfaces.
+        :rtype: List[string]
+        """
+        interfaces = []
+        for network_interface, addresses in get_interface_addresses().items():
+            if not is_interface_up(network_interface):
+                continue
+            ipv4_addresses = [address.address for address in addresses if address.family == socket.AF_INET]
+            has_mac_address = any(address.family == AF_LINK for address in addresses)
+            if has_mac_address and ipv4_addresses and not ipaddress.ip_address(ipv4_addresses[0]).is_loopback:
+                interfaces.append(network_interface)
+        return interfaces
+
+    def identify_all(self, timeout=None, idle_timeout=None):
+        """
+        Send multicast requests to identify ALL devices on all network interfaces at once and get information about
+        them. See DCP.identify_all for a description of the timeouts, they apply to each interface independently.
+        :param timeout: Optional timeout in seconds. The default is defined in self.identify_all_timeout.
+        :type timeout: integer
+        :param idle_timeout: Optional idle gap in seconds to stop receiving early. Default: None (always wait for the
+        full timeout).
+        :type idle_timeout: float
+        :return: A list containing all devices found, tagged with their interface.
+        :rtype: List[Device]
+        """
+        return list(self.iter_identify_all(timeout=timeout, idle_timeout=idle_timeout))
+
+    def iter_identify_all(self, timeout=None, idle_timeout=None):
+        """
+        Send multicast requests to identify ALL devices on all network interfaces at once and yield each device as soon
+        as its response is received on any interface. See identify_all for a description of the parameters.
+        :return: A generator yielding all devices found, tagged with their interface.
+        :rtype: Iterator[Device]
+        """
+        import queue
+        timeout = self.identify_all_timeout if timeout is None else timeout
+        responses = queue.Queue()
+
+        # each interface is received on by its own thread, which waits in select and thereby releases the GIL
+        def receive(interface, instance):
+            try:
+                for device in instance.iter_identify_all(timeout=timeout, idle_timeout=idle_timeout):
+                    device.interface = interface
+                    responses.put(device)
+            except Exception as error:
+                logger.warning(f"Identify all failed on network interface {interface}: {error}")
+            finally:
+                responses.put(None)
+
+        for interface, instance in self.instances.items():
+            threading.Thread(target=receive, args=(interface, instance), daemon=True).start()
+
+        running = len(self.instances)
+        while running:
+            device = responses.get()
+            if device is None:
+                running -= 1
+            else:
+                yield device
+
+    def refresh_stats(self):
+        """
+        Sum up the statistics of all interfaces, see DCP.refresh_stats.
+        :return: New statistics holding the sum of the statistics of all interfaces.
+        :rtype: DCPStats
+        """
+        stats = DCPStats()
+        for instance in self.instances.values():
+            stats.add(instance.refresh_stats())
+        return stats
+
+    def reset_stats(self):
+        """Set all counters of the statistics of all interfaces to zero."""
+        for instance in self.instances.values():
+            instance.reset_stats()
+
+    def close(self):
+        """Close the sockets of all interfaces."""
+        for instance in self.instances.values():
+            instance.close()
+
+    @staticmethod
+    def __get_ipv4_address(network_interface):
+        """
+        Get the first IPv4 address of the network interface with the given name.
+        :param network_interface: The name of the network interface.
+        :type network_interface: string
+        :return: The IPv4 address or None if the interface has none.
+        :rtype: Optional[string]
+        """
+        addresses = get_interface_addresses().get(network_interface, [])
+        ipv4_addresses = [address.address for address in addresses if address.family == socket.AF_INET]
+        return ipv4_addresses[0] if ipv4_addresses else None
+
+
+class DeviceChange:
+    """
+    A change of a DeviceInventory: a new device, or a changed IP configuration or name of station of a known device.
+    """
+    NEW = 'new'
+    IP = 'ip'
+    NAME = 'name'
+    __slots__ = ('kind', 'device', 'previous', 'values', 'source')
+
+    def __init__(self, kind, device, previous=None, source=None):
+        """
+        Create a new change.
+        :param kind: The kind of change: DeviceChange.NEW, DeviceChange.IP or DeviceChange.NAME.
+        :type kind: string
+        :param device: The device in the inventory, which is updated further by later changes.
         :type device: Device
-        :return: The modified Device object and the length of the processed DCP data block
-        :rtype: Device, int
+        :param previous: The previous values of the changed fields by field name, None for new devices. The new values
+        are stored in values, as the device may change again.
+        :type previous: Optional[Dict[string, Any]]
+        :param source: The DCP service the change was observed in: 'identify', 'hello', 'get' or 'set'.
+        :type source: Optional[string]
+        """
+        self.kind = kind
+        self.device = device
+        self.previous = previous
+        self.values = None if previous is None else {name: getattr(device, name) for name in previous}
+        self.source = source
+
+    def to_dict(self):
+        """
+        Return this change as dict, e.g. to serialize it as JSON.
+        :return: The kind, source, previous and new values of the change and the parameters of the device.
+        :rtype: Dict[string, Any]
+        """
+        return dict(change=self.kind, source=self.source, previous=self.previous, values=self.values,
+                    device=self.device.to_dict())
+
+    def __str__(self):
+        """
+        Return a human-readable description of the change.
+        :return: String representation of this change.
+        :rtype: string
+        """
+        if self.kind == self.NEW:
+            return f"new device: {self.device}"
+        changes = ', '.join(f'{name} {self.previous[name]!r} -> {value!r}' for name, value in self.values.items())
+        return f"{self.kind} changed for {self.device.MAC}: {changes}"
+
+
+class DeviceInventory:
+    """
+    Devices by mac address, updated incrementally from observed DCP traffic. Each update returns only the changes it
+    caused, so repeated observations of an unchanged device produce no output.
+    """
+    # fields reported as DeviceChange.IP when changed
+    IP_FIELDS = ('IP', 'netmask', 'gateway')
+
+    def __init__(self):
+        """Create an empty inventory."""
+        self.devices = {}  # Device by mac address
+        self.last_seen = {}  # time.monotonic() of the latest observation by mac address
+
+    def __len__(self):
+        """
+        Get the number of devices in the inventory.
+        :return: The number of devices.
+        :rtype: int
         """
-        # Extract the first DCPBlock from the given payload.
-        # Other blocks may follow after the first, they are ignored by this method.
-        block = DCPBlock(data=blocks)
+        return len(self.devices)
 
-        # use the option and sub-option to determine which value is encoded in the current block
-        # then, extract the value accordingly, decode it and set the corresponding attribute of the device
-        block_option = (block.opt, block.subopt)
-        if block_option == Option.NAME_OF_STATION:
-            device.name_of_station = block.payload.rstrip(b'\x00').decode()
-        elif block_option == Option.IP_ADDRESS:
-            device.IP = util.ip_address_to_string(block.payload[0:4])
-            device.netmask = util.ip_address_to_string(block.payload[4:8])
-            device.gateway = util.ip_address_to_string(block.payload[8:12])
-        elif block_option == Option.DEVICE_FAMILY:
-            device.family = block.payload.rstrip(b'\x00').decode()
+    def __iter__(self):
+        """
+        Iterate over the devices in the inventory.
+        :return: An iterator over the devices.
+        :rtype: Iterator[Device]
+        """
+        return iter(self.devices.values())
 
-        # round up the block length to the next even number
-        block_len = block.length + (block.length % 2)
+    def get(self, mac):
+        """
+        Get the device with the given mac address.
+        :param mac: The mac address (as ':' separated string).
+        :type mac: string
+        :return: The device or None if it is unknown.
+        :rtype: Optional[Device]
+        """
+        return self.devices.get(mac)
 
-        # Return the modified device and the length of the processed block
-        return device, block_len
+    def observe(self, device, source=None, complete=True):
+        """
+        Update the inventory with a device observed in a DCP packet.
+        :param device: The observed device.
+        :type device: Device
+        :param source: The DCP service the device was observed in.
+        :type source: Optional[string]
+        :param complete: Whether the device was decoded from a full description (identify response, hello request), in
+        which case empty basic fields are taken over as well. Otherwise (get response) only the fields set are updated.
+        :type complete: boolean
+        :return: The changes caused by the observation.
+        :rtype: List[DeviceChange]
+        """
+        fields = {name: getattr(device, name) for name in Device.FIELDS
+                  if name != 'MAC' and (complete and name in Device.BASIC_FIELDS
+                                        or getattr(device, name) not in ('', None))}
+        return self.update(device.MAC, fields, source)
+
+    def update(self, mac, fields, source=None):
+        """
+        Set the given fields of the device with the given mac address, the device is added if it is unknown.
+        :param mac: The mac address (as ':' separated string).
+        :type mac: string
+        :param fields: The new values by field name (see Device.FIELDS).
+        :type fields: Dict[string, Any]
+        :param source: The DCP service the values were observed in.
+        :type source: Optional[string]
+        :return: The changes caused by the update.
+        :rtype: List[DeviceChange]
+        """
+        self.last_seen[mac] = time.monotonic()
+        device = self.devices.get(mac)
+        if device is None:
+            device = Device()
+            device.MAC = mac
+            for name, value in fields.items():
+                setattr(device, name, value)
+            self.devices[mac] = device
+            return [DeviceChange(DeviceChange.NEW, device, source=source)]
+
+        previous = {name: getattr(device, name) for name, value in fields.items() if getattr(device, name) != value}
+        for name in previous:
+            setattr(device, name, fields[name])
+        changes = []
+        ip_change = {name: previous[name] for name in self.IP_FIELDS if name in previous}
+        if ip_change:
+            changes.append(DeviceChange(DeviceChange.IP, device, ip_change, source))
+        if 'name_of_station' in previous:
+            changes.append(DeviceChange(DeviceChange.NAME, device, {'name_of_station': previous['name_of_station']},
+                                        source))
+        return changes
+
+
+class DCPMonitor(DCP):
+    """
+    Passive monitor of all DCP traffic on a network interface: identify and get responses (also to other controllers),
+    hello requests and confirmed set requests update an inventory of the devices, and only the resulting changes (new
+    device, changed IP configuration or name of station) are reported. The monitor uses its own socket, which is not
+    restricted to packets addressed to this host. On Linux, the interface is put into promiscuous mode and joins the
+    DCP multicast groups while the socket is open.
+    """
+    # BPF filter of the socket (pcap only): all DCP packets
+    SOCKET_FILTER = "ether proto {ether_type}"
+
+    def __init__(self, ip, interface=None, interface_cache=None, l2_socket=None, promiscuous=True, pcap_out=None):
+        """
+        Create a new monitor, use the given ip to select the network interface.
+        :param ip: The ip address used to select the network interface. Not required on Linux if the interface is
+        given explicitly.
+        :type ip: string
+        :param interface: Optional name of the network interface to use, skips selecting the interface by ip.
+        :type interface: Optional[string]
+        :param interface_cache: Optional cache for the network interface and mac address resolved from the ip.
+        :type interface_cache: Optional[InterfaceCache]
+        :param l2_socket: Optional socket to use instead of opening one on the network interface (see DCP).
+        :type l2_socket: Optional[Any]
+        :param promiscuous: Whether to receive unicast packets between other hosts as well (Linux only). Without it,
+        only multicast packets and packets to and from this host are received.
+        :type promiscuous: boolean
+        :param pcap_out: Optional path of a pcap file (or a PcapWriter) to record all DCP packets received to (see DCP).
+        :type pcap_out: Optional[Union[string, PcapWriter]]
+        """
+        super().__init__(ip, interface=interface, interface_cache=interface_cache, l2_socket=l2_socket,
+                         pcap_out=pcap_out)
+        self.inventory = DeviceInventory()
+        # the values of set requests by (target mac address, XID), applied once the target confirms them
+        self.__pending_sets = collections.OrderedDict()
+        if type(self._socket) is L2LinuxSocket:
+            self.__add_memberships(promiscuous)
+
+    def __add_memberships(self, promiscuous):
+        """
+        Join the DCP multicast groups and, if requested, enable promiscuous mode on the interface of the socket. The
+        memberships are dropped by the kernel when the socket is closed.
+        """
+        raw_socket = self._socket.socket
+        interface_index = socket.if_nametoindex(raw_socket.getsockname()[0])
+        memberships = [(PACKET_MR_MULTICAST, dcp_constants.PROFINET_MULTICAST_MAC_IDENTIFY),
+                       (PACKET_MR_MULTICAST, PROFINET_MULTICAST_MAC_HELLO)]
+        if promiscuous:
+            memberships.append((PACKET_MR_PROMISC, None))
+        for membership_type, mac in memberships:
+            address = b'' if mac is None else util.mac_address_to_bytes(mac)
+            request = PACKET_MREQ.pack(interface_index, membership_type, len(address), address)
+            try:
+                raw_socket.setsockopt(SOL_PACKET, PACKET_ADD_MEMBERSHIP, request)
+            except OSError as error:
+                logger.warning(f"Could not add packet membership {membership_type} {mac or ''}: {error}")
+
+    def probe(self):
+        """
+        Send an identify all request without waiting for the responses, they are processed by watch like all other
+        packets. This fills the inventory with all devices at once instead of waiting for them to be observed.
+        """
+        option, suboption = Option.ALL
+        self._send_request(dcp_constants.PROFINET_MULTICAST_MAC_IDENTIFY, FrameID.IDENTIFY_REQUEST,
+                           ServiceID.IDENTIFY, option, suboption, response_delay=dcp_constants.RESPONSE_DELAY)
+
+    def watch(self, duration=None):
+        """
+        Receive and process DCP packets and yield the changes of the inventory.
+        :param duration: Optional time in seconds to monitor. Default: None (monitor until the generator is closed).
+        :type duration: Optional[float]
+        :return: A generator yielding the changes of the inventory.
+        :rtype: Iterator[DeviceChange]
+        """
+        deadline = None if duration is None else time.monotonic() + duration
+        while True:
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    return
+            received_packet = self._receive_packet(timeout)
+            if received_packet is not None:
+                yield from self.process_packet(received_packet)
+
+    def process_packet(self, raw_packet):
+        """
+        Update the inventory from a DCP packet.
+        :param raw_packet: The raw packet.
+        :type raw_packet: bytes
+        :return: The changes of the inventory caused by the packet.
+        :rtype: List[DeviceChange]
+        """
+        packet = memoryview(raw_packet)
+        if len(packet) < DCP_PAYLOAD_OFFSET:
+            return []
+        destination, source, ether_type = ETHERNET_HEADER.unpack_from(packet)
+        _, service, service_type, xid, _, length = DCP_HEADER.unpack_from(packet, ETHERNET_HEADER.size)
+        if ether_type != dcp_constants.ETHER_TYPE:
+            return []
+        blocks = iter_blocks(packet, DCP_PAYLOAD_OFFSET, min(DCP_PAYLOAD_OFFSET + length, len(packet)))
+
+        if service_type == ServiceType.RESPONSE:
+            if service == ServiceID.IDENTIFY:
+                return self.__observe(source, blocks, 'identify', complete=True)
+            if service == ServiceID.GET:
+                return self.__observe(source, blocks, 'get', complete=False)
+            if service == ServiceID.SET:
+                return self.__confirm_set(source, xid, blocks)
+        elif service_type == ServiceType.REQUEST:
+            if service == SERVICE_ID_HELLO:
+                return self.__observe(source, blocks, 'hello', complete=True)
+            if service == ServiceID.SET:
+                self.__record_set(destination, xid, blocks)
+        return []
+
+    def __observe(self, source, blocks, service, complete):
+        """Decode a device from the blocks of an identify response, get response or hello request."""
+        device = Device()
+        device.MAC = util.mac_address_to_string(source)
+        for option, suboption, block_info, payload in blocks:
+            decode_block(option, suboption, block_info, payload, device)
+        return self.inventory.observe(device, service, complete)
+
+    def __record_set(self, destination, xid, blocks):
+        """Remember the new IP configuration or name of station of a set request until the device confirms it."""
+        values = {}
+        for option, suboption, _, payload in blocks:
+            device = Device()
+            if (option, suboption) == Option.IP_ADDRESS and len(payload) >= 12:
+                decode_ip_parameter(device, payload)
+                values[option, suboption] = {name: getattr(device, name) for name in DeviceInventory.IP_FIELDS}
+            elif (option, suboption) == Option.NAME_OF_STATION:
+                decode_name_of_station(device, payload)
+                values[option, suboption] = {'name_of_station': device.name_of_station}
+        if values:
+            self.__pending_sets[bytes(destination), xid] = values
+            if len(self.__pending_sets) > MONITOR_PENDING_SETS:
+                self.__pending_sets.popitem(last=False)
+
+    def __confirm_set(self, source, xid, blocks):
+        """Apply the values of a set request whose response reports success for them (control block, no error)."""
+        values = self.__pending_sets.pop((bytes(source), xid), None)
+        if values is None:
+            return []
+        fields = {}
+        for option, suboption, block_info, payload in blocks:
+            # the response block holds the option and suboption it responds to in place of the block status,
+            # followed by the error code
+            if option == 5 and len(payload) >= 1 and payload[0] == 0:
+                fields.update(values.get((block_info >> 8, block_info & 0xff), {}))
+        if not fields:
+            return []
+        return self.inventory.update(util.mac_address_to_string(source), fields, 'set')
 
 
 class ResponseCode:
@@ -471,7 +3404,8 @@ class ResponseCode:
     def __init__(self, code):
         """
         Create a new ResponseCode object with the given response code.
-        :param code: The response code, expects an int from the inclusive range [0, 6].
+        :param code: The response code, defined for the inclusive range [0, 6]. Other codes received from a device are
+        kept and reported as unknown error.
         :type code: int
         """
         self.code = code
@@ -482,7 +3416,10 @@ class ResponseCode:
         :return: The associated response message.
         :rtype: string
         """
-        return self.__MESSAGES[self.code]
+        message = self.__MESSAGES.get(self.code)
+        if message is None:
+            return f'Code {self.code:02d}: Unknown error (code {self.code})'
+        return message
 
     def __bool__(self):
         """
@@ -0,0 +1,72 @@
+"""
+Fixtures driving the modified pnio_dcp library (src/pnio_dcp.py) through the in-memory transport of the DCP simulator
+(src/dcp_simulator.py), so the tests need neither network interfaces nor root privileges.
+
+The pnio_dcp package must be installed, since src/pnio_dcp.py imports its constants, protocol and socket helpers.
+"""
+import importlib.util
+import os
+import struct
+import sys
+
+import pytest
+
+pytest.importorskip('pnio_dcp')
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+# appended, so the installed pnio_dcp package takes precedence over the modified pnio_dcp.py next to the simulator
+sys.path.append(SRC_DIR)
+
+import dcp_simulator  # noqa: E402
+
+
+def load_pnio_dcp():
+    """
+    Load src/pnio_dcp.py under a separate module name, next to the installed pnio_dcp package.
+    :return: The loaded module.
+    :rtype: module
+    """
+    spec = importlib.util.spec_from_file_location('pnio_dcp_under_test', os.path.join(SRC_DIR, 'pnio_dcp.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+PNIO_DCP = load_pnio_dcp()
+
+
+@pytest.fixture
+def pnio_dcp():
+    """The modified pnio_dcp module."""
+    return PNIO_DCP
+
+
+@pytest.fixture
+def simulator():
+    """A simulator with three stations, 02:00:00:00:00:01 (station-1, 192.168.0.1) to 02:00:00:00:00:03."""
+    return dcp_simulator.Simulator.with_stations(3, seed=1)
+
+
+@pytest.fixture
+def dcp(pnio_dcp, simulator):
+    """A DCP instance connected to the simulator, with a timeout of 1s for all requests."""
+    instance = pnio_dcp.DCP(None, timeout=1, l2_socket=dcp_simulator.SimulatedSocket(simulator))
+    yield instance
+    instance.close()
+
+
+@pytest.fixture
+def response_frame(dcp):
+    """
+    Build a DCP response to the given DCP instance from packed blocks (see dcp_simulator.pack_block).
+    Keyword arguments override the XID (default: the XID of the latest request), the frame ID, the service type, the
+    ether type, the destination and the source mac address.
+    """
+    def build(blocks, xid=None, frame_id=0xfeff, service=5, service_type=1, ether_type=0x8892, destination=None,
+              source='02:00:00:00:00:01'):
+        destination = dcp_simulator.mac_address_to_bytes(destination or dcp.src_mac)
+        xid = dcp._DCP__xid if xid is None else xid
+        header = struct.pack('>HBBIHH', frame_id, service, service_type, xid, 0, len(blocks))
+        return (destination + dcp_simulator.mac_address_to_bytes(source) + struct.pack('>H', ether_type) + header
+                + blocks)
+    return build
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import struct
+
+import pytest
+
+from dcp_simulator import SimulatedSocket, pack_block
+
+MAC = '02:00:00:00:00:01'
+UNKNOWN_MAC = '02:00:00:00:00:99'
+# the simulated stations spread their identify responses over the requested response delay (1.28s)
+IDENTIFY_ALL_TIMEOUT = 1.5
+
+
+def test_identify_all_finds_all_stations(dcp):
+    devices = dcp.identify_all(IDENTIFY_ALL_TIMEOUT)
+    assert sorted((device.MAC, device.name_of_station, device.IP) for device in devices) == [
+        ('02:00:00:00:00:01', 'station-1', '192.168.0.1'),
+        ('02:00:00:00:00:02', 'station-2', '192.168.0.2'),
+        ('02:00:00:00:00:03', 'station-3', '192.168.0.3'),
+    ]
+
+
+def test_set_and_get(dcp):
+    assert dcp.set_name_of_station(MAC, 'plc-1')
+    assert dcp.get_name_of_station(MAC) == 'plc-1'
+    assert dcp.set_ip_address(MAC, ['10.0.0.5', '255.0.0.0', '10.0.0.1'])
+    assert dcp.get_ip_address(MAC) == '10.0.0.5'
+    device = dcp.identify(MAC)
+    assert (device.name_of_station, device.IP, device.netmask, device.gateway) == \
+        ('plc-1', '10.0.0.5', '255.0.0.0', '10.0.0.1')
+
+
+def test_batch_requests(dcp):
+    macs = ['02:00:00:00:00:01', '02:00:00:00:00:03', UNKNOWN_MAC]
+    assert dcp.get_names_of_station(macs, timeout=0.3) == {
+        '02:00:00:00:00:01': 'station-1', '02:00:00:00:00:03': 'station-3', UNKNOWN_MAC: None}
+
+
+def test_invalid_name_is_rejected_before_sending(dcp, simulator):
+    with pytest.raises(ValueError):
+        dcp.set_name_of_station(MAC, '1-invalid name')
+    assert simulator.requests == 0
+
+
+def test_request_without_response_times_out(pnio_dcp, dcp):
+    dcp.default_timeout = 0.2
+    with pytest.raises(pnio_dcp.DcpTimeoutError):
+        dcp.get_ip_address(UNKNOWN_MAC)
+
+
+def test_parse_every_block_type(dcp, response_frame):
+    blocks = b''.join([
+        pack_block((1, 1), bytes.fromhex('020000000001'), 0),
+        pack_block((1, 2), bytes([192, 168, 0, 1, 255, 255, 255, 0, 192, 168, 0, 254]), 1),
+        pack_block((1, 3), bytes([192, 168, 0, 1, 255, 255, 255, 0, 192, 168, 0, 254, 8, 8, 8, 8, 1, 1, 1, 1]), 1),
+        pack_block((2, 1), b'S7-1500', 0),
+        pack_block((2, 2), b'plc-1', 0),
+        pack_block((2, 3), struct.pack('>HH', 0x002a, 0x010e), 0),
+        pack_block((2, 4), bytes([0x02, 0x00]), 0),
+        pack_block((2, 5), bytes([1, 1, 1, 2, 2, 2]), 0),
+        pack_block((2, 6), b'port-001.plc-1', 0),
+        pack_block((2, 7), bytes([0, 100]), 0),
+        pack_block((2, 8), struct.pack('>HH', 0x0001, 0x0002), 0),
+        pack_block((2, 9), struct.pack('>H', 1), 0),
+        pack_block((2, 10), struct.pack('>H', 0x0003), 0),
+        pack_block((3, 12), b'plc-host', 0),
+        pack_block((3, 61), bytes([1, 2, 3]), 0),
+        pack_block((6, 1), struct.pack('>H', 1), 0),
+        pack_block((7, 1), b'unknown option, skipped', 0),
+    ])
+    _, device = dcp._parse_raw_packet(response_frame(blocks), False)
+    assert device.MAC == '02:00:00:00:00:01'
+    assert (device.IP, device.netmask, device.gateway) == ('192.168.0.1', '255.255.255.0', '192.168.0.254')
+    assert device.ip_block_info == 1
+    assert device.dns_servers == ('8.8.8.8', '1.1.1.1')
+    assert device.family == 'S7-1500'
+    assert device.name_of_station == 'plc-1'
+    assert (device.vendor_id, device.device_id) == (0x002a, 0x010e)
+    assert device.device_role == 0x02
+    assert device.device_options == ((1, 1), (1, 2), (2, 2))
+    assert device.alias_name == 'port-001.plc-1'
+    assert device.device_instance == (0, 100)
+    assert (device.oem_vendor_id, device.oem_device_id) == (1, 2)
+    assert device.standard_gateway == 1
+    assert device.rsi_properties == 3
+    assert device.dhcp == {12: 'plc-host', 61: '010203'}
+    assert device.device_initiative == 1
+
+
+def test_odd_block_lengths_are_padded(dcp, response_frame):
+    blocks = pack_block((2, 2), b'odd', 0) + pack_block((2, 1), b'S7-300', 0)
+    _, device = dcp._parse_raw_packet(response_frame(blocks), False)
+    assert (device.name_of_station, device.family) == ('odd', 'S7-300')
+
+
+def test_responses_to_other_requests_are_rejected(dcp, response_frame):
+    xid = dcp._DCP__xid
+    blocks = pack_block((2, 2), b'plc-1', 0)
+    assert dcp._parse_raw_packet(response_frame(blocks, xid=xid + 1), False) is None
+    assert dcp._parse_raw_packet(response_frame(blocks, xid=xid + 1), False, xids={xid + 1})[0] == xid + 1
+    assert dcp._parse_raw_packet(response_frame(blocks, destination='02:00:00:00:00:42'), False) is None
+    assert dcp._parse_raw_packet(response_frame(blocks, ether_type=0x0800), False) is None
+    assert dcp._parse_raw_packet(response_frame(blocks, service_type=0), False) is None
+
+
+def test_truncated_frames_are_ignored(dcp, response_frame):
+    frame = response_frame(pack_block((2, 2), b'plc-1', 0) + pack_block((1, 2), bytes(12), 0))
+    for length in range(len(frame)):
+        result = dcp._parse_raw_packet(frame[:length], False)
+        assert result is None or result[1].MAC == '02:00:00:00:00:01'
+    # a block length beyond the end of the frame only yields the bytes received
+    blocks = struct.pack('>BBHH', 2, 2, 200, 0) + b'plc-1'
+    _, device = dcp._parse_raw_packet(response_frame(blocks), False)
+    assert device.name_of_station == 'plc-1'
+    # blocks too short for their option are skipped
+    _, device = dcp._parse_raw_packet(response_frame(pack_block((1, 2), bytes(4), 0)), False)
+    assert device.IP == ''
+
+
+def test_set_responses(dcp, response_frame):
+    control = pack_block((5, 4), bytes([2, 2, 0]))
+    assert dcp._parse_raw_packet(response_frame(control, frame_id=0xfefd, service=4), True)[1]
+    # unknown error codes are reported instead of raising
+    _, code = dcp._parse_raw_packet(response_frame(pack_block((5, 4), bytes([2, 2, 9])), service=4), True)
+    assert not code
+    assert 'code 9' in code.get_message()
+    # a set request only accepts the control block
+    assert dcp._parse_raw_packet(response_frame(pack_block((2, 2), b'plc-1', 0)), True) is None
+    assert dcp._parse_raw_packet(response_frame(pack_block((5, 4), b'')[:4]), True) is None
+
+
+def test_async_requests_share_the_socket(pnio_dcp, simulator):
+    async def run():
+        instance = pnio_dcp.AsyncDCP(None, timeout=1, l2_socket=SimulatedSocket(simulator))
+        try:
+            names = await asyncio.gather(*(instance.get_name_of_station(f'02:00:00:00:00:0{index}')
+                                           for index in (1, 2, 3)))
+            assert await instance.set_name_of_station(MAC, 'plc-1')
+            devices = await instance.identify_all(IDENTIFY_ALL_TIMEOUT)
+            return names, devices
+        finally:
+            instance.close()
+
+    names, devices = asyncio.run(run())
+    assert names == ['station-1', 'station-2', 'station-3']
+    assert sorted(device.name_of_station for device in devices) == ['plc-1', 'station-2', 'station-3']
+
+
+def test_interface_cache_expires(pnio_dcp, tmp_path, monkeypatch):
+    cache = pnio_dcp.InterfaceCache(str(tmp_path / 'cache' / 'interfaces.json'), ttl=300)
+    now = 1000.0
+    monkeypatch.setattr(pnio_dcp.time, 'time', lambda: now)
+    cache.put('192.168.0.10', '02:00:00:00:00:fe', 'eth1')
+    assert cache.get('192.168.0.10') == ('02:00:00:00:00:fe', 'eth1')
+    assert cache.get('192.168.0.11') is None
+    now += 301
+    assert cache.get('192.168.0.10') is None
+    cache.put('192.168.0.10', '02:00:00:00:00:fe', 'eth1')
+    cache.invalidate('192.168.0.10')
+    assert cache.get('192.168.0.10') is None
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='file ownership is not checked on this platform')
+def test_interface_cache_writable_by_others_is_ignored(pnio_dcp, tmp_path):
+    directory = tmp_path / 'cache'
+    path = directory / 'interfaces.json'
+    cache = pnio_dcp.InterfaceCache(str(path))
+    cache.put('192.168.0.10', '02:00:00:00:00:fe', 'eth1')
+    assert directory.stat().st_mode & 0o777 == 0o700
+
+    # an entry planted by another user is neither used nor overwritten
+    path.write_text(json.dumps({'192.168.0.10': {'mac': '02:00:00:00:00:66', 'interface': 'eth9', 'time': 1e12}}))
+    path.chmod(0o666)
+    assert cache.get('192.168.0.10') is None
+    cache.put('192.168.0.10', '02:00:00:00:00:fe', 'eth1')
+    assert '02:00:00:00:00:66' in path.read_text()
+
+    path.chmod(0o600)
+    directory.chmod(0o777)
+    assert cache.get('192.168.0.10') is None
+    directory.chmod(0o700)
+    assert cache.get('192.168.0.10') == ('02:00:00:00:00:66', 'eth9')
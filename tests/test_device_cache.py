@@ -0,0 +1,102 @@
+import os
+import threading
+
+import pytest
+
+from dcp_simulator import SimulatedSocket
+
+MAC = '02:00:00:00:00:01'
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'cache' / 'devices.sqlite')
+
+
+@pytest.fixture
+def cached_dcp(pnio_dcp, simulator, cache_path):
+    """A DCP instance connected to the simulator that answers from the device cache within 60s."""
+    cache = pnio_dcp.DeviceCache(cache_path)
+    instance = pnio_dcp.DCP(None, timeout=1, l2_socket=SimulatedSocket(simulator), device_cache=cache)
+    instance.cache_max_age = 60
+    yield instance
+    instance.close()
+    cache.close()
+
+
+def make_device(pnio_dcp, mac, name):
+    device = pnio_dcp.Device()
+    device.MAC, device.name_of_station, device.IP = mac, name, '192.168.0.1'
+    return device
+
+
+def test_requests_are_answered_from_the_cache(pnio_dcp, cached_dcp, simulator, cache_path):
+    assert cached_dcp.get_name_of_station(MAC) == 'station-1'
+    assert cached_dcp.get_name_of_station(MAC) == 'station-1'
+    assert simulator.requests == 1
+
+    # the cache is shared with other instances (and processes) using the same database
+    cache = pnio_dcp.DeviceCache(cache_path)
+    try:
+        assert cache.get([MAC], max_age=60, aspect='name')[MAC].name_of_station == 'station-1'
+        # only the name was received, the device was never identified
+        assert cache.get([MAC], max_age=60, aspect='device') == {}
+    finally:
+        cache.close()
+
+
+def test_set_requests_update_the_cache(cached_dcp, simulator):
+    assert cached_dcp.set_name_of_station(MAC, 'plc-1')
+    requests = simulator.requests
+    assert cached_dcp.get_name_of_station(MAC) == 'plc-1'
+    assert simulator.requests == requests
+
+
+def test_entries_expire_after_max_age(pnio_dcp, cache_path, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(pnio_dcp.time, 'time', lambda: now)
+    cache = pnio_dcp.DeviceCache(cache_path)
+    try:
+        cache.put(make_device(pnio_dcp, MAC, 'plc-1'))
+        now += 10
+        assert cache.get([MAC], max_age=10)[MAC].name_of_station == 'plc-1'
+        now += 1
+        assert cache.get([MAC], max_age=10) == {}
+        cache.invalidate(MAC)
+        assert cache.get([MAC], max_age=60) == {}
+    finally:
+        cache.close()
+
+
+def test_concurrent_puts_are_all_written(pnio_dcp, cache_path, monkeypatch):
+    monkeypatch.setattr(pnio_dcp, 'DEVICE_CACHE_BUFFER_SIZE', 16)
+    cache = pnio_dcp.DeviceCache(cache_path)
+    macs = [f'02:00:00:00:{thread:02x}:{index:02x}' for thread in range(4) for index in range(200)]
+
+    def put(thread_macs):
+        for mac in thread_macs:
+            cache.put(make_device(pnio_dcp, mac, 'plc'))
+
+    threads = [threading.Thread(target=put, args=(macs[start:start + 200],)) for start in range(0, len(macs), 200)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert sorted(cache.get(macs, max_age=60)) == sorted(macs)
+    finally:
+        cache.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='file ownership is not checked on this platform')
+def test_database_writable_by_others_is_not_used(pnio_dcp, cache_path):
+    directory = os.path.dirname(cache_path)
+    os.makedirs(directory)
+    os.chmod(directory, 0o777)
+    cache = pnio_dcp.DeviceCache(cache_path)
+    try:
+        cache.put(make_device(pnio_dcp, MAC, 'plc-1'))
+        assert cache.get([MAC], max_age=60) == {}
+        assert not os.path.exists(cache_path)
+    finally:
+        cache.close()
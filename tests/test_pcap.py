@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from dcp_simulator import SimulatedSocket
+
+MAC = '02:00:00:00:00:01'
+# the simulated stations spread their identify responses over the requested response delay (1.28s)
+IDENTIFY_ALL_TIMEOUT = 1.5
+
+
+def test_recorded_frames_are_replayed(pnio_dcp, simulator, tmp_path):
+    path = str(tmp_path / 'dcp.pcap')
+    dcp = pnio_dcp.DCP(None, timeout=1, l2_socket=SimulatedSocket(simulator), pcap_out=path)
+    try:
+        dcp.identify_all(IDENTIFY_ALL_TIMEOUT)
+        assert dcp.set_name_of_station(MAC, 'plc-1')
+    finally:
+        dcp.close()
+
+    frames = [bytes(frame) for _, frame in pnio_dcp.read_pcap(path)]
+    # two requests and the responses of three stations to identify all and of one station to the set request
+    assert len(frames) == 6
+    host = pnio_dcp.find_host_mac_address(frames)
+    assert host == dcp.src_mac
+
+    offline = pnio_dcp.DCP(None, l2_socket=pnio_dcp.OfflineSocket(host))
+    try:
+        responses = [response for _, response in offline.replay(frames)]
+    finally:
+        offline.close()
+    devices = [response for response in responses if isinstance(response, pnio_dcp.Device)]
+    codes = [response for response in responses if isinstance(response, pnio_dcp.ResponseCode)]
+    assert sorted(device.name_of_station for device in devices) == ['station-1', 'station-2', 'station-3']
+    assert len(codes) == 1 and codes[0]
+
+
+def test_writer_truncates_to_snap_length(pnio_dcp, tmp_path):
+    path = str(tmp_path / 'frames.pcap')
+    writer = pnio_dcp.PcapWriter(path, snap_length=16)
+    writer.write(bytes(range(60)), timestamp=1700000000.25)
+    writer.write(b'short', timestamp=1700000001.5)
+    writer.close()
+    assert list((timestamp, bytes(frame)) for timestamp, frame in pnio_dcp.read_pcap(path)) == [
+        (1700000000.25, bytes(range(16))), (1700000001.5, b'short')]
+
+
+def test_truncated_and_invalid_captures(pnio_dcp, tmp_path):
+    path = tmp_path / 'frames.pcap'
+    writer = pnio_dcp.PcapWriter(str(path))
+    writer.write(bytes(60))
+    writer.write(bytes(60))
+    writer.close()
+    # a capture cut off while writing, e.g. by killing tcpdump, yields the received part of the last frame
+    path.write_bytes(path.read_bytes()[:-10])
+    assert [len(frame) for _, frame in pnio_dcp.read_pcap(str(path))] == [60, 50]
+
+    path.write_bytes(b'not a capture file')
+    with pytest.raises(ValueError):
+        list(pnio_dcp.read_pcap(str(path)))
+
+
+def test_async_requests_are_recorded(pnio_dcp, simulator, tmp_path):
+    path = str(tmp_path / 'async.pcap')
+
+    async def run():
+        instance = pnio_dcp.AsyncDCP(None, timeout=1, l2_socket=SimulatedSocket(simulator), pcap_out=path)
+        try:
+            return await instance.get_name_of_station(MAC)
+        finally:
+            instance.close()
+
+    assert asyncio.run(run()) == 'station-1'
+    assert len(list(pnio_dcp.read_pcap(path))) == 2
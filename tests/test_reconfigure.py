@@ -0,0 +1,47 @@
+import asyncio
+
+from dcp_simulator import SimulatedSocket
+
+MAC = '02:00:00:00:00:01'
+UNKNOWN_MAC = '02:00:00:00:00:99'
+
+
+def test_reconfigure_statuses(dcp):
+    plan = {
+        MAC: {'IP': '10.0.0.1', 'netmask': '255.0.0.0', 'gateway': '10.0.0.254', 'name_of_station': 'plc-1'},
+        '02:00:00:00:00:02': {'name_of_station': 'Invalid Name'},
+        '02:00:00:00:00:03': {'IP': '10.0.0.3'},
+        UNKNOWN_MAC: {'name_of_station': 'plc-99'},
+    }
+    results = dcp.reconfigure(plan, timeout=0.3)
+    assert {mac: result.status for mac, result in results.items()} == {
+        MAC: 'ok', '02:00:00:00:00:02': 'local_error', '02:00:00:00:00:03': 'local_error', UNKNOWN_MAC: 'timeout'}
+    assert results[MAC].observed == plan[MAC]
+    assert results['02:00:00:00:00:03'].error == 'IP, netmask and gateway must be set together.'
+    assert dcp.identify(MAC).name_of_station == 'plc-1'
+
+
+def test_mixed_case_names_are_set_and_verified_lower_case(dcp):
+    result = dcp.reconfigure({MAC: {'name_of_station': 'plc-One'}})[MAC]
+    assert result.status == 'ok'
+    assert result.requested == result.observed == {'name_of_station': 'plc-one'}
+
+
+def test_reconfigure_without_verification(dcp, simulator):
+    result = dcp.reconfigure({MAC: {'name_of_station': 'plc-1'}}, verify=False)[MAC]
+    assert result.status == 'ok'
+    assert result.verified is None
+    assert simulator.requests == 1
+
+
+def test_async_reconfigure(pnio_dcp, simulator):
+    async def run():
+        instance = pnio_dcp.AsyncDCP(None, timeout=1, l2_socket=SimulatedSocket(simulator))
+        try:
+            return await instance.reconfigure({MAC: {'name_of_station': 'plc-1'}, UNKNOWN_MAC: {'name_of_station': 'x'}},
+                                              timeout=0.3)
+        finally:
+            instance.close()
+
+    results = asyncio.run(run())
+    assert {mac: result.status for mac, result in results.items()} == {MAC: 'ok', UNKNOWN_MAC: 'timeout'}